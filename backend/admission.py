@@ -0,0 +1,114 @@
+import threading
+import time
+
+
+class CrewUnavailable(Exception):
+    """The crew path was shed - reason is 'circuit_open', 'overloaded' or 'warming_up'"""
+
+    def __init__(self, reason):
+        super().__init__(f"Crew path unavailable: {reason}")
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures and stays open for
+    reset_seconds. Then one probe call is let through (half-open): success
+    closes the circuit, failure opens it again"""
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def allow(self, now):
+        if self.state == "open" and now - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            return True
+        return self.state == "closed"
+
+    def cancel_probe(self):
+        """The half-open probe never ran - let the next call probe instead"""
+        if self.state == "half_open":
+            self.state = "open"
+
+    def record(self, ok, now):
+        if ok:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = now
+
+
+class AdmissionController:
+    """Decides whether a lead may take the crew path. Tracks the crew calls in
+    flight and a moving average of their latency. The concurrency limit shrinks
+    in proportion once the average exceeds target_latency_seconds, so a slowing
+    upstream gets less traffic instead of a growing backlog. Never below one
+    call, so latency keeps being measured and the limit recovers"""
+
+    def __init__(self, max_in_flight, target_latency_seconds, breaker=None, smoothing=0.2):
+        self.max_in_flight = max_in_flight
+        self.target_latency_seconds = target_latency_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.latency_seconds = None
+        self.admitted = 0
+        self.shed = {"circuit_open": 0, "overloaded": 0}
+        self._lock = threading.Lock()
+
+    def limit(self):
+        if self.latency_seconds is None or self.latency_seconds <= self.target_latency_seconds:
+            return self.max_in_flight
+        return max(1, int(self.max_in_flight * self.target_latency_seconds / self.latency_seconds))
+
+    def acquire(self):
+        """Take an in-flight slot or raise CrewUnavailable"""
+        with self._lock:
+            if self.in_flight >= self.limit():
+                reason = "overloaded"
+            elif not self.breaker.allow(time.monotonic()):
+                reason = "circuit_open"
+            else:
+                self.in_flight += 1
+                self.admitted += 1
+                return
+            self.shed[reason] += 1
+        raise CrewUnavailable(reason)
+
+    def release(self, seconds=None, ok=None):
+        """Give the slot back. ok=None (e.g. cancelled before it started) records no outcome"""
+        with self._lock:
+            self.in_flight -= 1
+            if ok is None:
+                self.breaker.cancel_probe()
+                return
+            if seconds is not None:
+                if self.latency_seconds is None:
+                    self.latency_seconds = seconds
+                else:
+                    self.latency_seconds += self.smoothing * (seconds - self.latency_seconds)
+            self.breaker.record(ok, time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "limit": self.limit(),
+                "max_in_flight": self.max_in_flight,
+                "latency_seconds": round(self.latency_seconds, 3) if self.latency_seconds is not None else None,
+                "target_latency_seconds": self.target_latency_seconds,
+                "circuit": self.breaker.state,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "circuit_opened": self.breaker.times_opened,
+                "admitted": self.admitted,
+                "shed": dict(self.shed),
+            }
@@ -0,0 +1,63 @@
+import pytest
+from admission import AdmissionController, CircuitBreaker, CrewUnavailable
+
+
+def shed_reason(controller):
+    with pytest.raises(CrewUnavailable) as shed:
+        controller.acquire()
+    return shed.value.reason
+
+
+def test_limit_shrinks_with_latency():
+    controller = AdmissionController(max_in_flight=8, target_latency_seconds=2.0, smoothing=1.0)
+    for _ in range(8):
+        controller.acquire()
+    assert shed_reason(controller) == "overloaded"
+
+    # Calls at 4x the target latency leave a quarter of the slots
+    for _ in range(8):
+        controller.release(8.0, ok=True)
+    assert controller.limit() == 2
+    controller.acquire()
+    controller.acquire()
+    assert shed_reason(controller) == "overloaded"
+
+    # The limit never drops below one call, so recovery can be observed
+    controller.release(1000.0, ok=True)
+    assert controller.limit() == 1
+    controller.release(1.0, ok=True)
+    assert controller.limit() == 8
+    assert controller.stats()["shed"] == {"circuit_open": 0, "overloaded": 2}
+
+
+def test_circuit_breaker_opens_and_probes():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10)
+    controller = AdmissionController(max_in_flight=4, target_latency_seconds=5.0, breaker=breaker)
+    for _ in range(3):
+        controller.acquire()
+        controller.release(0.5, ok=False)
+    assert breaker.state == "open"
+    assert shed_reason(controller) == "circuit_open"
+
+    # After reset_seconds a single probe is let through
+    breaker.opened_at -= 10
+    controller.acquire()
+    assert breaker.state == "half_open"
+    assert shed_reason(controller) == "circuit_open"
+    controller.release(0.5, ok=False)
+    assert breaker.state == "open" and breaker.times_opened == 2
+
+    # A probe that never ran hands the probe to the next call; success closes
+    breaker.opened_at -= 10
+    controller.acquire()
+    controller.release()
+    controller.acquire()
+    controller.release(0.5, ok=True)
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+    controller.acquire()
+
+
+if __name__ == "__main__":
+    test_limit_shrinks_with_latency()
+    test_circuit_breaker_opens_and_probes()
+    print("All admission checks passed")
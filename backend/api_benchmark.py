@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Drive /qualify-lead in-process with the LLM stubbed out - no network, no key
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["RESULT_CACHE_BACKEND"] = "none"
+os.environ["NEAR_DUPLICATE_BACKEND"] = "none"
+os.environ["COMPANY_PROFILE_BACKEND"] = "none"
+os.environ["CREW_VERBOSE"] = "false"
+os.environ["CREW_WARM_UP"] = "lazy"
+# The same few leads are sent over and over from one client - the prefilter's
+# content checks stay on, its rate and duplicate limits would reject them
+os.environ["PREFILTER_MAX_PER_EMAIL"] = "0"
+os.environ["PREFILTER_MAX_PER_IP"] = "0"
+os.environ["PREFILTER_MAX_DUPLICATE_SENDERS"] = "0"
+
+import httpx
+import app
+from stub_llm import StubLLM, OUTPUT_SHAPES
+
+# Share of leads whose rule score is borderline, so they escalate to the crew
+SCENARIOS = {"rules": 0.0, "crew": 1.0, "mixed": 0.3}
+
+# Sample leads by the tier that decides them - the rule scores are 9 and 2
+# (decisive) and 6 (borderline) with the default bands
+RULE_DECIDED_LEADS = [
+    {
+        "name": "Sarah Johnson",
+        "email": "sarah.johnson@techcorp.com",
+        "phone": "+1-458-789-3456",
+        "company": "TechCorp Solutions",
+        "message": "I'm the CTO at TechCorp and we urgently need to implement your lead qualification system by next month. We have a budget of $50,000 for this project and we're evaluating 2-3 vendors this week.",
+    },
+    {
+        "name": "Alex",
+        "email": "alex.smith1985@gmail.com",
+        "phone": "",
+        "company": "",
+        "message": "Just browsing your website. What do you guys do exactly? Send me some info.",
+    },
+]
+ESCALATED_LEAD = {
+    "name": "Michael Rodriguez",
+    "email": "m.rodriguez@midmarket.co",
+    "phone": "+1-332-555-7890",
+    "company": "Midmarket Enterprises",
+    "message": "We're looking to improve our lead qualification process. Could you provide some pricing information and case studies?",
+}
+
+
+def build_leads(count, crew_share, seed=0):
+    """count leads with crew_share of them borderline. The result cache is off, so
+    repeats still run the crew - and a recorded cassette covers every lead"""
+    rng = random.Random(seed)
+    leads = []
+    for _ in range(count):
+        template = ESCALATED_LEAD if rng.random() < crew_share else rng.choice(RULE_DECIDED_LEADS)
+        leads.append(dict(template, source="Benchmark"))
+    return leads
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def drive(client, leads, concurrency):
+    """POST every lead with concurrency requests in flight; returns per-request latencies"""
+    latencies = []
+    pending = iter(leads)
+
+    async def client_loop():
+        for lead in pending:
+            start = time.perf_counter()
+            response = await client.post("/qualify-lead", json=lead)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies
+
+
+async def run_scenario(name, crew_share, requests, concurrency, alloc_requests, seed):
+    leads = build_leads(requests, crew_share, seed)
+    alloc_leads = build_leads(alloc_requests, crew_share, seed + 1)
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Warm up with a separate set of leads
+        await drive(client, build_leads(concurrency * 2, crew_share, seed + 2), concurrency)
+
+        start = time.perf_counter()
+        latencies = sorted(await drive(client, leads, concurrency))
+        elapsed = time.perf_counter() - start
+
+        # Allocations are measured in their own pass - tracing slows everything down
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        await drive(client, alloc_leads, concurrency)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "retained_kib_per_request": round((current - baseline) / 1024 / alloc_requests, 2),
+        "peak_kib": round((peak - baseline) / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against a saved run - p95 up or throughput down by more than tolerance"""
+    previous = {result["scenario"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result['scenario']}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result['scenario']}: throughput {before['throughput_rps']} -> {result['throughput_rps']} req/s"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /qualify-lead in-process with a stub LLM")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated: rules, crew, mixed")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=app.CREW_MAX_WORKERS)
+    parser.add_argument("--alloc-requests", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub LLM latency per call")
+    parser.add_argument("--cassette", help="replay recorded LLM completions from this cassette instead of the stub")
+    parser.add_argument("--cassette-mode", choices=("record", "replay"), default="replay",
+                        help="record calls OpenAI once to fill the cassette")
+    parser.add_argument("--output-shape", choices=sorted(OUTPUT_SHAPES), default="json")
+    parser.add_argument("--process-mode", choices=("sequential", "parallel", "single"), default=app.CREW_PROCESS_MODE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="fail when worse than the results saved in this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.cassette:
+        llm = app.create_llm(cassette_mode=args.cassette_mode, cassette_path=args.cassette)
+    else:
+        llm = StubLLM(latency_seconds=args.latency_ms / 1000, output_shape=args.output_shape)
+    app.qualification_system = app.LeadQualificationSystem(llm=llm, process_mode=args.process_mode)
+    app.qualification_system.warm_up()
+
+    llm_label = (f"{args.cassette_mode} cassette {args.cassette}" if args.cassette
+                 else f"stub latency {args.latency_ms} ms, {args.output_shape} output")
+    print(f"=== /qualify-lead benchmark: {args.requests} requests, concurrency {args.concurrency}, "
+          f"{llm_label}, {args.process_mode} crew ===")
+    print(f"{'scenario':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} "
+          f"{'KiB/req':>9} {'peak KiB':>9}")
+    results = []
+    for name in args.scenarios.split(","):
+        result = asyncio.run(run_scenario(
+            name, SCENARIOS[name], args.requests, args.concurrency, args.alloc_requests, args.seed
+        ))
+        results.append(result)
+        print(f"{name:>8} {result['throughput_rps']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+              f"{result['p99_ms']:>9} {result['max_ms']:>9} {result['retained_kib_per_request']:>9} "
+              f"{result['peak_kib']:>9}")
+    print(f"LLM cassette: {llm.stats()}" if args.cassette else f"LLM calls: {llm.calls}")
+
+    run = {"settings": vars(args), "results": results}
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(run, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import os
+
+# The endpoints are driven in-process with the LLM stubbed out - no network, no key
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["CREW_VERBOSE"] = "false"
+os.environ["CREW_WARM_UP"] = "lazy"
+
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from starlette.requests import Request
+import app
+import metrics
+from admission import AdmissionController, CircuitBreaker
+from job_queue import JobQueue, MemoryJobStore
+from prefilter import LeadPrefilter
+from result_cache import MemoryResultCache
+from stub_llm import StubLLM
+
+# Rule scores 9 and 2 are decisive with the default bands, 6 escalates to the crew
+HOT_LEAD = {
+    "name": "Sarah Johnson",
+    "email": "sarah.johnson@techcorp.com",
+    "phone": "+1-458-789-3456",
+    "company": "TechCorp Solutions",
+    "message": "I'm the CTO at TechCorp and we urgently need to implement your lead qualification system by next month. We have a budget of $50,000 for this project and we're evaluating 2-3 vendors this week.",
+}
+COLD_LEAD = {
+    "name": "Alex",
+    "email": "alex.smith1985@gmail.com",
+    "phone": "",
+    "company": "",
+    "message": "Just browsing your website. What do you guys do exactly? Send me some info.",
+}
+ESCALATED_LEAD = {
+    "name": "Michael Rodriguez",
+    "email": "m.rodriguez@midmarket.co",
+    "phone": "+1-332-555-7890",
+    "company": "Midmarket Enterprises",
+    "message": "We're looking to improve our lead qualification process. Could you provide some pricing information and case studies?",
+}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """A stubbed crew behind fresh admission control, with no caches or prefilter in the way"""
+    stub = StubLLM(analysis={"score": 7, "category": "WARM", "reason": "Stubbed analysis"})
+    system = app.LeadQualificationSystem(llm=stub, process_mode="sequential")
+    system.result_cache = system.near_duplicates = system.company_profiles = None
+    system.warm_up()
+    monkeypatch.setattr(app, "qualification_system", system)
+    monkeypatch.setattr(app, "lead_prefilter", None)
+    monkeypatch.setattr(app, "crew_admission", AdmissionController(4, 15.0, breaker=CircuitBreaker(5, 30.0)))
+    return stub
+
+
+def post(path, payload, **kwargs):
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test") as client:
+            return await client.post(path, json=payload, **kwargs)
+    return asyncio.run(send())
+
+
+def wait_for_crew_slots():
+    """Timed-out crew runs keep their worker until the stub returns"""
+    deadline = time.monotonic() + 5
+    while app.crew_admission.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_decisive_rule_scores_never_reach_the_crew(llm):
+    assert post("/qualify-lead", HOT_LEAD).json()["tier"] == "rules"
+    assert post("/qualify-lead", COLD_LEAD).json()["tier"] == "rules"
+    assert llm.calls == 0
+
+    result = post("/qualify-lead", ESCALATED_LEAD).json()
+    assert (result["tier"], result["score"]) == ("crew", 7)
+    assert llm.calls == 2
+
+
+def test_crew_timeout_falls_back_to_rules(llm, monkeypatch):
+    llm.latency_seconds = 0.3
+    monkeypatch.setattr(app, "CREW_TIMEOUT_SECONDS", 0.05)
+    result = post("/qualify-lead", ESCALATED_LEAD).json()
+    wait_for_crew_slots()
+    assert result["tier"] == "rules_after_crew"
+    assert result["score"] == app.qualification_system._direct_score_lead(ESCALATED_LEAD)["score"]
+    assert not result.get("degraded")
+
+
+def test_shed_crew_path_answers_degraded(llm, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30.0)
+    breaker.record(False, time.monotonic())
+    monkeypatch.setattr(app, "crew_admission", AdmissionController(4, 15.0, breaker=breaker))
+    result = post("/qualify-lead", ESCALATED_LEAD).json()
+    assert (result["tier"], result["degraded"], result["degraded_reason"]) == ("rules", True, "circuit_open")
+
+    busy = AdmissionController(1, 15.0)
+    busy.acquire()
+    monkeypatch.setattr(app, "crew_admission", busy)
+    result = post("/qualify-lead", ESCALATED_LEAD).json()
+    assert (result["degraded"], result["degraded_reason"]) == (True, "overloaded")
+    assert llm.calls == 0
+
+
+def test_crews_still_warming_up_leave_leads_to_the_rules(llm, monkeypatch):
+    cold_system = app.LeadQualificationSystem(llm=llm, process_mode="sequential")
+    cold_system.result_cache = cold_system.near_duplicates = cold_system.company_profiles = None
+    monkeypatch.setattr(app, "qualification_system", cold_system)
+    monkeypatch.setattr(app, "CREW_WARM_UP", "background")
+    start = time.perf_counter()
+    result = post("/qualify-lead", ESCALATED_LEAD).json()
+    assert time.perf_counter() - start < 1
+    assert (result["tier"], result["degraded"], result["degraded_reason"]) == ("rules", True, "warming_up")
+    # The request didn't build the crews itself
+    assert not cold_system.crew_ready and llm.calls == 0
+
+    # A lazy warm-up is left to the first crew request
+    monkeypatch.setattr(app, "CREW_WARM_UP", "lazy")
+    assert post("/qualify-lead", ESCALATED_LEAD).json()["tier"] == "crew"
+    assert cold_system.crew_ready
+
+
+def test_batch_keeps_lead_order_and_reports_failures(llm, monkeypatch):
+    analyze_lead = app.qualification_system.analyze_lead
+
+    def failing_for_one_lead(lead_data, **kwargs):
+        if lead_data["email"] == "broken@midmarket.co":
+            raise RuntimeError("upstream exploded")
+        return analyze_lead(lead_data, **kwargs)
+    monkeypatch.setattr(app.qualification_system, "analyze_lead", failing_for_one_lead)
+
+    leads = [ESCALATED_LEAD, COLD_LEAD, dict(ESCALATED_LEAD, email="broken@midmarket.co"), HOT_LEAD]
+    body = post("/qualify-leads", leads).json()
+    assert [result["tier"] for result in body["results"]] == ["crew", "rules", "rules_after_crew", "rules"]
+    summary = body["summary"]
+    assert (summary["total"], summary["decided_by_rules"], summary["crew_completed"], summary["failed"]) == (4, 2, 1, 1)
+    assert summary["failures"] == [
+        {"index": 2, "email": "broken@midmarket.co", "error": "Crew analysis error: upstream exploded"}
+    ]
+
+
+def test_stream_sends_the_rule_result_then_each_stage(llm):
+    response = post("/qualify-lead/stream", ESCALATED_LEAD, params={"format": "ndjson"})
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["direct", "analysis", "market_insights", "result"]
+    assert events[0]["data"]["tier"] == "rules"
+    assert events[-1]["data"]["tier"] == "crew"
+
+    # A decisive lead streams its rule result and is done
+    response = post("/qualify-lead/stream", HOT_LEAD)
+    assert [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")] == [
+        "direct", "result"
+    ]
+
+
+def test_every_trace_is_closed(llm, monkeypatch):
+    def counted(path):
+        return next((value for labels, value in metrics.QUALIFICATIONS.snapshot() if labels == [["path", path]]), 0)
+    before = {path: counted(path) for path in ("async_submitted", "crew", "error")}
+
+    queue = JobQueue(MemoryJobStore(), handler=app.qualify_lead_dict, workers=1)
+    monkeypatch.setattr(app, "job_queue", queue)
+
+    async def submit_and_wait():
+        await queue.start()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test") as client:
+                response = await client.post("/qualify-lead", params={"async": "true"}, json=ESCALATED_LEAD)
+                assert response.status_code == 202
+                while (await client.get(response.json()["status_url"])).json()["status"] != "done":
+                    await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+    asyncio.run(submit_and_wait())
+    # The submission is timed on its own, the job under the path that decided it
+    assert counted("async_submitted") == before["async_submitted"] + 1
+    assert counted("crew") == before["crew"] + 1
+
+    async def failing(lead_dict):
+        raise RuntimeError("scoring exploded")
+    monkeypatch.setattr(app, "qualify_tiered", failing)
+    with pytest.raises(RuntimeError):
+        asyncio.run(app.qualify_lead_dict(ESCALATED_LEAD))
+    assert counted("error") == before["error"] + 1
+
+
+def test_async_submissions_to_a_full_queue_are_refused(llm, monkeypatch):
+    monkeypatch.setattr(app, "job_queue", JobQueue(MemoryJobStore(), handler=app.qualify_lead_dict, max_queued=0))
+    response = post("/qualify-lead", ESCALATED_LEAD, params={"async": "true"})
+    assert response.status_code == 503
+    assert llm.calls == 0
+
+
+def test_direct_score_fallbacks_are_not_cached(llm):
+    system = app.qualification_system
+    system.result_cache = MemoryResultCache()
+    # A low crew score for a lead with high intent signals is replaced by the rule score
+    llm.analysis = {"score": 2, "category": "COLD", "reason": "Stubbed analysis"}
+    result = system.analyze_lead(HOT_LEAD, check_cache=False)
+    assert result["score"] == system._direct_score_lead(HOT_LEAD)["score"]
+    assert system.result_cache.size() == 0
+
+    llm.analysis = {"score": 7, "category": "WARM", "reason": "Stubbed analysis"}
+    system.analyze_lead(ESCALATED_LEAD, check_cache=False)
+    assert system.result_cache.size() == 1
+
+
+def test_client_ip_ignores_hops_the_visitor_forged():
+    def seen_ip(peer, forwarded):
+        headers = [(b"x-forwarded-for", forwarded.encode())]
+        return app.client_ip(Request({"type": "http", "client": (peer, 40000), "headers": headers}))
+
+    # Through the trusted frontend the hop it appended counts, not one the visitor put in front
+    assert seen_ip("127.0.0.1", "6.6.6.6, 203.0.113.7") == "203.0.113.7"
+    assert seen_ip("127.0.0.1", "203.0.113.7, 127.0.0.1") == "203.0.113.7"
+    # Anyone else's header is ignored
+    assert seen_ip("198.51.100.2", "6.6.6.6") == "198.51.100.2"
+    # No visitor hop - a server-to-server call with no visitor IP to limit
+    assert seen_ip("127.0.0.1", "127.0.0.1") is None
+    assert app.client_ip(Request({"type": "http", "client": ("127.0.0.1", 40000), "headers": []})) is None
+
+
+def test_leads_without_a_visitor_ip_share_no_rate_limit(llm, monkeypatch):
+    monkeypatch.setattr(app, "lead_prefilter", LeadPrefilter(max_per_ip=30, max_duplicate_senders=0))
+
+    async def send_all():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test") as client:
+            return [
+                (await client.post("/qualify-lead", json=dict(HOT_LEAD, email=f"buyer{index}@techcorp.com"))).json()
+                for index in range(35)
+            ]
+    # e.g. Make.com or the frontend without a forwarded address, well past 30 leads an hour
+    assert {(result["tier"], result["category"]) for result in asyncio.run(send_all())} == {("rules", "HOT")}
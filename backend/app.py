@@ -1,19 +1,224 @@
 import os
 from dotenv import load_dotenv
-from langchain_openai import OpenAI
-from crewai import Agent, Task, Crew
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Query, Request
+from pydantic import BaseModel, Field, ValidationError
 import uvicorn
-from typing import Optional
+from typing import Any, Dict, Optional, List, Literal
 import re
 import json
+import asyncio
+import contextvars
+import functools
+import hashlib
+import hmac
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import traceback
+import scoring_rules
+from result_cache import create_result_cache, make_cache_key
+from near_duplicates import create_near_duplicate_index, lead_text
+from company_profiles import company_domain, make_profile_key
+from job_queue import JobQueue, JobQueueFull, create_job_store
+from webhook_delivery import WebhookDelivery
+from admission import AdmissionController, CircuitBreaker, CrewUnavailable
+from prompt_builder import PromptBuilder
+from prefilter import REJECTION_REASONS, LeadPrefilter
+import json_extraction
+from json_extraction import ANALYSIS_SCHEMA, RESEARCH_SCHEMA, SCORE_SCHEMA
+import metrics
 
 # Load environment variables
 load_dotenv()
 
+# JSON extraction from agent output is timed as its own stage
+find_json_object = metrics.timed("json_extraction")(json_extraction.find_json_object)
+extract_json_objects = metrics.timed("json_extraction")(json_extraction.extract_json_objects)
+
+# Crew execution limits - the crew path blocks on synchronous LLM calls,
+# so it runs in a bounded thread pool instead of on the event loop
+CREW_MAX_WORKERS = int(os.getenv("CREW_MAX_WORKERS", "4"))
+CREW_TIMEOUT_SECONDS = float(os.getenv("CREW_TIMEOUT_SECONDS", "60"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+
+# Load shedding for the crew path - past CREW_MAX_IN_FLIGHT crew calls (fewer
+# once their average latency exceeds CREW_TARGET_LATENCY_SECONDS) borderline
+# leads get their rule score, marked degraded. CREW_CIRCUIT_FAILURES failures in
+# a row skip the crew entirely for CREW_CIRCUIT_RESET_SECONDS
+CREW_MAX_IN_FLIGHT = int(os.getenv("CREW_MAX_IN_FLIGHT", str(CREW_MAX_WORKERS * 2)))
+CREW_TARGET_LATENCY_SECONDS = float(os.getenv("CREW_TARGET_LATENCY_SECONDS", "15"))
+CREW_CIRCUIT_FAILURES = int(os.getenv("CREW_CIRCUIT_FAILURES", "5"))
+CREW_CIRCUIT_RESET_SECONDS = float(os.getenv("CREW_CIRCUIT_RESET_SECONDS", "30"))
+
+# Result cache for crew analyses - repeat submissions of the same lead skip the LLM
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "result_cache.sqlite3")
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "86400"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+
+# Near-duplicate reuse - retries and resubmissions with a lightly edited message
+# miss the exact cache. A lead whose text is at least NEAR_DUPLICATE_THRESHOLD
+# similar (estimated Jaccard over character shingles) to one the same email
+# address got a crew result for within NEAR_DUPLICATE_WINDOW_SECONDS reuses it.
+# "memory" keeps the MinHash index in process, "sqlite" also persists it to
+# NEAR_DUPLICATE_PATH and shares it between workers, "none" turns it off. Each
+# worker keeps its own copy of the index, about 2 KB per lead, so
+# NEAR_DUPLICATE_MAX_ENTRIES is per worker (100000 leads is roughly 200 MB)
+NEAR_DUPLICATE_BACKEND = os.getenv("NEAR_DUPLICATE_BACKEND", "memory")
+NEAR_DUPLICATE_PATH = os.getenv("NEAR_DUPLICATE_PATH", "near_duplicates.sqlite3")
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+NEAR_DUPLICATE_WINDOW_SECONDS = int(os.getenv("NEAR_DUPLICATE_WINDOW_SECONDS", "86400"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "100000"))
+
+# Company profiles - the Market Researcher's JSON per email domain and company
+# name. A lead from an already researched company skips the research agent and
+# gets the cached profile merged in. Same backends as the result cache; company
+# facts change slowly, so profiles live longer
+COMPANY_PROFILE_BACKEND = os.getenv("COMPANY_PROFILE_BACKEND", "memory")
+COMPANY_PROFILE_PATH = os.getenv("COMPANY_PROFILE_PATH", "company_profiles.sqlite3")
+COMPANY_PROFILE_TTL_SECONDS = int(os.getenv("COMPANY_PROFILE_TTL_SECONDS", "604800"))
+COMPANY_PROFILE_MAX_ENTRIES = int(os.getenv("COMPANY_PROFILE_MAX_ENTRIES", "50000"))
+
+# How the analyzer and researcher run - one after the other ("sequential"),
+# at the same time ("parallel"), which roughly halves crew latency, or as one
+# combined completion ("single"), which replaces both LLM round trips
+CREW_PROCESS_MODE = os.getenv("CREW_PROCESS_MODE", "sequential")
+
+# OpenAI completion model used by the agents - also part of the cache key
+OPENAI_MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-3.5-turbo-instruct")
+
+# When the crew tier is built. CrewAI and LangChain take seconds to import, so
+# the API starts without them: "background" builds the crews in a thread right
+# after startup, "eager" builds them before serving, "lazy" on the first crew request
+CREW_WARM_UP = os.getenv("CREW_WARM_UP", "background")
+# Until the crews are built, escalated leads get their rule score (degraded
+# "warming_up"). A failed background or eager warm-up is retried this often
+CREW_WARM_UP_RETRY_SECONDS = float(os.getenv("CREW_WARM_UP_RETRY_SECONDS", "30"))
+
+# LLM record/replay for development and CI - "record" calls OpenAI and stores
+# every completion in LLM_CASSETTE_PATH, "replay" serves stored completions with
+# no network or API key, "auto" replays what is stored and records the rest
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.sqlite3")
+
+# Shared keep-alive connection pool for the OpenAI calls, and client-side rate
+# limits matching the account's OpenAI limits (0 turns a limit off). Identical
+# prompts in flight at the same time are sent once with LLM_COALESCE_PROMPTS
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", str(CREW_MAX_WORKERS * 2)))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "3500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "90000"))
+LLM_COALESCE_PROMPTS = os.getenv("LLM_COALESCE_PROMPTS", "true").lower() in ("1", "true", "yes")
+
+# Console trace of every agent step - turn off in production
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "true").lower() in ("1", "true", "yes")
+
+# Tiered scoring - rule scores at or below the cold band or at or above the hot
+# band are decisive and skip the crew; only the borderline middle escalates
+TIERED_SCORING = os.getenv("TIERED_SCORING", "true").lower() in ("1", "true", "yes")
+RULE_COLD_MAX_SCORE = int(os.getenv("RULE_COLD_MAX_SCORE", "2"))
+RULE_HOT_MIN_SCORE = int(os.getenv("RULE_HOT_MIN_SCORE", "9"))
+
+# Spam prefilter in front of scoring - leads from disposable email domains, with
+# fewer than PREFILTER_MIN_WORDS message words (PREFILTER_FREE_MAIL_MIN_WORDS
+# from a webmail address without a company), over the per-email or per-IP
+# submission limit, or with a message already sent from more than
+# PREFILTER_MAX_DUPLICATE_SENDERS other addresses are answered COLD at once.
+# Limits are per PREFILTER_WINDOW_SECONDS, 0 turns one off. X-Forwarded-For is
+# only believed from TRUSTED_PROXY_IPS - the frontend forwards the visitor's IP
+LEAD_PREFILTER = os.getenv("LEAD_PREFILTER", "true").lower() in ("1", "true", "yes")
+PREFILTER_MIN_WORDS = int(os.getenv("PREFILTER_MIN_WORDS", "3"))
+PREFILTER_FREE_MAIL_MIN_WORDS = int(os.getenv("PREFILTER_FREE_MAIL_MIN_WORDS", "8"))
+PREFILTER_MAX_PER_EMAIL = int(os.getenv("PREFILTER_MAX_PER_EMAIL", "5"))
+PREFILTER_MAX_PER_IP = int(os.getenv("PREFILTER_MAX_PER_IP", "30"))
+PREFILTER_MAX_DUPLICATE_SENDERS = int(os.getenv("PREFILTER_MAX_DUPLICATE_SENDERS", "3"))
+PREFILTER_WINDOW_SECONDS = int(os.getenv("PREFILTER_WINDOW_SECONDS", "3600"))
+TRUSTED_PROXY_IPS = frozenset(ip.strip() for ip in os.getenv("TRUSTED_PROXY_IPS", "127.0.0.1,::1").split(",") if ip.strip())
+
+# Submit/poll job queue for POST /qualify-lead?async=1 - "sqlite" keeps
+# queued jobs across restarts, JOB_WEBHOOK_URL is POSTed each finished job
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "memory")
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(CREW_MAX_WORKERS)))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "86400"))
+JOB_MAX_ENTRIES = int(os.getenv("JOB_MAX_ENTRIES", "10000"))
+JOB_WEBHOOK_URL = os.getenv("JOB_WEBHOOK_URL", "")
+# A running job is leased to its worker and the lease renewed while it runs -
+# another worker sharing the store only takes the job over once it lapses
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Async submissions are answered 503 while this many jobs are waiting, across
+# every worker sharing the store
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+
+# Background Make.com delivery for POST /webhook-deliveries - retried with
+# exponential backoff, then written to the dead-letter file. A batch size above 1
+# sends {"leads": [...]} and needs a scenario that iterates over the array
+MAKE_WEBHOOK_URL = os.getenv("MAKE_WEBHOOK_URL", "https://hook.eu2.make.com/z2t98fek6llh43lihtjknw27iga7sirc")
+MAKE_WEBHOOK_BATCH_SIZE = int(os.getenv("MAKE_WEBHOOK_BATCH_SIZE", "1"))
+MAKE_WEBHOOK_MAX_ATTEMPTS = int(os.getenv("MAKE_WEBHOOK_MAX_ATTEMPTS", "5"))
+MAKE_WEBHOOK_DEAD_LETTER_PATH = os.getenv("MAKE_WEBHOOK_DEAD_LETTER_PATH", "webhook_dead_letter.jsonl")
+# Shared secret the frontend sends as X-Webhook-Delivery-Token. Without one only
+# callers on TRUSTED_PROXY_IPS (the frontend's own host) may queue deliveries
+WEBHOOK_DELIVERY_TOKEN = os.getenv("WEBHOOK_DELIVERY_TOKEN", "")
+
+# Print every qualification's timing spans as a JSON line
+METRICS_LOG_TRACES = os.getenv("METRICS_LOG_TRACES", "false").lower() in ("1", "true", "yes")
+
+# Multi-worker metrics (set by serve.py) - every worker writes its metrics to a
+# file in this directory every METRICS_SNAPSHOT_SECONDS, and /metrics sums them
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_SNAPSHOT_SECONDS = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "5"))
+
+# Scoring rubric of the Lead Analyzer. It is part of the agent's backstory, so
+# it sits in the system prompt - a prefix identical for every lead, which the
+# provider can serve from its prompt cache - instead of in every task prompt
+SCORING_RUBRIC = """Leads are scored out of 10 points:
+1. Intent Level (4 points): clear budget mention +2, decision maker status +1.5, urgent timeline +0.5
+2. Contact Info (3 points): valid business email +1, valid phone +1, full name +0.5, company name +0.5
+3. Company/Message Quality (3 points): specific company details +1, clear use case +1.5, business scale mentioned +0.5"""
+
+# Token budgets for the lead message in the task prompts - a longer message is cut
+# to its opening and the sentences with the most scoring signals. The researcher
+# needs less context, so it gets a shorter excerpt and no name or phone
+PROMPT_MESSAGE_TOKENS = int(os.getenv("PROMPT_MESSAGE_TOKENS", "400"))
+PROMPT_RESEARCH_MESSAGE_TOKENS = int(os.getenv("PROMPT_RESEARCH_MESSAGE_TOKENS", "80"))
+
+# Task prompt templates - CrewAI fills the {field} placeholders on kickoff
+ANALYSIS_TASK_TEMPLATE = """Score this lead with your scoring criteria. You MUST respond in valid JSON format.
+Name: {name}
+Email: {email}
+Phone: {phone}
+Company: {company}
+Message: {message}
+Respond with this exact JSON structure:
+{{"score": <number 0-10>, "category": "<HOT/WARM/COLD>", "reason": "<explanation>"}}"""
+
+RESEARCH_TASK_TEMPLATE = """Research the company and market context of this lead.
+Company: {company}
+Email domain: {email_domain}
+Message excerpt: {message_excerpt}
+Respond with this exact JSON structure:
+{{"company_size": "<Small/Medium/Large>", "industry": "<Industry>", "potential_value": "<High/Medium/Low>", "key_insight": "<one key market insight>"}}"""
+
+COMBINED_TASK_TEMPLATE = """Score this lead with your scoring criteria and research its company and market context in one answer.
+You MUST respond with a single valid JSON object and nothing else.
+Name: {name}
+Email: {email}
+Phone: {phone}
+Company: {company}
+Message: {message}
+Respond with exactly this JSON structure - every field is required:
+{{"score": <integer 0-10>, "category": "<HOT/WARM/COLD>", "reason": "<explanation>", "company_size": "<Small/Medium/Large>", "industry": "<Industry>", "potential_value": "<High/Medium/Low>", "key_insight": "<one key market insight>"}}"""
+
+# Part of the cache key - changes whenever the agent prompts do
+PROMPT_VERSION = hashlib.sha256(
+    (SCORING_RUBRIC + ANALYSIS_TASK_TEMPLATE + RESEARCH_TASK_TEMPLATE + COMBINED_TASK_TEMPLATE +
+     f"{PROMPT_MESSAGE_TOKENS}/{PROMPT_RESEARCH_MESSAGE_TOKENS}").encode('utf-8')
+).hexdigest()[:12]
+
 # Initialize FastAPI
 app = FastAPI(title="Lead Qualification API")
 
@@ -39,39 +244,223 @@ class LeadData(BaseModel):
         populate_by_name = True
         allow_population_by_field_name = True
 
-class LeadQualificationSystem:
-    def __init__(self):
+# Structured output of the single-call mode - the analyzer and researcher fields in one object
+class LeadAnalysis(BaseModel):
+    score: int = Field(ge=0, le=10)
+    category: Literal["HOT", "WARM", "COLD"]
+    reason: str
+
+class MarketResearch(BaseModel):
+    company_size: str
+    industry: str
+    potential_value: Literal["High", "Medium", "Low"]
+    key_insight: str
+
+class CombinedQualification(LeadAnalysis, MarketResearch):
+    pass
+
+# Agent definitions - every crew in the pool gets its own agent instances,
+# since CrewAI attaches per-run state to the agents during kickoff
+AGENT_PROFILES = {
+    'Lead Analyzer': {
+        'goal': 'Analyze lead information for qualification',
+        'backstory': 'Expert at analyzing lead quality and potential. ' + SCORING_RUBRIC
+    },
+    'Market Researcher': {
+        'goal': 'Research company and market context',
+        'backstory': 'Expert at gathering and analyzing market information'
+    },
+    'Decision Maker': {
+        'goal': 'Make final qualification decision',
+        'backstory': 'Expert at evaluating leads and making qualification decisions'
+    }
+}
+
+def create_llm(cassette_mode=None, cassette_path=None):
+    """The agents' LLM - the OpenAI model behind the shared connection pool and
+    rate limiter, wrapped in a record/replay cassette unless the cassette mode is "off" """
+    cassette_mode = cassette_mode or LLM_CASSETTE_MODE
+    inner = None
+    if cassette_mode != "replay":
+        from langchain_openai import OpenAI
+        from llm_transport import RateLimiter, ThrottledLLM, configure_http_pool
+        
         # Initialize OpenAI
-        self.llm = OpenAI(
-            temperature=0.2,
-            api_key=os.getenv("OPENAI_API_KEY")
+        configure_http_pool(LLM_MAX_CONNECTIONS, keepalive_seconds=LLM_KEEPALIVE_SECONDS)
+        inner = ThrottledLLM(
+            OpenAI(
+                model_name=OPENAI_MODEL_NAME,
+                temperature=0.2,
+                api_key=os.getenv("OPENAI_API_KEY")
+            ),
+            rate_limiter=RateLimiter(OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT),
+            coalesce=LLM_COALESCE_PROMPTS
         )
+        if cassette_mode == "off":
+            return inner
+    
+    from llm_cassette import CassetteLLM, CassetteStore
+    store = CassetteStore(cassette_path or LLM_CASSETTE_PATH)
+    return CassetteLLM(store, cassette_mode, inner=inner, model=OPENAI_MODEL_NAME)
+
+class LeadQualificationSystem:
+    def __init__(self, llm=None, process_mode=None):
+        self.process_mode = (process_mode or CREW_PROCESS_MODE).lower()
+        if self.process_mode not in ("sequential", "parallel", "single"):
+            raise ValueError(
+                f"Unknown crew process mode '{self.process_mode}' - expected sequential, parallel or single"
+            )
         
-        # Define our specialized agents
-        self.lead_analyzer = Agent(
-            role='Lead Analyzer',
-            goal='Analyze lead information for qualification',
-            backstory='Expert at analyzing lead quality and potential',
-            llm=self.llm,
-            verbose=True
+        # The LLM, agents and crews are built by warm_up(), on first use at the latest
+        self.llm = llm
+        self.model_name = getattr(llm, 'model_name', '') if llm is not None else OPENAI_MODEL_NAME
+        self.prompt_builder = PromptBuilder(
+            self.model_name,
+            message_tokens=PROMPT_MESSAGE_TOKENS,
+            research_message_tokens=PROMPT_RESEARCH_MESSAGE_TOKENS
         )
+        self.crew_error = None
+        self._crew_pool = None
+        self._warm_up_lock = threading.Lock()
         
-        self.market_researcher = Agent(
-            role='Market Researcher',
-            goal='Research company and market context',
-            backstory='Expert at gathering and analyzing market information',
-            llm=self.llm,
-            verbose=True
+        # In parallel mode the research crew runs here while the analysis
+        # crew runs on the calling crew worker
+        self._research_executor = None
+        if self.process_mode == "parallel":
+            self._research_executor = ThreadPoolExecutor(
+                max_workers=CREW_MAX_WORKERS, thread_name_prefix="research"
+            )
+        
+        self.result_cache = create_result_cache(
+            RESULT_CACHE_BACKEND,
+            path=RESULT_CACHE_PATH,
+            max_entries=RESULT_CACHE_MAX_ENTRIES,
+            ttl_seconds=RESULT_CACHE_TTL_SECONDS
+        )
+        self.near_duplicates = create_near_duplicate_index(
+            NEAR_DUPLICATE_BACKEND,
+            path=NEAR_DUPLICATE_PATH,
+            threshold=NEAR_DUPLICATE_THRESHOLD,
+            window_seconds=NEAR_DUPLICATE_WINDOW_SECONDS,
+            max_entries=NEAR_DUPLICATE_MAX_ENTRIES
         )
+        # The single-call mode has no research agent to skip
+        self.company_profiles = None
+        if self.process_mode != "single":
+            self.company_profiles = create_result_cache(
+                COMPANY_PROFILE_BACKEND,
+                path=COMPANY_PROFILE_PATH,
+                max_entries=COMPANY_PROFILE_MAX_ENTRIES,
+                ttl_seconds=COMPANY_PROFILE_TTL_SECONDS
+            )
+
+    @property
+    def crew_ready(self):
+        return self._crew_pool is not None
+
+    def warm_up(self):
+        """Import CrewAI and build the LLM, agents and crew pool. Safe to call from
+        several threads - the first caller builds, the rest wait. A failure is kept
+        in crew_error and the next call tries again"""
+        if self._crew_pool is not None:
+            return
+        with self._warm_up_lock:
+            if self._crew_pool is not None:
+                return
+            try:
+                if self.llm is None:
+                    self.llm = create_llm()
+                
+                # Define our specialized agents
+                self.lead_analyzer = self._create_agent('Lead Analyzer')
+                self.market_researcher = self._create_agent('Market Researcher')
+                self.decision_maker = self._create_agent('Decision Maker')
+                
+                # Prebuilt crews, one set per crew worker. Task prompts are templates that
+                # CrewAI fills with the lead fields on kickoff, so nothing is rebuilt per lead
+                crew_pool = queue.Queue()
+                crew_pool.put(self._create_crews(self.lead_analyzer, self.market_researcher))
+                for _ in range(CREW_MAX_WORKERS - 1):
+                    crew_pool.put(self._create_crews(
+                        self._create_agent('Lead Analyzer'),
+                        self._create_agent('Market Researcher')
+                    ))
+            except Exception as e:
+                self.crew_error = f"{type(e).__name__}: {e}"
+                raise
+            self.crew_error = None
+            self._crew_pool = crew_pool
+
+    def _create_agent(self, role):
+        from crewai import Agent
         
-        self.decision_maker = Agent(
-            role='Decision Maker',
-            goal='Make final qualification decision',
-            backstory='Expert at evaluating leads and making qualification decisions',
+        return Agent(
+            role=role,
+            goal=AGENT_PROFILES[role]['goal'],
+            backstory=AGENT_PROFILES[role]['backstory'],
             llm=self.llm,
-            verbose=True
+            verbose=CREW_VERBOSE
         )
 
+    def _create_crews(self, lead_analyzer, market_researcher):
+        from crewai import Task, Crew, Process
+        
+        if self.process_mode == "single":
+            # One agent answers the analysis and research questions in one completion
+            combined_task = Task(
+                description=COMBINED_TASK_TEMPLATE,
+                agent=lead_analyzer,
+                expected_output="Combined lead qualification and market research as one JSON object"
+            )
+            return [Crew(agents=[lead_analyzer], tasks=[combined_task], verbose=CREW_VERBOSE, process=Process.sequential)]
+        
+        # Create tasks for our agents with simplified output requirements for reliability
+        analysis_task = Task(
+            description=ANALYSIS_TASK_TEMPLATE,
+            agent=lead_analyzer,
+            expected_output="JSON lead scoring analysis"
+        )
+        
+        # Simplify research task for more consistent results
+        research_task = Task(
+            description=RESEARCH_TASK_TEMPLATE,
+            agent=market_researcher,
+            expected_output="Market research in JSON format"
+        )
+        
+        if self.process_mode == "parallel":
+            # The two tasks only depend on the lead, so each gets its own crew
+            return [
+                Crew(agents=[lead_analyzer], tasks=[analysis_task], verbose=CREW_VERBOSE, process=Process.sequential),
+                Crew(agents=[market_researcher], tasks=[research_task], verbose=CREW_VERBOSE, process=Process.sequential)
+            ]
+        
+        # Create crew and run sequentially for better reliability. The analysis-only
+        # crew runs instead when the company profile is already known
+        return [
+            Crew(
+                agents=[lead_analyzer, market_researcher],
+                tasks=[analysis_task, research_task],
+                verbose=CREW_VERBOSE,
+                process=Process.sequential
+            ),
+            Crew(
+                agents=[lead_analyzer],
+                tasks=[Task(description=ANALYSIS_TASK_TEMPLATE, agent=lead_analyzer, expected_output="JSON lead scoring analysis")],
+                verbose=CREW_VERBOSE,
+                process=Process.sequential
+            )
+        ]
+
+    def _crews_to_run(self, crews, research):
+        """The crews of a borrowed set that run for a lead - without the research
+        agent when research is False"""
+        if self.process_mode == "single":
+            return crews
+        if self.process_mode == "parallel":
+            return crews if research else crews[:1]
+        return crews[:1] if research else crews[1:]
+
     def get_action_by_category(self, category: str, score: int) -> str:
         if category == "HOT":
             return "URGENT: Follow up within 2 hours - High priority lead"
@@ -80,173 +469,290 @@ class LeadQualificationSystem:
         else:  # COLD
             return "STANDARD: Add to nurture campaign"
 
-    def analyze_lead(self, lead_data):
+    def _lead_info(self, lead_data):
+        # Ensure proper field access - handle both with and without spaces
+        return {
+            'name': lead_data.get('name', ''),
+            'email': lead_data.get('email', lead_data.get('email ', '')),
+            'phone': lead_data.get('phone', lead_data.get('phone ', '')),
+            'company': lead_data.get('company', lead_data.get('company ', '')),
+            'message': lead_data.get('message', lead_data.get('message ', '')),
+            'source': lead_data.get('source', 'Web Form')
+        }
+
+    def _task_inputs(self, lead_info):
+        inputs = self.prompt_builder.task_inputs(lead_info)
+        if inputs['message'] != str(lead_info['message']):
+            metrics.annotate(message_truncated=True)
+        return inputs
+
+    def _cache_key(self, lead_info):
+        # Modes are cached separately so their results can be compared
+        return make_cache_key(
+            lead_info, f"{PROMPT_VERSION}-{self.process_mode}", self.model_name
+        )
+
+    def get_cached_analysis(self, lead_data):
+        """Return the cached crew analysis for this lead, or None"""
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get(self._cache_key(self._lead_info(lead_data)))
+
+    def _near_duplicate_key(self, lead_info):
+        """(sender, text) to index the lead under, or None without an email address
+        to tell its sender by. Scoped like the cache key, so a prompt or model
+        change starts afresh"""
+        email, text = lead_text(lead_info)
+        if not email:
+            return None
+        return f"{PROMPT_VERSION}-{self.process_mode}-{self.model_name}|{email}", text
+
+    def _profile_key(self, lead_info):
+        return make_profile_key(lead_info, PROMPT_VERSION, self.model_name)
+
+    def get_company_profile(self, lead_info):
+        """The cached Market Researcher JSON for the lead's company, or None"""
+        key = self._profile_key(lead_info)
+        if self.company_profiles is None or key is None:
+            return None
+        profile = self.company_profiles.get(key)
+        metrics.COMPANY_PROFILE_LOOKUPS.inc(result="hit" if profile is not None else "miss")
+        return profile
+
+    def _store_company_profile(self, lead_info, crew_results):
+        key = self._profile_key(lead_info)
+        if self.company_profiles is None or key is None:
+            return
+        research_output = self._crew_outputs(*crew_results)[1]
+        research_result = find_json_object(research_output or '', RESEARCH_SCHEMA)
+        if research_result is not None:
+            self.company_profiles.set(key, research_result)
+
+    def get_near_duplicate_analysis(self, lead_data):
+        """Return the crew analysis of a recent near-duplicate of this lead from
+        the same email address, or None"""
+        key = self._near_duplicate_key(self._lead_info(lead_data))
+        if self.near_duplicates is None or key is None:
+            return None
+        match = self.near_duplicates.get(*key)
+        if match is None:
+            return None
+        result, similarity = match
+        metrics.annotate(near_duplicate_similarity=round(similarity, 3))
+        return result
+
+    def analyze_lead(self, lead_data, check_cache=True, on_stage=None, raise_errors=False):
+        """Run the crew for one lead. on_stage(stage, payload) is called from the
+        crew threads as each agent finishes - "analysis" with the parsed analyzer
+        result, then "market_insights" with the research summary. A failed run
+        returns the direct score, or raises with raise_errors"""
         try:
-            # Ensure proper field access - handle both with and without spaces
-            lead_info = {
-                'name': lead_data.get('name', ''),
-                'email': lead_data.get('email', lead_data.get('email ', '')),
-                'phone': lead_data.get('phone', lead_data.get('phone ', '')),
-                'company': lead_data.get('company', lead_data.get('company ', '')),
-                'message': lead_data.get('message', lead_data.get('message ', '')),
-                'source': lead_data.get('source', 'Web Form')
-            }
-            
-            # Create tasks for our agents with simplified output requirements for reliability
-            analysis_task = Task(
-                description=f"""
-                Analyze this lead based on the scoring criteria below. You MUST respond in valid JSON format.
-                
-                SCORING CRITERIA (Total 10 points):
-                1. Intent Level (4 points):
-                   - Clear budget mention (+2)
-                   - Decision maker status (+1.5)
-                   - Urgent timeline (+0.5)
-
-                2. Contact Info (3 points):
-                   - Valid business email (+1)
-                   - Valid phone (+1)
-                   - Full name (+0.5)
-                   - Company name (+0.5)
-
-                3. Company/Message Quality (3 points):
-                   - Specific company details (+1)
-                   - Clear use case (+1.5)
-                   - Business scale mentioned (+0.5)
-
-                Lead Information:
-                Name: {lead_info['name']}
-                Email: {lead_info['email']}
-                Phone: {lead_info['phone']}
-                Company: {lead_info['company']}
-                Message: {lead_info['message']}
-
-                Respond with this exact JSON structure:
-                {{"score": <number 0-10>, "category": "<HOT/WARM/COLD>", "reason": "<explanation>"}}
-                """,
-                agent=self.lead_analyzer,
-                expected_output="JSON lead scoring analysis"
-            )
+            lead_info = self._lead_info(lead_data)
             
-            # Simplify research task for more consistent results
-            research_task = Task(
-                description=f"""
-                Research the company and market context for this lead:
-                
-                Lead Information:
-                Name: {lead_info['name']}
-                Email: {lead_info['email']}
-                Phone: {lead_info['phone']}
-                Company: {lead_info['company']}
-                Message: {lead_info['message']}
-                
-                Respond with this exact JSON structure:
-                {{"company_size": "<Small/Medium/Large>", "industry": "<Industry>", "potential_value": "<High/Medium/Low>", "key_insight": "<one key market insight>"}}
-                """,
-                agent=self.market_researcher,
-                expected_output="Market research in JSON format"
-            )
+            if check_cache:
+                cached_result = self.get_cached_analysis(lead_info)
+                if cached_result is not None:
+                    return cached_result
             
-            # Create crew and run sequentially for better reliability
-            crew = Crew(
-                agents=[self.lead_analyzer, self.market_researcher],
-                tasks=[analysis_task, research_task],
-                verbose=True,
-                process={"Sequential": ["analysis_task", "research_task"]}
-            )
+            # A company researched before needs no research agent
+            company_profile = self.get_company_profile(lead_info)
+            if company_profile is not None:
+                metrics.annotate(company_profile="cached")
             
-            # Execute the crew workflow
-            result = crew.kickoff()
+            # Borrow a prebuilt crew and fill in this lead's fields
+            self.warm_up()
+            crew_set = self._crew_pool.get()
+            crews = self._crews_to_run(crew_set, research=company_profile is None)
+            try:
+                if on_stage is not None:
+                    self._set_task_callbacks(crews, self._stage_callback(on_stage))
+                # Execute the crew workflow
+                with metrics.span("crew") as crew_span:
+                    usage_before = self._token_usage(crews)
+                    crew_results = self._kickoff_crews(crews, self._task_inputs(lead_info))
+                    # Read the task timings before another request can reuse the crews
+                    self._record_crew_usage(crews, usage_before, crew_span)
+            finally:
+                if on_stage is not None:
+                    self._set_task_callbacks(crews, None)
+                self._crew_pool.put(crew_set)
             
             # Process results
-            final_result = self._process_crew_result(result)
+            # Only a company the email domain vouches for can lift the score
+            company_verified = bool(company_domain(lead_info))
+            with metrics.span("result_merge"):
+                if self.process_mode == "single":
+                    final_result = self._process_combined_result(*crew_results, company_verified=company_verified)
+                else:
+                    final_result = self._process_crew_result(
+                        *crew_results, cached_research=company_profile, company_verified=company_verified
+                    )
+            if company_profile is None:
+                self._store_company_profile(lead_info, crew_results)
+            elif on_stage is not None:
+                on_stage("market_insights", {"market_insights": self._extract_market_insights(json.dumps(company_profile))})
             
             # If score is missing or seems incorrect, use direct scoring as fallback
             if 'score' not in final_result or final_result['score'] < 5 and self._check_high_intent_signals(lead_info['message']):
                 direct_result = self._direct_score_lead(lead_data)
                 
-                # If direct scoring gives a higher score, use that instead
+                # If direct scoring gives a higher score, use that instead - it
+                # stands in for a crew answer that didn't parse, so it isn't cached
                 if direct_result['score'] > final_result.get('score', 0):
-                    final_result = direct_result
+                    return direct_result
+            
+            if self.result_cache is not None:
+                self.result_cache.set(self._cache_key(lead_info), final_result)
+            near_duplicate_key = self._near_duplicate_key(lead_info)
+            if self.near_duplicates is not None and near_duplicate_key is not None:
+                self.near_duplicates.add(*near_duplicate_key, final_result)
             
             return final_result
         
         except Exception as e:
+            if raise_errors:
+                raise
             # Fallback to direct scoring if crew analysis fails
+            print(f"Crew run error: {e}")
+            metrics.CREW_FALLBACKS.inc(reason="crew_error")
+            metrics.annotate(crew_fallback="crew_error")
             return self._direct_score_lead(lead_data)
             
-    def _process_crew_result(self, crew_result):
+    def _token_usage(self, crews):
+        """Token counts so far of the crews' agents. CrewAI keeps adding them up
+        across kickoffs, so a run's usage is the difference around it"""
+        tokens = {"prompt_tokens": 0, "completion_tokens": 0, "llm_requests": 0}
+        for crew in crews:
+            usage = crew.calculate_usage_metrics()
+            tokens["prompt_tokens"] += usage.prompt_tokens
+            tokens["completion_tokens"] += usage.completion_tokens
+            tokens["llm_requests"] += usage.successful_requests
+        return tokens
+
+    def _record_crew_usage(self, crews, usage_before, crew_span):
+        """Per-agent task timings and token counts of a finished crew run"""
+        for crew in crews:
+            for task in crew.tasks:
+                if task.execution_duration is not None:
+                    metrics.record_span(f"agent:{task.agent.role}", task.execution_duration)
+        
+        usage_after = self._token_usage(crews)
+        tokens = {kind: usage_after[kind] - usage_before[kind] for kind in usage_after}
+        metrics.LLM_TOKENS.inc(tokens["prompt_tokens"], kind="prompt")
+        metrics.LLM_TOKENS.inc(tokens["completion_tokens"], kind="completion")
+        crew_span.update(tokens)
+
+    def _set_task_callbacks(self, crews, callback):
+        # Borrowed crews belong to one request at a time, so their tasks can carry its callback
+        for crew in crews:
+            for task in crew.tasks:
+                task.callback = callback
+
+    def _stage_callback(self, on_stage):
+        def on_task_output(task_output):
+            try:
+                role, output = self._task_output_text(task_output)
+                output = output or ''
+                if self.process_mode == "single":
+                    # The one task answers both stages
+                    result = self._parse_combined_output(output)
+                    on_stage("analysis", {key: result[key] for key in ('score', 'category', 'reason', 'action') if key in result})
+                    on_stage("market_insights", {"market_insights": result.get('market_insights', '')})
+                elif role == 'Lead Analyzer':
+                    on_stage("analysis", self._process_crew_result({'analysis_task': output}))
+                elif role == 'Market Researcher':
+                    on_stage("market_insights", {"market_insights": self._extract_market_insights(output)})
+            except Exception as e:
+                # A failing listener must not fail the crew run
+                print(f"Error reporting crew stage: {e}")
+        return on_task_output
+
+    def _kickoff_crews(self, crews, inputs):
+        if len(crews) == 1:
+            return [crews[0].kickoff(inputs=inputs)]
+        
+        # Parallel mode - run the analysis and research crews at the same time
+        analysis_crew, research_crew = crews
+        research_future = self._research_executor.submit(
+            contextvars.copy_context().run, research_crew.kickoff, inputs=inputs
+        )
         try:
-            analysis_output = None
-            research_output = None
-            
+            analysis_result = analysis_crew.kickoff(inputs=inputs)
+        finally:
+            # Never hand the crews back to the pool while research is still running
+            research_result = research_future.result()
+        return [analysis_result, research_result]
+
+    def _task_output_text(self, task_output):
+        # Newer CrewAI versions report the agent as its role string and the text as .raw
+        role = getattr(getattr(task_output, 'agent', None), 'role', getattr(task_output, 'agent', None))
+        output = getattr(task_output, 'output', None) or getattr(task_output, 'raw', None)
+        return role, output
+
+    def _crew_outputs(self, crew_result, research_crew_result=None):
+        """(analysis output, research output) text of a crew run - either is None when missing"""
+        analysis_output = None
+        research_output = None
+        
+        for result in (crew_result, research_crew_result):
             # Extract outputs based on CrewAI's structure
-            if hasattr(crew_result, 'tasks_output') and isinstance(crew_result.tasks_output, list):
-                for task_output in crew_result.tasks_output:
-                    if hasattr(task_output, 'agent') and hasattr(task_output.agent, 'role'):
-                        if task_output.agent.role == 'Lead Analyzer':
-                            analysis_output = task_output.output
-                        elif task_output.agent.role == 'Market Researcher':
-                            research_output = task_output.output
+            if hasattr(result, 'tasks_output') and isinstance(result.tasks_output, list):
+                for task_output in result.tasks_output:
+                    role, output = self._task_output_text(task_output)
+                    if role == 'Lead Analyzer':
+                        analysis_output = output
+                    elif role == 'Market Researcher':
+                        research_output = output
             
             # Handle dict-based output structure
-            elif hasattr(crew_result, 'get') and callable(crew_result.get):
-                if crew_result.get('analysis_task'):
-                    analysis_output = crew_result.get('analysis_task')
-                if crew_result.get('research_task'):
-                    research_output = crew_result.get('research_task')
+            elif hasattr(result, 'get') and callable(result.get):
+                if result.get('analysis_task'):
+                    analysis_output = result.get('analysis_task')
+                if result.get('research_task'):
+                    research_output = result.get('research_task')
+        return analysis_output, research_output
+
+    def _process_crew_result(self, crew_result, research_crew_result=None, cached_research=None,
+                             company_verified=True):
+        """Build the final result from one sequential crew run, or from the
+        analysis and research runs of parallel mode. cached_research is a
+        company profile standing in for a research run that was skipped.
+        company_verified=False keeps the research from raising the score"""
+        try:
+            analysis_output, research_output = self._crew_outputs(crew_result, research_crew_result)
+            if research_output is None and cached_research is not None:
+                research_output = json.dumps(cached_research)
             
             # Process analysis output
             if analysis_output:
                 try:
                     # Try to parse JSON
-                    json_pattern = r'\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\}))*\}))*\}'
-                    json_match = re.search(json_pattern, analysis_output)
+                    analysis_result = find_json_object(analysis_output, ANALYSIS_SCHEMA)
                     
-                    if json_match:
-                        json_str = json_match.group(0)
-                        try:
-                            analysis_result = json.loads(json_str)
-                            
-                            # Ensure the result has all required fields
-                            if 'score' not in analysis_result:
-                                analysis_result['score'] = self._extract_score(analysis_output)
-                            if 'category' not in analysis_result:
-                                analysis_result['category'] = self._determine_category(analysis_result.get('score', 5))
-                            if 'action' not in analysis_result:
-                                analysis_result['action'] = self.get_action_by_category(
-                                    analysis_result.get('category', 'COLD'), 
-                                    analysis_result.get('score', 0)
-                                )
-                            
-                            # Process research output
-                            if research_output:
-                                try:
-                                    # Try to parse research JSON
-                                    json_match = re.search(json_pattern, research_output)
-                                    if json_match:
-                                        json_str = json_match.group(0)
-                                        research_result = json.loads(json_str)
-                                        
-                                        # Add research insights to the final result
-                                        analysis_result['market_insights'] = (
-                                            f"Industry: {research_result.get('industry', 'Unknown')} | "
-                                            f"Company size: {research_result.get('company_size', 'Unknown')} | "
-                                            f"Potential value: {research_result.get('potential_value', 'Unknown')}"
-                                        )
-                                        
-                                        # Use research to potentially adjust score for high value accounts
-                                        if research_result.get('potential_value') == 'High' and analysis_result.get('score', 0) < 7:
-                                            analysis_result['score'] = max(analysis_result.get('score', 0), 7)
-                                            analysis_result['category'] = 'WARM'
-                                            analysis_result['action'] = self.get_action_by_category('WARM', 7)
-                                except Exception as e:
-                                    print(f"Error processing research output: {e}")
-                                    # Don't let research errors affect the analysis result
-                            
-                            return analysis_result
-                        except json.JSONDecodeError as json_error:
-                            print(f"JSON decode error: {json_error} for string: {json_str[:100]}")
+                    if analysis_result is not None:
+                        # Ensure the result has all required fields
+                        if 'score' not in analysis_result:
+                            analysis_result['score'] = self._extract_score(analysis_output)
+                        if 'category' not in analysis_result:
+                            analysis_result['category'] = self._determine_category(analysis_result.get('score', 5))
+                        if 'action' not in analysis_result:
+                            analysis_result['action'] = self.get_action_by_category(
+                                analysis_result.get('category', 'COLD'), 
+                                analysis_result.get('score', 0)
+                            )
+                        
+                        # Process research output
+                        if research_output:
+                            try:
+                                # Try to parse research JSON
+                                research_result = find_json_object(research_output, RESEARCH_SCHEMA)
+                                if research_result is not None:
+                                    self._merge_research(analysis_result, research_result, company_verified)
+                            except Exception as e:
+                                print(f"Error processing research output: {e}")
+                                # Don't let research errors affect the analysis result
+                        
+                        return analysis_result
                 except Exception as parsing_error:
                     print(f"Error parsing analysis output: {parsing_error}")
 
@@ -279,6 +785,46 @@ class LeadQualificationSystem:
                 "market_insights": "Analysis error - manual review recommended"
             }
     
+    def _merge_research(self, analysis_result, research_result, company_verified=True):
+        # Add research insights to the final result
+        analysis_result['market_insights'] = (
+            f"Industry: {research_result.get('industry', 'Unknown')} | "
+            f"Company size: {research_result.get('company_size', 'Unknown')} | "
+            f"Potential value: {research_result.get('potential_value', 'Unknown')}"
+        )
+        
+        # Use research to potentially adjust score for high value accounts - only
+        # when the lead's email domain shows it really comes from that account
+        if company_verified and research_result.get('potential_value') == 'High' and analysis_result.get('score', 0) < 7:
+            analysis_result['score'] = max(analysis_result.get('score', 0), 7)
+            analysis_result['category'] = 'WARM'
+            analysis_result['action'] = self.get_action_by_category('WARM', 7)
+        return analysis_result
+
+    def _process_combined_result(self, crew_result, company_verified=True):
+        """Build the final result from the single-call mode. The output is validated
+        against CombinedQualification; output that doesn't validate goes through
+        the regular analysis and research parsing instead"""
+        output = ''
+        for task_output in getattr(crew_result, 'tasks_output', None) or []:
+            output = self._task_output_text(task_output)[1] or output
+        return self._parse_combined_output(output, company_verified)
+
+    def _parse_combined_output(self, output, company_verified=True):
+        for candidate in extract_json_objects(output):
+            try:
+                combined = CombinedQualification.model_validate(candidate)
+            except ValidationError:
+                continue
+            analysis_result = combined.model_dump(include=set(LeadAnalysis.model_fields))
+            analysis_result['action'] = self.get_action_by_category(combined.category, combined.score)
+            research_result = combined.model_dump(include=set(MarketResearch.model_fields))
+            return self._merge_research(analysis_result, research_result, company_verified)
+        
+        print("Combined output did not match the schema - parsing it heuristically")
+        return self._process_crew_result({'analysis_task': output, 'research_task': output},
+                                         company_verified=company_verified)
+
     def _extract_score(self, text):
         """Extract lead score from text with improved error handling"""
         try:
@@ -286,16 +832,10 @@ class LeadQualificationSystem:
                 return 5
                 
             # Look for JSON block first
-            json_pattern = r'\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\}))*\}))*\}'
-            json_match = re.search(json_pattern, text)
-            if json_match:
-                try:
-                    json_obj = json.loads(json_match.group(0))
-                    if 'score' in json_obj and isinstance(json_obj['score'], (int, float)):
-                        score = int(json_obj['score'])
-                        return max(1, score)  # Ensure score is at least 1
-                except Exception as e:
-                    print(f"Error extracting score from JSON: {e}")
+            json_obj = find_json_object(text, SCORE_SCHEMA)
+            if json_obj is not None:
+                score = int(json_obj['score'])
+                return max(1, score)  # Ensure score is at least 1
                 
             # Special case for high intent leads
             if re.search(r'CTO|Chief Technology Officer', text, re.IGNORECASE) and re.search(r'\$50,000|\$50k|50k budget|50000', text, re.IGNORECASE):
@@ -361,13 +901,9 @@ class LeadQualificationSystem:
         
         # Try to parse as JSON first
         try:
-            # Find JSON pattern
-            json_pattern = r'\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\}))*\}))*\}'
-            json_match = re.search(json_pattern, research_output)
+            research_json = find_json_object(research_output, RESEARCH_SCHEMA)
             
-            if json_match:
-                research_json = json.loads(json_match.group(0))
-                
+            if research_json is not None:
                 # Extract key insights
                 insights = []
                 
@@ -390,113 +926,14 @@ class LeadQualificationSystem:
 
     def _check_high_intent_signals(self, message):
         """Check if message contains high intent signals that should override low scores"""
-        if re.search(r'CTO|CEO|Chief|Director|VP|decision maker', message, re.IGNORECASE) and \
-           re.search(r'budget|\$\d+|cost|investment|spending', message, re.IGNORECASE):
-            return True
-        return False
+        return scoring_rules.has_high_intent_signals(message)
 
+    @metrics.timed("rule_scoring")
     def _direct_score_lead(self, lead_data):
         """Direct lead scoring implementation that gives more accurate results"""
         try:
-            # Extract message and other info with safety checks
-            message = lead_data.get('message', '')
-            email = lead_data.get('email', '')
-            name = lead_data.get('name', '')
-            company = lead_data.get('company', '')
-            
-            # Safety check for message
-            if not isinstance(message, str):
-                message = str(message) if message is not None else ""
-            
-            # Initialize score components
-            intent_score = 0
-            contact_score = 0
-            quality_score = 0
-            
-            # Score intent (max 4 points)
-            # Check for budget mentions
-            if re.search(r'budget|\$\d+|\d+ dollars|cost|pricing|investment', message, re.IGNORECASE):
-                intent_score += 2
-                
-            # Check for decision maker status
-            if re.search(r'CTO|CEO|CIO|CFO|Chief|Director|VP|decision maker|authority', message, re.IGNORECASE):
-                intent_score += 1.5
-                
-            # Check for urgent timeline
-            if re.search(r'urgent|immediate|asap|soon|next month|within \d+ (days|weeks)|this quarter', message, re.IGNORECASE):
-                intent_score += 0.5
-            
-            # Score contact info (max 3 points)
-            # Check email quality
-            if email and not re.search(r'@(gmail|yahoo|hotmail|outlook|aol)', email, re.IGNORECASE):
-                contact_score += 1
-                
-            # Check phone format
-            if lead_data.get('phone', '') and len(str(lead_data.get('phone', ''))) > 5:
-                contact_score += 1
-                
-            # Check for full name
-            if name and ' ' in name:
-                contact_score += 0.5
-                
-            # Check for company name
-            if company and str(company).lower() not in ['unknown', 'none', 'n/a']:
-                contact_score += 0.5
-                
-            # Score message quality (max 3 points)
-            # Check for company details
-            if re.search(r'industry|sector|market|field|business type', message, re.IGNORECASE):
-                quality_score += 1
-                
-            # Check for clear use case
-            if re.search(r'need to|looking to|want to|trying to|goal is|problem with|solution for', message, re.IGNORECASE):
-                quality_score += 1.5
-                
-            # Check for business scale
-            if re.search(r'\d+ (employees|customers|users|clients|leads|sales|revenue)', message, re.IGNORECASE):
-                quality_score += 0.5
-            
-            # Calculate total score
-            total_score = intent_score + contact_score + quality_score
-            # Round to nearest integer
-            score = round(total_score)
-            # Ensure score is within 0-10 range
-            score = max(1, min(10, score))  # Changed minimum to 1 to avoid 0 scores
-            
-            # Determine category based on score
-            if score >= 8:
-                category = "HOT"
-                action = "URGENT: Follow up within 2 hours - High priority lead"
-            elif score >= 5:
-                category = "WARM"
-                action = "PRIORITY: Follow up within 24 hours - Nurture to reach decision makers"
-            else:
-                category = "COLD"
-                action = "STANDARD: Add to nurture campaign"
-            
-            # Special case override - high intent signals
-            if (re.search(r'CTO|CEO|Chief|Director|VP|decision maker', message, re.IGNORECASE) and
-                re.search(r'budget|\$\d+|cost', message, re.IGNORECASE) and
-                len(message) > 100):
-                score = 9
-                category = "HOT"
-                action = "URGENT: Follow up within 2 hours - High priority lead"
-                return {
-                    "score": score,
-                    "reason": "Direct scoring: High intent detected (decision maker + budget + detailed needs)",
-                    "action": action,
-                    "category": category,
-                    "market_insights": "Detailed needs specified, indicating serious buyer with specific timeframe"
-                }
-                
-            # Standard response for other cases
-            return {
-                "score": score,
-                "reason": f"Direct scoring: Intent({intent_score}/4) + Contact({contact_score}/3) + Quality({quality_score}/3) = {score}",
-                "action": action,
-                "category": category,
-                "market_insights": "Mixed buying signals with moderate intent"
-            }
+            # Single pass over the message with the precompiled rule table
+            return scoring_rules.score_lead(lead_data)
         except Exception as e:
             # Robust error handling with traceback
             print(f"Error in direct scoring: {e}")
@@ -514,53 +951,353 @@ class LeadQualificationSystem:
 # Initialize the qualification system
 qualification_system = LeadQualificationSystem()
 
+lead_prefilter = LeadPrefilter(
+    min_words=PREFILTER_MIN_WORDS,
+    free_mail_min_words=PREFILTER_FREE_MAIL_MIN_WORDS,
+    max_per_email=PREFILTER_MAX_PER_EMAIL,
+    max_per_ip=PREFILTER_MAX_PER_IP,
+    max_duplicate_senders=PREFILTER_MAX_DUPLICATE_SENDERS,
+    window_seconds=PREFILTER_WINDOW_SECONDS
+) if LEAD_PREFILTER else None
+
+# Worker pool for the blocking crew path
+crew_executor = ThreadPoolExecutor(max_workers=CREW_MAX_WORKERS, thread_name_prefix="crew")
+crew_admission = AdmissionController(
+    CREW_MAX_IN_FLIGHT,
+    CREW_TARGET_LATENCY_SECONDS,
+    breaker=CircuitBreaker(failure_threshold=CREW_CIRCUIT_FAILURES, reset_seconds=CREW_CIRCUIT_RESET_SECONDS)
+)
+
+async def run_crew_analysis(lead_dict, on_stage=None):
+    """Run the crew analysis in the worker pool so the event loop stays responsive"""
+    # Cache hits are answered on the event loop without waiting for a free worker
+    with metrics.span("cache_lookup") as lookup_span:
+        cached_result = qualification_system.get_cached_analysis(lead_dict)
+        lookup_span["hit"] = cached_result is not None
+    if qualification_system.result_cache is not None:
+        metrics.CACHE_LOOKUPS.inc(result="hit" if cached_result is not None else "miss")
+    if cached_result is not None:
+        return cached_result
+    
+    # Then a resubmission of a recently scored lead with a slightly edited message
+    if qualification_system.near_duplicates is not None:
+        with metrics.span("near_duplicate_lookup") as lookup_span:
+            cached_result = qualification_system.get_near_duplicate_analysis(lead_dict)
+            lookup_span["hit"] = cached_result is not None
+        if cached_result is not None:
+            metrics.CACHE_LOOKUPS.inc(result="near_duplicate")
+            return cached_result
+    
+    # Requests don't build the crews unless the warm-up is lazy - while the
+    # startup warm-up runs (or retries), the rule score answers at once
+    if CREW_WARM_UP != "lazy" and not qualification_system.crew_ready:
+        raise CrewUnavailable("warming_up")
+    
+    # Shed before queueing - raises CrewUnavailable while overloaded or failing
+    crew_admission.acquire()
+    started = time.perf_counter()
+    # The copied context carries the request's trace into the worker thread
+    future = crew_executor.submit(
+        contextvars.copy_context().run,
+        qualification_system.analyze_lead, lead_dict, check_cache=False, on_stage=on_stage, raise_errors=True
+    )
+    future.add_done_callback(functools.partial(release_crew_slot, started))
+    # The worker thread keeps running after a timeout, but the request no longer waits on it
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout=CREW_TIMEOUT_SECONDS)
+
+def release_crew_slot(started, future):
+    """Done callback of a crew run - frees its admission slot once the worker is
+    really done (not when the request stopped waiting) and reports the outcome"""
+    if future.cancelled():
+        crew_admission.release()
+        return
+    seconds = time.perf_counter() - started
+    crew_admission.release(seconds, ok=future.exception() is None and seconds <= CREW_TIMEOUT_SECONDS)
+
+def select_result(crew_result, direct_result):
+    """Compare crew and direct scores and use the higher one"""
+    # Ensure we never return a score of 0 due to errors
+    if crew_result.get("score", 0) == 0 and "Error" in crew_result.get("reason", ""):
+        return direct_result
+    
+    if direct_result['score'] > crew_result.get('score', 0):
+        return direct_result
+    
+    return crew_result
+
+def is_decisive_rule_score(direct_result):
+    """A rule score inside the cold or hot band decides the lead without the crew"""
+    if not TIERED_SCORING:
+        return False
+    score = direct_result.get('score', 0)
+    return score <= RULE_COLD_MAX_SCORE or score >= RULE_HOT_MIN_SCORE
+
+def with_tier(result, tier):
+    """Copy of the result recording which tier decided it - 'rules', 'crew' or 'rules_after_crew'"""
+    return {**result, "tier": tier}
+
+def degraded_result(direct_result, reason):
+    """The rule result of a lead the crew path was shed for"""
+    return {**with_tier(direct_result, "rules"), "degraded": True, "degraded_reason": reason}
+
+def prefiltered_result(reason):
+    """COLD result of a lead the prefilter rejected - tier 'prefilter'"""
+    return {
+        "score": 1,
+        "category": "COLD",
+        "reason": f"Rejected before scoring: {REJECTION_REASONS[reason]}",
+        "action": "STANDARD: Add to nurture campaign" if reason == "thin_content" else "NONE: Likely spam - do not follow up",
+        "tier": "prefilter",
+        "prefilter_reason": reason
+    }
+
+def client_ip(request):
+    """The visitor's IP, or None when it isn't known. Through a trusted proxy it
+    is the right-most X-Forwarded-For hop that is not a trusted proxy itself -
+    hops further left are whatever the visitor sent and can't be relied on.
+    Without the header the caller is a server (the frontend with nothing to
+    forward, Make.com...) - its address would put every lead it sends under
+    one per-IP limit"""
+    peer = request.client.host if request.client else None
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded:
+        return None
+    if peer not in TRUSTED_PROXY_IPS:
+        return peer
+    for hop in reversed([hop.strip() for hop in forwarded.split(",")]):
+        if hop and hop not in TRUSTED_PROXY_IPS:
+            return hop
+    return None
+
+def prefilter_rejection(lead_dict, ip=None, track=True):
+    """The prefiltered result when the prefilter rejects the lead, else None"""
+    if lead_prefilter is None:
+        return None
+    with metrics.span("prefilter"):
+        reason = lead_prefilter.check(lead_dict, ip=ip, track=track)
+    if reason is None:
+        return None
+    metrics.annotate(prefilter_reason=reason)
+    return prefiltered_result(reason)
+
+def select_tiered_result(crew_result, direct_result):
+    """select_result for an escalated lead, labelled with the tier that won"""
+    if crew_result.get("degraded_reason"):
+        return degraded_result(direct_result, crew_result["degraded_reason"])
+    result = select_result(crew_result, direct_result)
+    return with_tier(result, "crew" if result is crew_result else "rules_after_crew")
+
+def direct_score_or_default(lead_dict):
+    try:
+        return qualification_system._direct_score_lead(lead_dict)
+    except Exception as direct_error:
+        print(f"Direct scoring error: {direct_error}")
+        traceback.print_exc()
+        metrics.annotate(default_used=True)
+        # If direct scoring fails, provide a fallback response
+        return {
+            "score": 5,
+            "reason": "Error during analysis - using default score",
+            "action": "PRIORITY: Follow up within 24 hours - Nurture to reach decision makers",
+            "category": "WARM"
+        }
+
+async def crew_analysis_or_empty(lead_dict, on_stage=None):
+    try:
+        return await run_crew_analysis(lead_dict, on_stage=on_stage)
+    except CrewUnavailable as shed:
+        metrics.CREW_FALLBACKS.inc(reason=shed.reason)
+        metrics.annotate(crew_fallback=shed.reason)
+        return {"score": 0, "category": "COLD", "degraded_reason": shed.reason}
+    except asyncio.TimeoutError:
+        print(f"Crew analysis timed out after {CREW_TIMEOUT_SECONDS}s - using direct scoring")
+        reason = "timeout"
+    except Exception as crew_error:
+        print(f"Crew analysis error: {crew_error}")
+        traceback.print_exc()
+        reason = "error"
+    metrics.CREW_FALLBACKS.inc(reason=reason)
+    metrics.annotate(crew_fallback=reason)
+    # If crew analysis fails, skip to direct scoring
+    return {"score": 0, "category": "COLD"}
+
+def qualification_path(result):
+    """The path that decided a result - prefilter (rejected before scoring), rules,
+    crew, direct (rule score after the crew lost or failed), degraded (rule score,
+    crew path shed) or default (error fallback values). Traces are also closed
+    as async_submitted (only a job was queued) or error (no result at all)"""
+    trace = metrics.current_trace()
+    attributes = trace.attributes if trace is not None else {}
+    tier = result.get("tier")
+    if tier == "prefilter":
+        return "prefilter"
+    if result.get("degraded"):
+        return "degraded"
+    if tier == "rules":
+        return "rules"
+    if tier == "crew" and not attributes.get("crew_fallback"):
+        return "crew"
+    if tier is None or attributes.get("default_used"):
+        return "default"
+    return "direct"
+
+job_queue = JobQueue(
+    create_job_store(JOB_QUEUE_BACKEND, path=JOB_QUEUE_PATH, max_jobs=JOB_MAX_ENTRIES, ttl_seconds=JOB_TTL_SECONDS),
+    handler=lambda lead_dict: qualify_lead_dict(lead_dict),
+    workers=JOB_WORKERS,
+    webhook_url=JOB_WEBHOOK_URL or None,
+    lease_seconds=JOB_LEASE_SECONDS,
+    max_queued=JOB_MAX_QUEUED
+)
+
+webhook_delivery = WebhookDelivery(
+    MAKE_WEBHOOK_URL,
+    batch_size=MAKE_WEBHOOK_BATCH_SIZE,
+    max_attempts=MAKE_WEBHOOK_MAX_ATTEMPTS,
+    dead_letter_path=MAKE_WEBHOOK_DEAD_LETTER_PATH
+)
+
+def warm_up_crews():
+    try:
+        qualification_system.warm_up()
+    except Exception as e:
+        print(f"Crew warm-up failed - serving rule-based scores until it succeeds: {qualification_system.crew_error}")
+
+async def keep_warming_up():
+    """Build the crews in a thread, retrying every CREW_WARM_UP_RETRY_SECONDS until it works"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, warm_up_crews)
+        if qualification_system.crew_ready:
+            return
+        await asyncio.sleep(CREW_WARM_UP_RETRY_SECONDS)
+
+crew_warm_up = None
+
+@app.on_event("startup")
+async def start_crew_warm_up():
+    global crew_warm_up
+    if CREW_WARM_UP == "eager":
+        await asyncio.get_running_loop().run_in_executor(None, warm_up_crews)
+    if CREW_WARM_UP in ("eager", "background") and not qualification_system.crew_ready:
+        # Not awaited - the API serves rule-based scores while the crews are built
+        crew_warm_up = asyncio.create_task(keep_warming_up())
+
+@app.on_event("shutdown")
+async def stop_crew_warm_up():
+    if crew_warm_up is not None:
+        crew_warm_up.cancel()
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+@app.on_event("startup")
+async def start_webhook_delivery():
+    await webhook_delivery.start()
+
+async def publish_metrics():
+    while True:
+        await asyncio.sleep(METRICS_SNAPSHOT_SECONDS)
+        try:
+            metrics.write_snapshot(METRICS_MULTIPROC_DIR)
+        except OSError as e:
+            print(f"Could not write the metrics snapshot to {METRICS_MULTIPROC_DIR}: {e}")
+
+metrics_publisher = None
+
+@app.on_event("startup")
+async def start_metrics_publisher():
+    global metrics_publisher
+    if METRICS_MULTIPROC_DIR:
+        os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+        metrics_publisher = asyncio.create_task(publish_metrics())
+
+@app.on_event("shutdown")
+async def stop_metrics_publisher():
+    if metrics_publisher is not None:
+        metrics_publisher.cancel()
+        # Keep this worker's counts in the totals after it exits
+        metrics.write_snapshot(METRICS_MULTIPROC_DIR)
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+async def stop_webhook_delivery():
+    await webhook_delivery.stop()
+
+@app.on_event("shutdown")
+def shutdown_crew_executor():
+    crew_executor.shutdown(wait=False, cancel_futures=True)
+    if qualification_system._research_executor is not None:
+        qualification_system._research_executor.shutdown(wait=False, cancel_futures=True)
+    if qualification_system.crew_ready:
+        # Already imported by the warm-up
+        from llm_transport import close_http_pool
+        close_http_pool()
+
 @app.get("/")
 async def root():
     return {"message": "Lead Qualification API is running"}
 
 @app.post("/qualify-lead")
-async def qualify_lead(lead: LeadData):
-    try:
+async def qualify_lead(request: Request, lead: LeadData, async_mode: bool = Query(False, alias="async")):
+    metrics.start_trace()
+    with metrics.span("parse_request"):
         # Clean input data - ensure no spaces in keys
         lead_dict = {k.strip(): v for k, v in lead.dict().items()}
-        
-        # Try both methods and use the one with higher score
-        try:
-            crew_result = qualification_system.analyze_lead(lead_dict)
-        except Exception as crew_error:
-            print(f"Crew analysis error: {crew_error}")
-            traceback.print_exc()
-            # If crew analysis fails, skip to direct scoring
-            crew_result = {"score": 0, "category": "COLD"}
-        
+    
+    # Rejected leads are answered at once, in async mode too - there is nothing to queue
+    rejected = prefilter_rejection(lead_dict, ip=client_ip(request))
+    if rejected is not None:
+        metrics.finish_trace(qualification_path(rejected), log=METRICS_LOG_TRACES)
+        return rejected
+    
+    if async_mode:
+        # Submit/poll mode - answer with a job id and qualify the lead in the background
         try:
-            direct_result = qualification_system._direct_score_lead(lead_dict)
-        except Exception as direct_error:
-            print(f"Direct scoring error: {direct_error}")
-            traceback.print_exc()
-            # If direct scoring fails, provide a fallback response
-            direct_result = {
-                "score": 5,
-                "reason": "Error during analysis - using default score",
-                "action": "PRIORITY: Follow up within 24 hours - Nurture to reach decision makers",
-                "category": "WARM"
-            }
-        
-        # Compare scores and use the higher one
-        # Ensure we never return a score of 0 due to errors
-        if crew_result.get("score", 0) == 0 and "Error" in crew_result.get("reason", ""):
-            return direct_result
-        
-        if direct_result['score'] > crew_result.get('score', 0):
-            return direct_result
+            job = job_queue.submit(lead_dict)
+        except JobQueueFull:
+            raise HTTPException(status_code=503, detail="Job queue is full - retry later or submit without async")
+        finally:
+            # This trace only times the submission - the job runs under one of its own
+            metrics.finish_trace("async_submitted", log=METRICS_LOG_TRACES)
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job["id"], "status": job["status"], "status_url": f"/jobs/{job['id']}"}
+        )
+    
+    return await qualify_lead_dict(lead_dict)
+
+async def qualify_lead_dict(lead_dict):
+    """Qualify one lead under a timing trace, counted by the path that decided it"""
+    if metrics.current_trace() is None:
+        metrics.start_trace()
+    try:
+        result = await qualify_tiered(lead_dict)
+        metrics.finish_trace(qualification_path(result), log=METRICS_LOG_TRACES)
+        return result
+    finally:
+        # Still open when qualify_tiered raised or was cancelled - a no-op otherwise
+        metrics.finish_trace("error", log=METRICS_LOG_TRACES)
+
+async def qualify_tiered(lead_dict):
+    try:
+        # Rule scoring runs first - it is cheap and often decisive on its own
+        direct_result = direct_score_or_default(lead_dict)
+        if is_decisive_rule_score(direct_result):
+            return with_tier(direct_result, "rules")
         
-        return crew_result
+        # Borderline score - escalate to the crew and use the higher of the two
+        crew_result = await crew_analysis_or_empty(lead_dict)
+        return select_tiered_result(crew_result, direct_result)
     except Exception as e:
         # Use direct scoring as fallback with better error handling
         try:
             print(f"Main error in qualify_lead: {e}")
             traceback.print_exc()
-            lead_dict = {k.strip(): v for k, v in lead.dict().items()}
             result = qualification_system._direct_score_lead(lead_dict)
             # Ensure we never return a score of 0
             if result.get("score", 0) == 0:
@@ -572,6 +1309,7 @@ async def qualify_lead(lead: LeadData):
         except Exception as fallback_error:
             print(f"Fallback error: {fallback_error}")
             traceback.print_exc()
+            metrics.annotate(default_used=True)
             # Last resort fallback with fixed values
             return {
                 "score": 5,
@@ -581,13 +1319,251 @@ async def qualify_lead(lead: LeadData):
                 "market_insights": "Unable to analyze - check lead details manually"
             }
 
+def encode_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def encode_ndjson(event, data):
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+async def stream_qualification(lead_dict, encode, ip=None):
+    """Yield the provisional rule result at once, then each crew stage as it
+    finishes, then the merged result"""
+    metrics.start_trace()
+    rejected = prefilter_rejection(lead_dict, ip=ip)
+    if rejected is not None:
+        metrics.finish_trace(qualification_path(rejected), log=METRICS_LOG_TRACES)
+        yield encode("result", rejected)
+        return
+    
+    direct_result = direct_score_or_default(lead_dict)
+    yield encode("direct", with_tier(direct_result, "rules"))
+    
+    if is_decisive_rule_score(direct_result):
+        result = with_tier(direct_result, "rules")
+        metrics.finish_trace(qualification_path(result), log=METRICS_LOG_TRACES)
+        yield encode("result", result)
+        return
+    
+    # Crew threads hand their stages to the event loop through this queue;
+    # None marks the end of the run
+    loop = asyncio.get_running_loop()
+    stages = asyncio.Queue()
+    
+    def on_stage(stage, payload):
+        loop.call_soon_threadsafe(stages.put_nowait, (stage, payload))
+    
+    crew_task = asyncio.create_task(crew_analysis_or_empty(lead_dict, on_stage=on_stage))
+    crew_task.add_done_callback(lambda _: stages.put_nowait(None))
+    
+    try:
+        while (item := await stages.get()) is not None:
+            yield encode(*item)
+        result = select_tiered_result(crew_task.result(), direct_result)
+        metrics.finish_trace(qualification_path(result), log=METRICS_LOG_TRACES)
+    finally:
+        # Still open when the client went away before the crew finished - a no-op otherwise
+        metrics.finish_trace("error", log=METRICS_LOG_TRACES)
+    yield encode("result", result)
+
+@app.post("/qualify-lead/stream")
+async def qualify_lead_stream(request: Request, lead: LeadData, format: str = "sse"):
+    """Streaming /qualify-lead - server-sent events by default, or NDJSON with ?format=ndjson"""
+    lead_dict = {k.strip(): v for k, v in lead.dict().items()}
+    ip = client_ip(request)
+    if format == "ndjson":
+        return StreamingResponse(stream_qualification(lead_dict, encode_ndjson, ip), media_type="application/x-ndjson")
+    if format != "sse":
+        raise HTTPException(status_code=400, detail=f"Unknown stream format '{format}' - expected sse or ndjson")
+    return StreamingResponse(
+        stream_qualification(lead_dict, encode_sse, ip),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/qualify-leads")
+async def qualify_leads(leads: List[LeadData]):
+    """Qualify a batch of leads, fanning the crew analyses out over the worker pool"""
+    if len(leads) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(leads)} leads exceeds the limit of {MAX_BATCH_SIZE}"
+        )
+    
+    lead_dicts = [{k.strip(): v for k, v in lead.dict().items()} for lead in leads]
+    
+    # Batches are imports, not form traffic - only the content checks apply
+    prefiltered = [prefilter_rejection(lead_dict, track=False) for lead_dict in lead_dicts]
+    
+    # Direct scoring is cheap, so every other lead gets a rule-based score straight away
+    direct_results = [qualification_system._direct_score_lead(lead_dict) if rejected is None else None
+                      for lead_dict, rejected in zip(lead_dicts, prefiltered)]
+    
+    # Only hand the pool as many analyses as it has workers, so each
+    # per-request timeout starts when the analysis does, not while queued
+    batch_slots = asyncio.Semaphore(CREW_MAX_WORKERS)
+    
+    async def run_bounded(lead_dict):
+        async with batch_slots:
+            return await run_crew_analysis(lead_dict)
+    
+    # Leads with a decisive rule score never reach the crew
+    escalated = [index for index, direct_result in enumerate(direct_results)
+                 if direct_result is not None and not is_decisive_rule_score(direct_result)]
+    escalated_results = await asyncio.gather(
+        *(run_bounded(lead_dicts[index]) for index in escalated),
+        return_exceptions=True
+    )
+    crew_results = [None] * len(lead_dicts)
+    for index, crew_result in zip(escalated, escalated_results):
+        crew_results[index] = crew_result
+    
+    results = []
+    failures = []
+    degraded = 0
+    for index, (lead_dict, direct_result, crew_result) in enumerate(zip(lead_dicts, direct_results, crew_results)):
+        if prefiltered[index] is not None:
+            results.append(prefiltered[index])
+        elif crew_result is None:
+            results.append(with_tier(direct_result, "rules"))
+        elif isinstance(crew_result, CrewUnavailable):
+            metrics.CREW_FALLBACKS.inc(reason=crew_result.reason)
+            results.append(degraded_result(direct_result, crew_result.reason))
+            degraded += 1
+        elif isinstance(crew_result, BaseException):
+            if isinstance(crew_result, asyncio.TimeoutError):
+                error = f"Crew analysis timed out after {CREW_TIMEOUT_SECONDS}s"
+                metrics.CREW_FALLBACKS.inc(reason="timeout")
+            else:
+                error = f"Crew analysis error: {crew_result}"
+                metrics.CREW_FALLBACKS.inc(reason="error")
+            failures.append({"index": index, "email": lead_dict.get('email', ''), "error": error})
+            # The lead still gets its direct score
+            results.append(with_tier(direct_result, "rules_after_crew"))
+        else:
+            results.append(select_tiered_result(crew_result, direct_result))
+    
+    for result in results:
+        metrics.QUALIFICATIONS.inc(path=qualification_path(result))
+    
+    return {
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "prefiltered": len(results) - prefiltered.count(None),
+            "decided_by_rules": prefiltered.count(None) - len(escalated),
+            "crew_completed": len(escalated) - len(failures) - degraded,
+            "degraded": degraded,
+            "failed": len(failures),
+            "failures": failures
+        }
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.get("/job-stats")
+async def job_stats():
+    return job_queue.stats()
+
+def delivery_authorized(request: Request):
+    """Only the frontend may relay payloads to Make.com"""
+    if WEBHOOK_DELIVERY_TOKEN:
+        token = request.headers.get("x-webhook-delivery-token", "")
+        return hmac.compare_digest(token.encode('utf-8'), WEBHOOK_DELIVERY_TOKEN.encode('utf-8'))
+    return request.client is not None and request.client.host in TRUSTED_PROXY_IPS
+
+@app.post("/webhook-deliveries", status_code=202)
+async def queue_webhook_delivery(payload: Dict[str, Any], request: Request):
+    """Queue a payload for MAKE_WEBHOOK_URL and answer without waiting on Make.com"""
+    if not delivery_authorized(request):
+        raise HTTPException(status_code=401, detail="Not allowed to queue webhook deliveries")
+    if not MAKE_WEBHOOK_URL:
+        raise HTTPException(status_code=503, detail="MAKE_WEBHOOK_URL is not configured")
+    if not webhook_delivery.enqueue(payload):
+        raise HTTPException(status_code=503, detail="Webhook delivery queue is full")
+    return {"queued": True}
+
+@app.get("/webhook-stats")
+async def webhook_stats():
+    return webhook_delivery.stats()
+
+@app.get("/prefilter-stats")
+async def prefilter_stats():
+    if lead_prefilter is None:
+        return {"enabled": False}
+    return {"enabled": True, **lead_prefilter.stats()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    if METRICS_MULTIPROC_DIR:
+        text = metrics.render_all(METRICS_MULTIPROC_DIR)
+    else:
+        text = metrics.REGISTRY.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/cache-stats")
+async def cache_stats():
+    if qualification_system.result_cache is None:
+        return {"backend": "none"}
+    return qualification_system.result_cache.stats()
+
+@app.get("/near-duplicate-stats")
+async def near_duplicate_stats():
+    if qualification_system.near_duplicates is None:
+        return {"backend": "none"}
+    return qualification_system.near_duplicates.stats()
+
+@app.get("/company-profile-stats")
+async def company_profile_stats():
+    if qualification_system.company_profiles is None:
+        return {"backend": "none"}
+    return qualification_system.company_profiles.stats()
+
 # Additional endpoint for health check
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0"}
 
+@app.get("/ready")
+async def readiness():
+    """Ready as soon as rule-based scoring can answer - the crew tier is reported
+    separately, so a missing OpenAI key or a cold start degrades instead of failing"""
+    if qualification_system.crew_ready:
+        crew_state = "warm"
+    elif qualification_system.crew_error:
+        crew_state = "unavailable"
+    else:
+        crew_state = "cold"
+    crew_available = qualification_system.crew_ready and crew_admission.breaker.state != "open"
+    crew = {
+        "available": crew_available,
+        "state": crew_state,
+        "mode": qualification_system.process_mode,
+        "admission": crew_admission.stats()
+    }
+    if LLM_CASSETTE_MODE != "off":
+        crew["llm_cassette"] = LLM_CASSETTE_MODE
+    if qualification_system.crew_error and not qualification_system.crew_ready:
+        crew["error"] = qualification_system.crew_error
+    
+    return {
+        "status": "ready" if crew_available else "degraded",
+        "tiers": {
+            "rules": {"available": True},
+            "crew": crew,
+            "cache": {
+                "available": qualification_system.result_cache is not None,
+                "backend": qualification_system.result_cache.backend if qualification_system.result_cache else "none"
+            }
+        }
+    }
+
 if __name__ == "__main__":
-    # Run the API server
+    # Development server with auto-reload - run serve.py for production
     uvicorn.run(
         "app:app",  
         host="0.0.0.0",
@@ -0,0 +1,198 @@
+import csv
+import re
+import sys
+import time
+from bisect import bisect_right
+import numpy as np
+from scoring_rules import (
+    SCORING_RULES, MessageRule, HIGH_INTENT_OVERRIDE, MESSAGE_SIGNALS,
+    FREE_EMAIL_DOMAINS, PLACEHOLDER_COMPANIES, signal_matcher
+)
+
+# Bulk rule scoring for offline backfills. Produces the same score, category
+# and action as scoring_rules.score_lead, but computes every rule as a NumPy
+# mask over whole columns instead of scoring one dict at a time.
+# Requires NumPy 2 (variable-width StringDType columns).
+
+LEAD_COLUMNS = ('name', 'email', 'phone', 'company', 'message')
+CATEGORIES = np.array(["COLD", "WARM", "HOT"], dtype=object)
+ACTIONS = np.array([
+    "STANDARD: Add to nurture campaign",
+    "PRIORITY: Follow up within 24 hours - Nurture to reach decision makers",
+    "URGENT: Follow up within 2 hours - High priority lead",
+], dtype=object)
+
+DIGIT = re.compile(r'\d')
+SIGNAL_NAMES = tuple(MESSAGE_SIGNALS)
+SIGNAL_INDEX = {name: index for index, name in enumerate(SIGNAL_NAMES)}
+
+
+def _free_email_mask(emails):
+    lowered = np.strings.lower(emails)
+    mask = np.zeros(len(emails), dtype=bool)
+    for domain in FREE_EMAIL_DOMAINS:
+        mask |= np.strings.find(lowered, '@' + domain) >= 0
+    return mask
+
+
+# Vectorized counterparts of the FieldRule checks in scoring_rules
+FIELD_RULE_MASKS = {
+    "business_email": lambda cols: (np.strings.str_len(cols['email']) > 0) & ~_free_email_mask(cols['email']),
+    "phone": lambda cols: np.strings.str_len(cols['phone']) > 5,
+    "full_name": lambda cols: np.strings.find(cols['name'], ' ') >= 0,
+    "company_name": lambda cols: (np.strings.str_len(cols['company']) > 0) &
+                                 ~np.isin(np.strings.lower(cols['company']), PLACEHOLDER_COMPANIES),
+}
+
+
+def to_string_column(column):
+    """Convert a list, NumPy array, pandas Series or Arrow array to a string column.
+    Missing values (None/NaN) become empty strings."""
+    if hasattr(column, 'to_pylist'):  # pyarrow Array / ChunkedArray
+        column = column.to_pylist()
+    elif hasattr(column, 'to_numpy'):  # pandas Series
+        column = column.to_numpy(dtype=object)
+    values = [
+        '' if value is None or (isinstance(value, float) and value != value) else str(value)
+        for value in column
+    ]
+    return np.array(values, dtype=np.dtypes.StringDType())
+
+
+def message_signal_masks(messages):
+    """Boolean matrix (leads x signals) of the message signals found in each message.
+
+    As in SignalMatcher.find, ASCII messages are lowercased and scanned
+    case-sensitively, any others case-insensitively as they are.
+    """
+    messages = messages.tolist()
+    ascii_rows = np.fromiter((message.isascii() for message in messages), dtype=bool, count=len(messages))
+    masks = np.zeros((len(messages), len(SIGNAL_NAMES)), dtype=bool)
+    ascii_messages = [message.lower() for message, is_ascii in zip(messages, ascii_rows) if is_ascii]
+    masks[ascii_rows] = _scan_signals(ascii_messages, caseless=False)
+    if not ascii_rows.all():
+        other_messages = [message for message, is_ascii in zip(messages, ascii_rows) if not is_ascii]
+        masks[~ascii_rows] = _scan_signals(other_messages, caseless=True)
+    return masks
+
+
+def _scan_signals(messages, caseless):
+    """All messages are joined into one buffer and each phrase scans it with a
+    literal-prefix search. After a hit the scan jumps straight to the next
+    message, so the Python-level work is one step per (lead, phrase) hit rather
+    than per occurrence. No phrase can match across the separator.
+    """
+    lengths = np.fromiter((len(message) + 1 for message in messages), dtype=np.int64, count=len(messages))
+    starts = (np.cumsum(lengths) - lengths).tolist()
+    starts.append(int(starts[-1] + lengths[-1]) if messages else 0)
+    buffer = '\x00'.join(messages)
+    digit_at = DIGIT.match
+
+    masks = np.zeros((len(messages), len(SIGNAL_NAMES)), dtype=bool)
+    for signal, ascii_scanner, caseless_scanner, digit_prefix in signal_matcher.phrase_scanners:
+        search = (caseless_scanner if caseless else ascii_scanner).search
+        rows = []
+        position = 0
+        while True:
+            match = search(buffer, position)
+            if match is None:
+                break
+            start = match.start()
+            if digit_prefix and not (start and digit_at(buffer, start - 1)):
+                position = start + 1
+                continue
+            row = bisect_right(starts, start) - 1
+            rows.append(row)
+            position = starts[row + 1]
+        masks[rows, SIGNAL_INDEX[signal]] = True
+    return masks
+
+
+def _any_signal_mask(signal_masks, signals):
+    return signal_masks[:, [SIGNAL_INDEX[signal] for signal in signals]].any(axis=1)
+
+
+def score_leads_bulk(name, email, phone, company, message):
+    """Score whole columns of leads at once.
+
+    Each argument is a column (list, NumPy array, pandas Series or Arrow array)
+    of equal length. Returns a dict of NumPy arrays: score, category, action
+    and the intent/contact/quality components.
+    """
+    cols = {
+        'name': to_string_column(name),
+        'email': to_string_column(email),
+        'phone': to_string_column(phone),
+        'company': to_string_column(company),
+        'message': to_string_column(message),
+    }
+    lengths = {len(column) for column in cols.values()}
+    if len(lengths) != 1:
+        raise ValueError(f"Lead columns must all have the same length, got {sorted(lengths)}")
+    count = lengths.pop()
+
+    signal_masks = message_signal_masks(cols['message'])
+    components = {
+        "intent": np.zeros(count),
+        "contact": np.zeros(count),
+        "quality": np.zeros(count),
+    }
+    for rule in SCORING_RULES:
+        if isinstance(rule, MessageRule):
+            mask = _any_signal_mask(signal_masks, rule.signals)
+        else:
+            if rule.name not in FIELD_RULE_MASKS:
+                raise ValueError(f"No vectorized check for scoring rule '{rule.name}'")
+            mask = FIELD_RULE_MASKS[rule.name](cols)
+        components[rule.component] += mask * rule.points
+
+    # np.rint rounds half to even, like round() in score_lead
+    total_score = components["intent"] + components["contact"] + components["quality"]
+    score = np.clip(np.rint(total_score), 1, 10).astype(np.int64)
+
+    # Special case override - high intent signals
+    override = (_any_signal_mask(signal_masks, HIGH_INTENT_OVERRIDE["decision_maker"]) &
+                _any_signal_mask(signal_masks, HIGH_INTENT_OVERRIDE["budget"]) &
+                (np.strings.str_len(cols['message']) > HIGH_INTENT_OVERRIDE["min_message_length"]))
+    score[override] = 9
+
+    # 0 = COLD, 1 = WARM, 2 = HOT
+    tier = (score >= 5).astype(np.intp) + (score >= 8)
+    return {
+        "score": score,
+        "category": CATEGORIES[tier],
+        "action": ACTIONS[tier],
+        "intent": components["intent"],
+        "contact": components["contact"],
+        "quality": components["quality"],
+    }
+
+
+def backfill_csv(input_path, output_path):
+    """Re-score a CSV export of leads, writing score/category/action columns"""
+    with open(input_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        rows = list(reader)
+
+    start = time.perf_counter()
+    result = score_leads_bulk(*([row.get(column, '') for row in rows] for column in LEAD_COLUMNS))
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(rows)} leads in {elapsed:.2f}s")
+
+    output_fields = fieldnames + [field for field in ('score', 'category', 'action') if field not in fieldnames]
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=output_fields)
+        writer.writeheader()
+        for index, row in enumerate(rows):
+            row['score'] = int(result['score'][index])
+            row['category'] = result['category'][index]
+            row['action'] = result['action'][index]
+            writer.writerow(row)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python bulk_scoring.py <leads.csv> <scored.csv>")
+        sys.exit(1)
+    backfill_csv(sys.argv[1], sys.argv[2])
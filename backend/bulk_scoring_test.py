@@ -0,0 +1,69 @@
+import random
+import time
+import numpy as np
+from bulk_scoring import score_leads_bulk, LEAD_COLUMNS
+from scoring_rules import score_lead
+from scoring_rules_test import random_lead, hot_lead, warm_lead, cold_lead
+
+
+def columns_for(leads):
+    return [[lead.get(column, '') for lead in leads] for column in LEAD_COLUMNS]
+
+
+def test_bulk_parity():
+    rng = random.Random(7)
+    leads = [hot_lead, warm_lead, cold_lead] + [random_lead(rng) for _ in range(5000)]
+    result = score_leads_bulk(*columns_for(leads))
+    for index, lead in enumerate(leads):
+        expected = score_lead(lead)
+        assert result['score'][index] == expected['score'], lead
+        assert result['category'][index] == expected['category'], lead
+        assert result['action'][index] == expected['action'], lead
+
+
+def test_bulk_accepts_numpy_and_missing_values():
+    result = score_leads_bulk(
+        np.array(["Ann Lee", None], dtype=object),
+        np.array(["ann@acme.com", "bob@gmail.com"], dtype=object),
+        np.array(["+1-332-555-7890", None], dtype=object),
+        np.array(["Acme", float('nan')], dtype=object),
+        np.array(["We need to cut costs", None], dtype=object),
+    )
+    assert list(result['score']) == [6, 1]
+    assert list(result['category']) == ["WARM", "COLD"]
+
+
+def backfill_lead(rng, index):
+    """A lead shaped like the historical table: a sample message with a few extra phrases"""
+    lead = dict(rng.choice([hot_lead, warm_lead, cold_lead]))
+    lead["message"] = f"{lead['message']} {random_lead(rng)['message'][:60]} (ref {index})"
+    return lead
+
+
+def benchmark(count=200000):
+    """Compare bulk scoring against one score_lead call per lead"""
+    rng = random.Random(1)
+    leads = [backfill_lead(rng, index) for index in range(count)]
+    columns = columns_for(leads)
+
+    start = time.perf_counter()
+    for lead in leads:
+        score_lead(lead)
+    per_lead = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score_leads_bulk(*columns)
+    bulk = time.perf_counter() - start
+
+    print(f"score_lead loop: {per_lead:.2f}s for {count} leads")
+    print(f"score_leads_bulk: {bulk:.2f}s for {count} leads")
+
+
+if __name__ == "__main__":
+    print("=== Bulk Scoring Parity ===")
+    test_bulk_parity()
+    test_bulk_accepts_numpy_and_missing_values()
+    print("All parity checks passed")
+
+    print("\n=== Bulk Scoring Benchmark ===")
+    benchmark()
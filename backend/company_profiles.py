@@ -0,0 +1,52 @@
+import hashlib
+import json
+import re
+from prefilter import FREE_EMAIL_HOSTS, PLACEHOLDER_COMPANY_NAMES, email_domain
+
+# Legal forms dropped from company names, so "Acme Inc." and "ACME" share a profile
+LEGAL_SUFFIXES = frozenset({
+    "ag", "bv", "co", "company", "corp", "corporation", "gmbh", "inc", "incorporated",
+    "limited", "llc", "llp", "ltd", "plc", "pty", "sa", "sarl", "srl",
+})
+NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_company(company):
+    """Lowercased company name without punctuation or trailing legal forms"""
+    company = str(company if company is not None else '').strip().lower()
+    if company in PLACEHOLDER_COMPANY_NAMES:
+        return ''
+    words = NON_WORD.sub(' ', company.replace('&', ' and ')).split()
+    while words and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def company_domain(lead_info):
+    """The lead's email domain when it vouches for the company, else ''. Webmail
+    domains say nothing about it - anyone can type any company next to one"""
+    domain = email_domain(str(lead_info.get('email') or '')) or ''
+    return '' if domain in FREE_EMAIL_HOSTS else domain
+
+
+def company_identity(lead_info):
+    """(email domain, company name) the lead's company is known by, or None when
+    it has neither. Webmail senders are known by the company name alone, apart
+    from every sender on the company's own domain"""
+    domain = company_domain(lead_info)
+    company = normalize_company(lead_info.get('company'))
+    if not domain and not company:
+        return None
+    return domain, company
+
+
+def make_profile_key(lead_info, prompt_version, model_name):
+    """Cache key of the lead's company profile, or None for a lead without a company to profile"""
+    identity = company_identity(lead_info)
+    if identity is None:
+        return None
+    payload = json.dumps(
+        {"domain": identity[0], "company": identity[1], "prompt_version": prompt_version, "model": model_name},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
@@ -0,0 +1,52 @@
+import os
+
+# Set before app is imported, whichever test module imports it first
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["CREW_VERBOSE"] = "false"
+os.environ["CREW_WARM_UP"] = "lazy"
+
+from app import qualification_system
+from company_profiles import company_identity, make_profile_key, normalize_company
+
+LEAD = {
+    "name": "Sarah Johnson",
+    "email": "sarah.johnson@techcorp.com",
+    "company": "TechCorp Solutions",
+    "message": "We need a lead qualification system for our sales team of 40 people.",
+}
+PROFILE = {"company_size": "Large", "industry": "Software", "potential_value": "High", "key_insight": "Growing sales team"}
+
+
+def test_profile_keys_follow_the_company():
+    assert normalize_company(" TechCorp Solutions, Inc. ") == "techcorp solutions"
+    assert normalize_company("Smith & Sons Ltd") == "smith and sons"
+    key = make_profile_key(LEAD, "v1", "model")
+    # Another person at the same company shares the profile
+    assert make_profile_key(dict(LEAD, email="Sam@TechCorp.com", company="TECHCORP SOLUTIONS LLC"), "v1", "model") == key
+    assert make_profile_key(dict(LEAD, company="Other Corp"), "v1", "model") != key
+    assert make_profile_key(LEAD, "v2", "model") != key
+
+    # A webmail sender is known by the company name alone, apart from the company's own domain
+    assert company_identity(dict(LEAD, email="sarah@gmail.com")) == ("", "techcorp solutions")
+    assert make_profile_key(dict(LEAD, email="sarah@gmail.com"), "v1", "model") != key
+    assert make_profile_key(dict(LEAD, email="sarah@gmail.com", company="n/a"), "v1", "model") is None
+
+
+def test_cached_profile_is_merged_like_a_research_run():
+    analysis = {'analysis_task': '{"score": 5, "category": "WARM", "reason": "Clear use case"}'}
+    result = qualification_system._process_crew_result(analysis, cached_research=PROFILE)
+    assert result["market_insights"] == "Industry: Software | Company size: Large | Potential value: High"
+    # A high value account is lifted to 7, as after a research run
+    assert result["score"] == 7
+
+    # Not when only a webmail sender says it comes from that account
+    result = qualification_system._process_crew_result(analysis, cached_research=PROFILE, company_verified=False)
+    assert result["score"] == 5
+    assert result["market_insights"] == "Industry: Software | Company size: Large | Potential value: High"
+
+
+if __name__ == "__main__":
+    test_profile_keys_follow_the_company()
+    test_cached_profile_is_merged_like_a_research_run()
+    print("All company profile checks passed")
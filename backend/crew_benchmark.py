@@ -0,0 +1,82 @@
+import contextlib
+import os
+import time
+
+# Benchmark the per-request CrewAI overhead with the LLM stubbed out
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["RESULT_CACHE_BACKEND"] = "none"
+os.environ["NEAR_DUPLICATE_BACKEND"] = "none"
+os.environ["COMPANY_PROFILE_BACKEND"] = "none"
+
+from crewai import Task, Crew, Process
+from app import LeadQualificationSystem
+from stub_llm import StubLLM
+
+lead = {
+    "name": "Sarah Johnson",
+    "email": "sarah.johnson@techcorp.com",
+    "phone": "+1-458-789-3456",
+    "company": "TechCorp Solutions",
+    "message": "I'm the CTO at TechCorp and we urgently need to implement your lead qualification system by next month. We have a budget of $50,000 for this project.",
+    "source": "Web Form"
+}
+
+
+def rebuild_per_request(system, lead_info, verbose):
+    """The previous approach - new Tasks and a new Crew for every lead"""
+    analysis_task = Task(
+        description=f"""
+        Analyze this lead. Name: {lead_info['name']} Email: {lead_info['email']}
+        Phone: {lead_info['phone']} Company: {lead_info['company']} Message: {lead_info['message']}
+        Respond with this exact JSON structure:
+        {{"score": <number 0-10>, "category": "<HOT/WARM/COLD>", "reason": "<explanation>"}}
+        """,
+        agent=system.lead_analyzer,
+        expected_output="JSON lead scoring analysis"
+    )
+    research_task = Task(
+        description=f"""
+        Research the company and market context. Name: {lead_info['name']} Email: {lead_info['email']}
+        Phone: {lead_info['phone']} Company: {lead_info['company']} Message: {lead_info['message']}
+        Respond with this exact JSON structure:
+        {{"company_size": "<Small/Medium/Large>", "industry": "<Industry>", "potential_value": "<High/Medium/Low>", "key_insight": "<one key market insight>"}}
+        """,
+        agent=system.market_researcher,
+        expected_output="Market research in JSON format"
+    )
+    crew = Crew(
+        agents=[system.lead_analyzer, system.market_researcher],
+        tasks=[analysis_task, research_task],
+        verbose=verbose,
+        process=Process.sequential
+    )
+    return system._process_crew_result(crew.kickoff())
+
+
+def time_per_request(label, run, number):
+    # Agent traces go to /dev/null so terminal speed doesn't skew the numbers
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        run()  # warm up
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+    print(f"{label:>32}: {elapsed / number * 1000:.2f} ms/request")
+
+
+def benchmark(number=200):
+    system = LeadQualificationSystem(llm=StubLLM())
+    system.warm_up()
+    lead_info = system._lead_info(lead)
+    time_per_request("rebuild per request (verbose)", lambda: rebuild_per_request(system, lead_info, True), number)
+    time_per_request("rebuild per request (quiet)", lambda: rebuild_per_request(system, lead_info, False), number)
+    time_per_request("prebuilt crew pool", lambda: system.analyze_lead(lead, check_cache=False), number)
+    single = LeadQualificationSystem(llm=StubLLM(), process_mode="single")
+    time_per_request("single-call crew", lambda: single.analyze_lead(lead, check_cache=False), number)
+
+
+if __name__ == "__main__":
+    print("=== Crew Overhead Benchmark (stubbed LLM) ===")
+    print(f"CREW_VERBOSE={os.getenv('CREW_VERBOSE', 'true')} for the prebuilt pool")
+    benchmark()
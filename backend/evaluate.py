@@ -0,0 +1,227 @@
+import argparse
+import contextvars
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The crew path is stubbed by default - no network, no key
+os.environ.setdefault("OPENAI_API_KEY", "sk-evaluation")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["RESULT_CACHE_BACKEND"] = "none"
+os.environ["NEAR_DUPLICATE_BACKEND"] = "none"
+os.environ["COMPANY_PROFILE_BACKEND"] = "none"
+os.environ["CREW_VERBOSE"] = "false"
+os.environ["CREW_WARM_UP"] = "lazy"
+
+import app
+import metrics
+
+CATEGORIES = ("HOT", "WARM", "COLD")
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lead_corpus.jsonl")
+
+# gpt-3.5-turbo-instruct list prices, USD per 1K tokens
+PROMPT_PRICE_PER_1K = 0.0015
+COMPLETION_PRICE_PER_1K = 0.002
+
+
+def load_corpus(path):
+    """Labeled leads - one JSON object per line with an id, the lead and its expected_category"""
+    corpus = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON - {e}")
+            if entry.get("expected_category") not in CATEGORIES:
+                raise ValueError(f"{path}:{line_number}: expected_category must be one of {', '.join(CATEGORIES)}")
+            if not isinstance(entry.get("lead"), dict):
+                raise ValueError(f"{path}:{line_number}: lead must be an object")
+            corpus.append({"id": entry.get("id", str(line_number)), **entry})
+    return corpus
+
+
+def evaluate_lead(system, entry, run_crew):
+    """Rule and (optionally) crew outcome of one lead, with latency and token usage"""
+    lead = entry["lead"]
+    start = time.perf_counter()
+    direct_result = system._direct_score_lead(lead)
+    record = {
+        "id": entry["id"],
+        "expected": entry["expected_category"],
+        "rules": {"result": direct_result, "seconds": time.perf_counter() - start,
+                  "prompt_tokens": 0, "completion_tokens": 0},
+    }
+    if run_crew:
+        # The crew span of the trace carries the token usage of the run
+        trace = metrics.start_trace()
+        start = time.perf_counter()
+        crew_result = system.analyze_lead(lead, check_cache=False)
+        seconds = time.perf_counter() - start
+        crew_span = next((span for span in trace.spans if span["stage"] == "crew"), {})
+        record["crew"] = {
+            "result": crew_result,
+            "seconds": seconds,
+            "prompt_tokens": crew_span.get("prompt_tokens", 0),
+            "completion_tokens": crew_span.get("completion_tokens", 0),
+        }
+    return record
+
+
+def evaluate_corpus(system, corpus, run_crew=True, workers=app.CREW_MAX_WORKERS):
+    """evaluate_lead over the corpus in parallel. Each lead runs in its own copy
+    of the context so traces don't leak between leads on a worker thread"""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evaluate") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, evaluate_lead, system, entry, run_crew)
+            for entry in corpus
+        ]
+        return [future.result() for future in futures]
+
+
+def tiered_outcome(record, cold_max, hot_min):
+    """What /qualify-lead would answer with the given rule bands - the rules
+    alone when decisive, otherwise the crew result chosen as in select_result"""
+    rules = record["rules"]
+    score = rules["result"]["score"]
+    if score <= cold_max or score >= hot_min:
+        return {**rules, "escalated": False}
+    crew = record["crew"]
+    return {
+        "result": app.select_result(crew["result"], rules["result"]),
+        "seconds": rules["seconds"] + crew["seconds"],
+        "prompt_tokens": crew["prompt_tokens"],
+        "completion_tokens": crew["completion_tokens"],
+        "escalated": True,
+    }
+
+
+def summarize(name, records, outcomes, prompt_price=PROMPT_PRICE_PER_1K, completion_price=COMPLETION_PRICE_PER_1K):
+    """Accuracy, confusion matrix (expected -> predicted), and per-lead latency and cost"""
+    confusion = {expected: {predicted: 0 for predicted in CATEGORIES} for expected in CATEGORIES}
+    correct = 0
+    for record, outcome in zip(records, outcomes):
+        predicted = outcome["result"].get("category")
+        if predicted in CATEGORIES:
+            confusion[record["expected"]][predicted] += 1
+        correct += predicted == record["expected"]
+    count = len(records) or 1
+    latencies = sorted(outcome["seconds"] for outcome in outcomes)
+    prompt_tokens = sum(outcome["prompt_tokens"] for outcome in outcomes)
+    completion_tokens = sum(outcome["completion_tokens"] for outcome in outcomes)
+    cost = prompt_tokens / 1000 * prompt_price + completion_tokens / 1000 * completion_price
+    return {
+        "config": name,
+        "accuracy": round(correct / count, 3),
+        "crew_share": round(sum(outcome.get("escalated", name == "crew") for outcome in outcomes) / count, 3),
+        "mean_ms": round(sum(latencies) / count * 1000, 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 2) if latencies else 0.0,
+        "tokens_per_lead": round((prompt_tokens + completion_tokens) / count, 1),
+        "cost_per_lead_usd": round(cost / count, 6),
+        "confusion": confusion,
+    }
+
+
+def parse_bands(text):
+    """'2:9,3:8' -> [(2, 9), (3, 8)] - RULE_COLD_MAX_SCORE:RULE_HOT_MIN_SCORE pairs"""
+    bands = []
+    for pair in text.split(","):
+        cold_max, hot_min = pair.split(":")
+        bands.append((int(cold_max), int(hot_min)))
+    return bands
+
+
+def cheapest_meeting(summaries, min_accuracy):
+    candidates = [summary for summary in summaries if summary["accuracy"] >= min_accuracy]
+    return min(candidates, key=lambda summary: (summary["cost_per_lead_usd"], summary["mean_ms"]), default=None)
+
+
+def print_confusion(summary):
+    print(f"\n{summary['config']} (rows expected, columns predicted)")
+    print(f"{'':>6}" + "".join(f"{category:>6}" for category in CATEGORIES))
+    for expected in CATEGORIES:
+        print(f"{expected:>6}" + "".join(f"{summary['confusion'][expected][predicted]:>6}" for predicted in CATEGORIES))
+
+
+def create_llm(args):
+    if args.cassette:
+        # Recorded completions - replay runs offline at full speed
+        return app.create_llm(cassette_mode=args.cassette_mode, cassette_path=args.cassette)
+    if args.llm == "stub":
+        from stub_llm import StubLLM
+        return StubLLM(latency_seconds=args.stub_latency_ms / 1000, output_shape=args.output_shape)
+    # None makes the system build the configured OpenAI model
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a labeled lead corpus through the rule, crew and tiered paths")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--paths", default="rules,crew,tiered", help="comma-separated: rules, crew, tiered")
+    parser.add_argument("--bands", default=f"{app.RULE_COLD_MAX_SCORE}:{app.RULE_HOT_MIN_SCORE}",
+                        help="rule bands to evaluate the tiered path with, e.g. 2:9,3:8")
+    parser.add_argument("--llm", choices=("stub", "openai"), default="stub")
+    parser.add_argument("--cassette", help="LLM cassette file to replay (or record) the crew completions with")
+    parser.add_argument("--cassette-mode", choices=("record", "replay", "auto"), default="replay")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output-shape", default="json", help="stub answer shape, see stub_llm.OUTPUT_SHAPES")
+    parser.add_argument("--process-mode", choices=("sequential", "parallel", "single"), default=app.CREW_PROCESS_MODE)
+    parser.add_argument("--workers", type=int, default=app.CREW_MAX_WORKERS)
+    parser.add_argument("--prompt-price", type=float, default=PROMPT_PRICE_PER_1K, help="USD per 1K prompt tokens")
+    parser.add_argument("--completion-price", type=float, default=COMPLETION_PRICE_PER_1K,
+                        help="USD per 1K completion tokens")
+    parser.add_argument("--min-accuracy", type=float, help="report the cheapest configuration at or above this accuracy")
+    parser.add_argument("--save", help="write the summaries and per-lead records as JSON to this file")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    paths = args.paths.split(",")
+    run_crew = "crew" in paths or "tiered" in paths
+    system = app.LeadQualificationSystem(llm=create_llm(args) if run_crew else None, process_mode=args.process_mode)
+    if run_crew:
+        system.warm_up()
+
+    start = time.perf_counter()
+    records = evaluate_corpus(system, corpus, run_crew=run_crew, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    summaries = []
+    prices = (args.prompt_price, args.completion_price)
+    if "rules" in paths:
+        summaries.append(summarize("rules", records, [record["rules"] for record in records], *prices))
+    if "crew" in paths:
+        summaries.append(summarize("crew", records, [record["crew"] for record in records], *prices))
+    if "tiered" in paths:
+        for cold_max, hot_min in parse_bands(args.bands):
+            outcomes = [tiered_outcome(record, cold_max, hot_min) for record in records]
+            summaries.append(summarize(f"tiered {cold_max}:{hot_min}", records, outcomes, *prices))
+
+    llm_label = f"{args.cassette_mode} {args.cassette}" if args.cassette else args.llm
+    print(f"=== Evaluation: {len(corpus)} leads from {args.corpus}, {llm_label} LLM, "
+          f"{args.process_mode} crew, {elapsed:.2f}s ===")
+    print(f"{'config':>14} {'accuracy':>9} {'crew':>6} {'mean ms':>9} {'p95 ms':>9} {'tokens':>8} {'USD/lead':>10}")
+    for summary in summaries:
+        print(f"{summary['config']:>14} {summary['accuracy']:>9} {summary['crew_share']:>6} {summary['mean_ms']:>9} "
+              f"{summary['p95_ms']:>9} {summary['tokens_per_lead']:>8} {summary['cost_per_lead_usd']:>10}")
+    for summary in summaries:
+        print_confusion(summary)
+
+    best = None
+    if args.min_accuracy is not None:
+        best = cheapest_meeting(summaries, args.min_accuracy)
+        if best is None:
+            print(f"\nNo configuration reaches {args.min_accuracy} accuracy")
+        else:
+            print(f"\nCheapest configuration at {args.min_accuracy}+ accuracy: {best['config']}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"settings": vars(args), "summaries": summaries, "records": records}, f, indent=2, default=str)
+    return 1 if args.min_accuracy is not None and best is None else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
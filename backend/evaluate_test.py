@@ -0,0 +1,50 @@
+import json
+import pytest
+from evaluate import load_corpus, tiered_outcome, summarize, cheapest_meeting, DEFAULT_CORPUS, CATEGORIES
+
+
+def outcome(score, category, seconds=0.001, tokens=0):
+    return {"result": {"score": score, "category": category}, "seconds": seconds,
+            "prompt_tokens": tokens, "completion_tokens": 0}
+
+
+def test_shipped_corpus_is_valid():
+    corpus = load_corpus(DEFAULT_CORPUS)
+    assert len({entry["id"] for entry in corpus}) == len(corpus)
+    assert {entry["expected_category"] for entry in corpus} == set(CATEGORIES)
+
+
+def test_corpus_errors_name_the_line(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    path.write_text(json.dumps({"id": "a", "expected_category": "HOT", "lead": {}}) + "\n\n"
+                    + json.dumps({"id": "b", "expected_category": "LUKEWARM", "lead": {}}) + "\n")
+    with pytest.raises(ValueError, match=r"corpus.jsonl:3: expected_category"):
+        load_corpus(path)
+
+
+def test_tiered_outcome_and_summary():
+    records = [
+        {"expected": "HOT", "rules": outcome(9, "HOT"), "crew": outcome(6, "WARM", 1.0, 1000)},
+        {"expected": "WARM", "rules": outcome(4, "COLD"), "crew": outcome(6, "WARM", 1.0, 1000)},
+        {"expected": "COLD", "rules": outcome(1, "COLD"), "crew": outcome(6, "WARM", 1.0, 1000)},
+    ]
+    # 4 is borderline with the 2:9 bands, so only the second lead escalates
+    outcomes = [tiered_outcome(record, 2, 9) for record in records]
+    assert [o["escalated"] for o in outcomes] == [False, True, False]
+    tiered = summarize("tiered 2:9", records, outcomes, prompt_price=0.003, completion_price=0)
+    assert tiered["accuracy"] == 1.0
+    assert tiered["crew_share"] == 0.333
+    assert tiered["cost_per_lead_usd"] == 0.001
+    assert tiered["confusion"]["WARM"] == {"HOT": 0, "WARM": 1, "COLD": 0}
+
+    crew = summarize("crew", records, [record["crew"] for record in records], prompt_price=0.003, completion_price=0)
+    assert crew["accuracy"] == 0.333 and crew["crew_share"] == 1.0
+    rules = summarize("rules", records, [record["rules"] for record in records])
+    assert cheapest_meeting([rules, crew, tiered], 0.9)["config"] == "tiered 2:9"
+    assert cheapest_meeting([rules, crew, tiered], 0.6)["config"] == "rules"
+
+
+if __name__ == "__main__":
+    test_shipped_corpus_is_valid()
+    test_tiered_outcome_and_summary()
+    print("All evaluation checks passed")
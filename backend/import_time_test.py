@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Importing app must stay cheap - CrewAI and LangChain are only imported when
+# the crew tier is warmed up
+HEAVY_MODULES = ('crewai', 'langchain_openai', 'litellm')
+IMPORT_BUDGET_SECONDS = 2.0
+
+
+def time_import(statement):
+    """Seconds a fresh interpreter takes to run statement, and the heavy modules it loaded"""
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps([elapsed, [name for name in {HEAVY_MODULES!r} if name in sys.modules]]))\n"
+    )
+    env = dict(os.environ, OTEL_SDK_DISABLED="true", CREW_WARM_UP="lazy")
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def test_app_import_is_fast_and_lazy():
+    elapsed, loaded = time_import("import app")
+    assert loaded == []
+    assert elapsed < IMPORT_BUDGET_SECONDS, elapsed
+
+
+def benchmark():
+    for label, statement in (
+        ("import app", "import app"),
+        ("import crewai + langchain_openai", "import crewai, langchain_openai"),
+        ("import app + warm_up()", "import app; app.qualification_system.warm_up()"),
+    ):
+        elapsed, _ = time_import(statement)
+        print(f"{label:>34}: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_app_import_is_fast_and_lazy()
+    print("app imports without the crew dependencies")
+
+    print("\n=== Import Time Benchmark ===")
+    benchmark()
@@ -0,0 +1,406 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import urllib.request
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# queued -> running -> done / failed
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+FINISHED_STATUSES = ('done', 'failed')
+
+
+class JobQueueFull(Exception):
+    """Raised by JobQueue.submit while max_queued jobs are already waiting"""
+
+
+def new_job(lead, webhook_url=None):
+    now = time.time()
+    return {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "lead": lead,
+        "result": None,
+        "error": None,
+        "webhook_url": webhook_url,
+        "owner": None,
+        "lease_until": None,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+class JobStore(ABC):
+    """Base class for qualification job stores - finished jobs are kept for ttl_seconds"""
+
+    def __init__(self, max_jobs, ttl_seconds):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def add(self, job):
+        pass
+
+    @abstractmethod
+    def get(self, job_id):
+        pass
+
+    @abstractmethod
+    def update(self, job_id, **fields):
+        pass
+
+    @abstractmethod
+    def pending_ids(self, now, queued_before=None):
+        """Jobs queued before queued_before (all waiting ones when None), and
+        running ones whose lease expired (their worker died or was restarted) -
+        oldest first"""
+
+    @abstractmethod
+    def claim(self, job_id, owner, lease_seconds):
+        """Atomically mark a job running for owner until its lease runs out. Only
+        queued jobs and running ones with an expired lease can be claimed - so
+        workers in several processes sharing a store never run a job twice at once"""
+
+    @abstractmethod
+    def renew(self, job_id, owner, lease_seconds):
+        """Extend owner's lease on a running job - False once it is no longer owner's"""
+
+    @abstractmethod
+    def counts(self):
+        pass
+
+    def stats(self):
+        return {"backend": self.backend, "max_jobs": self.max_jobs, "ttl_seconds": self.ttl_seconds, **self.counts()}
+
+
+class MemoryJobStore(JobStore):
+    """In-process job store - jobs are lost on restart"""
+    backend = "memory"
+
+    def __init__(self, max_jobs=10000, ttl_seconds=86400):
+        super().__init__(max_jobs, ttl_seconds)
+        self._jobs = OrderedDict()
+
+    def add(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            self._purge(job["created_at"])
+
+    def _purge(self, now):
+        # Drop expired finished jobs, then the oldest finished ones past max_jobs.
+        # Jobs are in creation order, so the scan stops at the first one too young to expire
+        overflow = len(self._jobs) - self.max_jobs
+        expired = []
+        for job_id, job in self._jobs.items():
+            if overflow <= 0 and (self.ttl_seconds <= 0 or now - job["created_at"] <= self.ttl_seconds):
+                break
+            if job["status"] not in FINISHED_STATUSES:
+                continue
+            if overflow > 0 or (self.ttl_seconds > 0 and now - job["updated_at"] > self.ttl_seconds):
+                expired.append(job_id)
+                overflow -= 1
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=time.time())
+
+    def _lease_expired(self, job, now):
+        return job["status"] == "running" and (job["lease_until"] or 0) < now
+
+    def pending_ids(self, now, queued_before=None):
+        queued_before = now if queued_before is None else queued_before
+        with self._lock:
+            return [
+                job_id for job_id, job in self._jobs.items()
+                if (job["status"] == "queued" and job["created_at"] <= queued_before) or self._lease_expired(job, now)
+            ]
+
+    def claim(self, job_id, owner, lease_seconds):
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not (job["status"] == "queued" or self._lease_expired(job, now)):
+                return False
+            job.update(status="running", owner=owner, lease_until=now + lease_seconds, updated_at=now)
+            return True
+
+    def renew(self, job_id, owner, lease_seconds):
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "running" or job["owner"] != owner:
+                return False
+            job["lease_until"] = now + lease_seconds
+            return True
+
+    def counts(self):
+        with self._lock:
+            counts = dict.fromkeys(JOB_STATUSES, 0)
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            return counts
+
+
+class SQLiteJobStore(JobStore):
+    """On-disk job store - queued and interrupted jobs are picked up again after a restart"""
+    backend = "sqlite"
+    JSON_FIELDS = ('lead', 'result')
+
+    def __init__(self, path, max_jobs=10000, ttl_seconds=86400):
+        super().__init__(max_jobs, ttl_seconds)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS qualification_jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, lead TEXT NOT NULL, "
+            "result TEXT, error TEXT, webhook_url TEXT, owner TEXT, lease_until REAL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        # Stores created before job leases existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(qualification_jobs)")}
+        for column, column_type in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE qualification_jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_qualification_jobs_status "
+            "ON qualification_jobs (status, created_at)"
+        )
+
+    def add(self, job):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO qualification_jobs "
+                "(id, status, lead, result, error, webhook_url, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job["id"], job["status"], json.dumps(job["lead"]), json.dumps(job["result"]),
+                 job["error"], job["webhook_url"], job["created_at"], job["updated_at"])
+            )
+            self._purge(job["created_at"])
+
+    def _purge(self, now):
+        if self.ttl_seconds > 0:
+            self._conn.execute(
+                "DELETE FROM qualification_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (now - self.ttl_seconds,)
+            )
+        overflow = self._conn.execute("SELECT COUNT(*) FROM qualification_jobs").fetchone()[0] - self.max_jobs
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM qualification_jobs WHERE id IN ("
+                "SELECT id FROM qualification_jobs WHERE status IN ('done', 'failed') "
+                "ORDER BY updated_at LIMIT ?)",
+                (overflow,)
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM qualification_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in self.JSON_FIELDS:
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        return job
+
+    def update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        for field in self.JSON_FIELDS:
+            if field in fields:
+                fields[field] = json.dumps(fields[field])
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE qualification_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def pending_ids(self, now, queued_before=None):
+        queued_before = now if queued_before is None else queued_before
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM qualification_jobs WHERE (status = 'queued' AND created_at <= ?) OR "
+                "(status = 'running' AND COALESCE(lease_until, 0) < ?) ORDER BY created_at",
+                (queued_before, now)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def claim(self, job_id, owner, lease_seconds):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE qualification_jobs SET status = 'running', owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND (status = 'queued' OR (status = 'running' AND COALESCE(lease_until, 0) < ?))",
+                (owner, now + lease_seconds, now, job_id, now)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id, owner, lease_seconds):
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE qualification_jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND owner = ?",
+                (time.time() + lease_seconds, job_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM qualification_jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+
+def create_job_store(backend, path=None, max_jobs=10000, ttl_seconds=86400):
+    """Build the configured job store - 'memory' or 'sqlite'"""
+    backend = (backend or "memory").lower()
+    if backend == "memory":
+        return MemoryJobStore(max_jobs=max_jobs, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteJobStore(path or "jobs.sqlite3", max_jobs=max_jobs, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown job queue backend '{backend}' - expected memory or sqlite")
+
+
+# Bookkeeping fields kept out of GET /jobs/{id} and the completion webhook
+PRIVATE_JOB_FIELDS = ("webhook_url", "owner", "lease_until")
+
+
+def public_job(job):
+    """The job as reported by GET /jobs/{id} and the completion webhook"""
+    return {key: value for key, value in job.items() if key not in PRIVATE_JOB_FIELDS}
+
+
+def post_webhook(url, payload, timeout_seconds=10):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout_seconds) as response:
+        return response.status
+
+
+class JobQueue:
+    """Submit/poll lead qualification - workers drain an in-process queue of job ids
+    and run each lead through handler, an async function returning the result.
+    A running job is leased to this queue for lease_seconds and the lease is
+    renewed while it runs, so queues sharing a durable store only take over jobs
+    whose queue died, and queued jobs none of them claimed within a lease -
+    checked every lease_seconds. Submissions are refused with JobQueueFull while
+    max_queued jobs are waiting"""
+
+    def __init__(self, store, handler, workers=4, webhook_url=None, lease_seconds=60, max_queued=None):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.webhook_url = webhook_url
+        self.lease_seconds = lease_seconds
+        self.max_queued = max_queued
+        self.owner = uuid.uuid4().hex
+        self._queue = None
+        # Ids in _queue, so a reclaim doesn't queue a job this queue already holds
+        self._waiting = set()
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._waiting = set()
+        # Durable stores hand back whatever was left over from the last run
+        for job_id in self.store.pending_ids(time.time()):
+            self._enqueue(job_id)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reclaim()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, lead):
+        if self.max_queued is not None and self.store.counts()["queued"] >= self.max_queued:
+            raise JobQueueFull(f"{self.max_queued} jobs are already queued")
+        job = new_job(lead, self.webhook_url)
+        self.store.add(job)
+        self._enqueue(job["id"])
+        return job
+
+    def _enqueue(self, job_id):
+        self._waiting.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    def get(self, job_id):
+        job = self.store.get(job_id)
+        return public_job(job) if job is not None else None
+
+    def stats(self):
+        return {"workers": self.workers, "max_queued": self.max_queued,
+                "queue_depth": self._queue.qsize() if self._queue else 0, **self.store.stats()}
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            self._waiting.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"Job worker error for {job_id}: {e}")
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    async def _reclaim(self):
+        # Jobs whose lease ran out were left running by a queue that is gone.
+        # One still queued a lease after it was submitted may be sitting in the
+        # in-process queue of a dead one - claiming keeps it from running twice
+        while True:
+            await asyncio.sleep(self.lease_seconds)
+            now = time.time()
+            for job_id in self.store.pending_ids(now, queued_before=now - self.lease_seconds):
+                if job_id not in self._waiting:
+                    self._enqueue(job_id)
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self.store.renew(job_id, self.owner, self.lease_seconds):
+                return
+
+    async def _run(self, job_id):
+        if not self.store.claim(job_id, self.owner, self.lease_seconds):
+            return
+        job = self.store.get(job_id)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            result = await self.handler(job["lead"])
+            self.store.update(job_id, status="done", result=result)
+        except Exception as e:
+            self.store.update(job_id, status="failed", error=str(e))
+        finally:
+            heartbeat.cancel()
+        if job["webhook_url"]:
+            await self._notify(job_id, job["webhook_url"])
+
+    async def _notify(self, job_id, url):
+        # Delivery is best effort - the result stays available through GET /jobs/{id}
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, post_webhook, url, public_job(self.store.get(job_id))
+            )
+        except Exception as e:
+            print(f"Job webhook error for {job_id}: {e}")
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import tempfile
+import time
+from job_queue import JobQueue, JobQueueFull, MemoryJobStore, SQLiteJobStore, new_job
+
+
+async def double_score(lead):
+    return {"score": lead["score"] * 2}
+
+
+async def failing_handler(lead):
+    raise RuntimeError("crew unavailable")
+
+
+async def run_jobs(queue, leads):
+    await queue.start()
+    jobs = [queue.submit(lead) for lead in leads]
+    await queue._queue.join()
+    await queue.stop()
+    return [queue.get(job["id"]) for job in jobs]
+
+
+def test_jobs_complete_and_fail():
+    done = asyncio.run(run_jobs(JobQueue(MemoryJobStore(), double_score, workers=2), [{"score": 2}, {"score": 3}]))
+    assert [(job["status"], job["result"]) for job in done] == [("done", {"score": 4}), ("done", {"score": 6})]
+
+    failed = asyncio.run(run_jobs(JobQueue(MemoryJobStore(), failing_handler), [{"score": 1}]))
+    assert failed[0]["status"] == "failed"
+    assert failed[0]["error"] == "crew unavailable"
+
+
+def test_sqlite_store_resumes_interrupted_jobs():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jobs.sqlite3")
+        store = SQLiteJobStore(path)
+        queued, running = new_job({"score": 1}), new_job({"score": 2})
+        store.add(queued)
+        store.add(running)
+        store.update(running["id"], status="running")
+
+        # A new process picks both up again
+        queue = JobQueue(SQLiteJobStore(path), double_score)
+
+        async def resume():
+            await queue.start()
+            await queue._queue.join()
+            await queue.stop()
+
+        asyncio.run(resume())
+        assert queue.get(queued["id"])["result"] == {"score": 2}
+        assert queue.get(running["id"])["result"] == {"score": 4}
+        assert queue.store.counts()["done"] == 2
+
+
+def test_workers_sharing_a_store_claim_each_job_once():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jobs.sqlite3")
+        first, second = SQLiteJobStore(path), SQLiteJobStore(path)
+        job = new_job({"score": 1})
+        first.add(job)
+        assert first.claim(job["id"], "first", lease_seconds=60)
+        assert not second.claim(job["id"], "second", lease_seconds=60)
+        assert not second.renew(job["id"], "second", lease_seconds=60)
+        assert first.renew(job["id"], "first", lease_seconds=0)
+        # The lease ran out - its worker is gone, so another may take the job over
+        assert second.pending_ids(time.time() + 1, queued_before=0) == [job["id"]]
+        assert second.claim(job["id"], "second", lease_seconds=60)
+        assert not first.renew(job["id"], "first", lease_seconds=60)
+
+
+def test_a_queue_started_later_leaves_running_jobs_alone():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jobs.sqlite3")
+        runs = []
+
+        async def slow_score(lead):
+            runs.append(lead)
+            await asyncio.sleep(0.5)
+            return {"score": lead["score"]}
+
+        async def run_two_workers():
+            first = JobQueue(SQLiteJobStore(path), slow_score, lease_seconds=0.2)
+            await first.start()
+            job = first.submit({"score": 1})
+            await asyncio.sleep(0.1)
+            # A second worker starts (or restarts) while the job is running
+            second = JobQueue(SQLiteJobStore(path), slow_score, lease_seconds=0.2)
+            await second.start()
+            await first._queue.join()
+            await asyncio.sleep(0.3)
+            await first.stop()
+            await second.stop()
+            return first.get(job["id"])
+
+        job = asyncio.run(run_two_workers())
+        assert job["status"] == "done" and len(runs) == 1
+
+
+def test_queued_jobs_of_a_dead_worker_are_taken_over():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jobs.sqlite3")
+
+        async def take_over():
+            queue = JobQueue(SQLiteJobStore(path), double_score, lease_seconds=0.1)
+            await queue.start()
+            # Queued by a worker that died before it got to the job
+            job = new_job({"score": 1})
+            SQLiteJobStore(path).add(job)
+            deadline = time.monotonic() + 5
+            while queue.get(job["id"])["status"] != "done" and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            await queue.stop()
+            return queue.get(job["id"])
+
+        assert asyncio.run(take_over())["result"] == {"score": 2}
+
+
+def test_submissions_past_max_queued_are_refused():
+    async def fill_up():
+        queue = JobQueue(MemoryJobStore(), double_score, max_queued=2)
+        await queue.start()
+        queue.submit({"score": 1})
+        queue.submit({"score": 2})
+        try:
+            queue.submit({"score": 3})
+        except JobQueueFull:
+            refused = True
+        else:
+            refused = False
+        # Once the workers drain the queue there is room again
+        await queue._queue.join()
+        queue.submit({"score": 4})
+        await queue._queue.join()
+        await queue.stop()
+        return refused, queue.store.counts()
+
+    refused, counts = asyncio.run(fill_up())
+    assert refused
+    assert (counts["queued"], counts["done"]) == (0, 3)
+
+
+def test_finished_jobs_are_bounded():
+    store = MemoryJobStore(max_jobs=2)
+    jobs = [new_job({"score": index}) for index in range(3)]
+    store.add(jobs[0])
+    store.update(jobs[0]["id"], status="done")
+    store.add(jobs[1])
+    store.add(jobs[2])
+    assert store.get(jobs[0]["id"]) is None
+    assert store.counts()["queued"] == 2
+
+
+if __name__ == "__main__":
+    test_jobs_complete_and_fail()
+    test_sqlite_store_resumes_interrupted_jobs()
+    test_workers_sharing_a_store_claim_each_job_once()
+    test_a_queue_started_later_leaves_running_jobs_alone()
+    test_queued_jobs_of_a_dead_worker_are_taken_over()
+    test_submissions_past_max_queued_are_refused()
+    test_finished_jobs_are_bounded()
+    print("All job queue checks passed")
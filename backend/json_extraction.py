@@ -0,0 +1,138 @@
+import bisect
+import json
+import re
+from typing import Dict, NamedTuple, Tuple
+
+# Characters that matter to the brace scan - everything else is skipped by
+# the regex engine instead of a Python loop
+STRUCTURAL = re.compile(r'[{}"\\\n]')
+FENCE = '```'
+
+# Outer objects that fail to decode are retried through their nested objects,
+# but only this many levels deep - it keeps the total decoding work linear
+MAX_NESTING = 8
+
+NUMBER = (int, float)
+
+
+class ObjectSchema(NamedTuple):
+    """Expected shape of a JSON object in LLM output. A candidate matches when
+    it has every required field, at least one known field, and every known
+    field present has one of its allowed types"""
+    fields: Dict[str, Tuple[type, ...]]
+    required: Tuple[str, ...] = ()
+
+    def matches(self, candidate):
+        if not isinstance(candidate, dict):
+            return False
+        if any(field not in candidate for field in self.required):
+            return False
+        present = [field for field in self.fields if field in candidate]
+        if not present:
+            return False
+        for field in present:
+            value = candidate[field]
+            # bool is an int subclass, but never a valid score
+            if isinstance(value, bool) and bool not in self.fields[field]:
+                return False
+            if not isinstance(value, self.fields[field]):
+                return False
+        return True
+
+
+ANALYSIS_SCHEMA = ObjectSchema({"score": NUMBER, "category": (str,), "reason": (str,), "action": (str,)})
+SCORE_SCHEMA = ObjectSchema({"score": NUMBER}, required=("score",))
+RESEARCH_SCHEMA = ObjectSchema({
+    "company_size": (str,),
+    "industry": (str,),
+    "potential_value": (str,),
+    "key_insight": (str,)
+})
+
+
+def _brace_pairs(text):
+    """(start, end, depth) of every balanced {...} in text, outermost first.
+
+    Quotes only open a string inside braces, so apostrophes and quotes in the
+    surrounding prose are ignored, and a string never runs past a newline
+    (JSON strings can't contain one), so a stray quote can't swallow the rest
+    of the output."""
+    pairs = []
+    open_braces = []
+    in_string = False
+    escaped_at = -1
+    for match in STRUCTURAL.finditer(text):
+        char = match.group()
+        position = match.start()
+        if in_string:
+            if position == escaped_at:
+                continue
+            if char == '\\':
+                escaped_at = position + 1
+            elif char == '"' or char == '\n':
+                in_string = False
+        elif char == '{':
+            open_braces.append(position)
+        elif char == '}':
+            if open_braces:
+                start = open_braces.pop()
+                pairs.append((start, position + 1, len(open_braces)))
+        elif char == '"' and open_braces:
+            in_string = True
+    pairs.sort()
+    return pairs
+
+
+def _fenced_spans(text):
+    """(start, end) of every ``` fenced block - an unclosed fence runs to the end"""
+    spans = []
+    position = text.find(FENCE)
+    while position != -1:
+        close = text.find(FENCE, position + len(FENCE))
+        if close == -1:
+            spans.append((position, len(text)))
+            break
+        spans.append((position, close))
+        position = text.find(FENCE, close + len(FENCE))
+    return spans
+
+
+def extract_json_objects(text):
+    """Every JSON object in text - objects inside ``` fenced blocks first, then
+    the rest in order of appearance. Objects nested in one already found are
+    not reported separately."""
+    if not text:
+        return []
+    decoder = json.JSONDecoder()
+    found = []
+    decoded_until = -1
+    for start, end, depth in _brace_pairs(text):
+        if start < decoded_until or depth > MAX_NESTING:
+            continue
+        try:
+            candidate, _ = decoder.raw_decode(text[start:end])
+        except (ValueError, RecursionError):
+            continue
+        found.append((start, candidate))
+        decoded_until = end
+
+    fences = _fenced_spans(text)
+    if not fences:
+        return [candidate for _, candidate in found]
+
+    fence_starts = [fence_start for fence_start, _ in fences]
+
+    def in_fence(start):
+        index = bisect.bisect_right(fence_starts, start) - 1
+        return index >= 0 and start < fences[index][1]
+
+    # Stable sort - fenced objects first, each group in order of appearance
+    return [candidate for _, candidate in sorted(found, key=lambda item: not in_fence(item[0]))]
+
+
+def find_json_object(text, schema=None):
+    """The first JSON object in text that matches schema (any object without one), or None"""
+    for candidate in extract_json_objects(text):
+        if schema is None or schema.matches(candidate):
+            return candidate
+    return None
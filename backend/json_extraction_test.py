@@ -0,0 +1,115 @@
+import json
+import random
+import re
+import time
+from json_extraction import (
+    extract_json_objects, find_json_object, ANALYSIS_SCHEMA, RESEARCH_SCHEMA, SCORE_SCHEMA
+)
+
+# The nested-brace regex the crew result parsing used before
+LEGACY_JSON_PATTERN = r'\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\}))*\}))*\}'
+
+AGENT_OUTPUTS = [
+    '{"score": 8, "category": "HOT", "reason": "CTO with budget"}',
+    'Thought: I now know the final answer\nFinal Answer: {"score": 6, "category": "WARM", "reason": "Needs nurturing"}',
+    'Here is my analysis:\n{\n  "score": 3,\n  "category": "COLD",\n  "reason": "Free email, no budget"\n}\nLet me know!',
+    '{"company_size": "Large", "industry": "Fintech", "potential_value": "High", "key_insight": "Series B {growth}"}',
+    '{"score": 7, "details": {"intent": {"budget": true}}, "category": "WARM", "reason": "ok"}',
+]
+
+
+def test_parity_with_legacy_regex():
+    for output in AGENT_OUTPUTS:
+        assert extract_json_objects(output)[0] == json.loads(re.search(LEGACY_JSON_PATTERN, output).group(0))
+
+
+def test_fenced_blocks_come_first():
+    output = (
+        'The template is {"score": <number>} so here goes.\n'
+        'Draft: {"score": 2}\n'
+        '```json\n{"score": 9, "category": "HOT", "reason": "fenced"}\n```\n'
+    )
+    assert [candidate["score"] for candidate in extract_json_objects(output)] == [9, 2]
+    assert find_json_object(output, ANALYSIS_SCHEMA)["reason"] == "fenced"
+
+
+def test_recovers_objects_around_noise():
+    output = 'It\'s a "quoted {" aside.\n{not json {"score": 5, "reason": "a } in \\"quotes\\""}} tail {'
+    assert extract_json_objects(output) == [{"score": 5, "reason": 'a } in "quotes"'}]
+    # A quote left open inside braces stops at the end of its line
+    assert extract_json_objects('{"broken: 1\n{"score": 4}') == [{"score": 4}]
+    # Deeper than the old regex could follow
+    deep = {"score": 7, "a": {"b": {"c": {"d": {"e": 1}}}}}
+    assert extract_json_objects(f"Result: {json.dumps(deep)}") == [deep]
+
+
+def test_schema_validation():
+    output = '{"foo": 1} {"score": true} {"score": "high"} {"score": 7} {"industry": "Retail"}'
+    assert find_json_object(output, SCORE_SCHEMA) == {"score": 7}
+    assert find_json_object(output, RESEARCH_SCHEMA) == {"industry": "Retail"}
+    assert find_json_object(output) == {"foo": 1}
+    assert find_json_object("no json here", ANALYSIS_SCHEMA) is None
+
+
+def test_random_objects_in_prose():
+    rng = random.Random(11)
+    words = ["lead", "score", "{", "}", '"', "it's", "```", "\\", "budget", "\n", ":", ","]
+    for _ in range(500):
+        expected = {"score": rng.randint(0, 10), "reason": " ".join(rng.choice(words) for _ in range(5))}
+        prose = " ".join(rng.choice(words[4:] + ["ok"]) for _ in range(rng.randint(0, 20))).replace("\\", "")
+        output = f"{prose}\nFinal Answer: {json.dumps(expected)}\n"
+        assert find_json_object(output, SCORE_SCHEMA) == expected, output
+
+
+ADVERSARIAL_INPUTS = {
+    "open braces": lambda n: "{" * n,
+    "close braces": lambda n: "}" * n,
+    "unterminated nesting": lambda n: '{"a":' * (n // 5),
+    "nested invalid tail": lambda n: '{"a":' * (n // 10) + "x" + "}" * (n // 10),
+    "brace soup": lambda n: "".join(random.Random(n).choices('{}":,\\[] a\n', k=n)),
+    "many small objects": lambda n: '{"a": 1} ' * (n // 9),
+    "many fences": lambda n: '```{"score": 1}' * (n // 15),
+    "backslashes in string": lambda n: '{"a": "' + "\\" * n,
+}
+
+
+def worst_case_seconds(build, size):
+    text = build(size)
+    start = time.perf_counter()
+    extract_json_objects(text)
+    return time.perf_counter() - start
+
+
+def test_adversarial_inputs_scale_linearly():
+    for name, build in ADVERSARIAL_INPUTS.items():
+        small = min(worst_case_seconds(build, 25000) for _ in range(3))
+        large = min(worst_case_seconds(build, 200000) for _ in range(3))
+        # 8x the input; quadratic behaviour would be ~64x
+        assert large < max(small, 0.001) * 20, (name, small, large)
+        assert large < 2.0, (name, large)
+
+
+def benchmark():
+    """Worst-case timings for the old regex and the new extractor"""
+    for name, build in ADVERSARIAL_INPUTS.items():
+        text = build(20000)
+        start = time.perf_counter()
+        re.search(LEGACY_JSON_PATTERN, text)
+        legacy = time.perf_counter() - start
+        start = time.perf_counter()
+        extract_json_objects(text)
+        extracted = time.perf_counter() - start
+        print(f"{name:>24}: regex {legacy * 1000:9.2f} ms, extractor {extracted * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    test_parity_with_legacy_regex()
+    test_fenced_blocks_come_first()
+    test_recovers_objects_around_noise()
+    test_schema_validation()
+    test_random_objects_in_prose()
+    test_adversarial_inputs_scale_linearly()
+    print("All extraction checks passed")
+
+    print("\n=== JSON Extraction Worst Case (20k chars) ===")
+    benchmark()
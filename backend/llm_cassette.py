@@ -0,0 +1,165 @@
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from crewai import LLM
+from litellm.types.utils import Usage
+
+# record: call the model and store every completion
+# replay: serve stored completions only - no network
+# auto: replay what is stored, record the rest
+CASSETTE_MODES = ("record", "replay", "auto")
+
+
+class CassetteMissError(LookupError):
+    """Replay found no recorded completion for a prompt"""
+
+
+def cassette_key(model, messages, stop=None, tools=None):
+    """16-byte digest of everything that decides the completion"""
+    payload = json.dumps({"model": model, "messages": messages, "stop": stop, "tools": tools},
+                         sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+def call_with_stop(llm, stop, messages, tools=None, callbacks=None, available_functions=None):
+    """llm.call with the stop words of this call. CrewAI's own LLM reads them
+    from the instance, which every agent and thread shares - so the call goes
+    to a copy holding them. The wrappers here take them as an argument"""
+    if type(llm).call is LLM.call:
+        llm = copy.copy(llm)
+        llm.stop = stop
+        return llm.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+    return llm.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions, stop=stop)
+
+
+def report_token_usage(callbacks, prompt_tokens, completion_tokens):
+    """Feed token counts to CrewAI's token counter the way LiteLLM would after a real call"""
+    usage = Usage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    for callback in callbacks or ():
+        if hasattr(callback, "log_success_event"):
+            callback.log_success_event({}, {"usage": usage}, None, None)
+
+
+def token_totals(callbacks):
+    """Prompt and completion tokens counted so far by CrewAI's token counters"""
+    prompt_tokens = completion_tokens = 0
+    for callback in callbacks or ():
+        process = getattr(callback, "token_cost_process", None)
+        if process is not None:
+            summary = process.get_summary()
+            prompt_tokens += summary.prompt_tokens
+            completion_tokens += summary.completion_tokens
+    return prompt_tokens, completion_tokens
+
+
+class CassetteStore:
+    """Prompt -> completion pairs in SQLite. Prompts are kept only as their
+    cassette_key and completions are zlib-compressed, so a cassette stays small"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_completions ("
+            "key BLOB PRIMARY KEY, completion BLOB NOT NULL, "
+            "prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL, "
+            "recorded_at REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def get(self, key):
+        """(completion, prompt_tokens, completion_tokens), or None when not recorded"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion, prompt_tokens, completion_tokens FROM llm_completions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8'), row[1], row[2]
+
+    def put(self, key, completion, prompt_tokens=0, completion_tokens=0):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_completions "
+                "(key, completion, prompt_tokens, completion_tokens, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (key, zlib.compress(completion.encode('utf-8'), 9), prompt_tokens, completion_tokens, time.time())
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_completions").fetchone()[0]
+
+
+class CassetteLLM(LLM):
+    """Records the completions of an inner LLM, or replays them without it"""
+
+    def __init__(self, store, mode="replay", inner=None, **kwargs):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' - expected one of {', '.join(CASSETTE_MODES)}")
+        if inner is None and mode != "replay":
+            raise ValueError(f"Cassette mode '{mode}' needs an LLM to record from")
+        if inner is not None and not isinstance(inner, LLM):
+            # e.g. a LangChain OpenAI model - converted the same way CrewAI agents do
+            from crewai.utilities.llm_utils import create_llm
+            inner = create_llm(inner)
+        super().__init__(model=kwargs.pop("model", None) or inner.model, **kwargs)
+        self.model_name = self.model
+        self.store = store
+        self.mode = mode
+        self.inner = inner
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def supports_function_calling(self):
+        return self.inner.supports_function_calling() if self.inner is not None else False
+
+    def supports_stop_words(self):
+        return self.inner.supports_stop_words() if self.inner is not None else True
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, stop=None):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        # CrewAI sets the agents' stop words on the LLM it was given
+        stop = self.stop if stop is None else stop
+        key = cassette_key(self.model, messages, stop=stop, tools=tools)
+
+        if self.mode != "record":
+            entry = self.store.get(key)
+            if entry is not None:
+                completion, prompt_tokens, completion_tokens = entry
+                with self._lock:
+                    self.hits += 1
+                report_token_usage(callbacks, prompt_tokens, completion_tokens)
+                return completion
+            if self.mode == "replay":
+                with self._lock:
+                    self.misses += 1
+                raise CassetteMissError(
+                    f"No recorded {self.model} completion for this prompt in {self.store.path} - "
+                    "record it with LLM_CASSETTE_MODE=record or auto"
+                )
+
+        before = token_totals(callbacks)
+        completion = call_with_stop(self.inner, stop, messages, tools, callbacks, available_functions)
+        after = token_totals(callbacks)
+        self.store.put(key, completion, after[0] - before[0], after[1] - before[1])
+        with self._lock:
+            self.recorded += 1
+        return completion
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "path": self.store.path,
+            "size": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
@@ -0,0 +1,65 @@
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["CREW_VERBOSE"] = "false"
+
+import contextvars
+import pytest
+import app
+import metrics
+from llm_cassette import CassetteLLM, CassetteMissError, CassetteStore
+from stub_llm import StubLLM
+
+LEAD = {
+    "name": "Michael Rodriguez",
+    "email": "m.rodriguez@midmarket.co",
+    "phone": "+1-332-555-7890",
+    "company": "Midmarket Enterprises",
+    "message": "We're looking to improve our lead qualification process. Could you provide some pricing information?",
+}
+
+
+def analyze(llm, lead):
+    """analyze_lead on a fresh system, with the token usage of its crew span"""
+    def run():
+        trace = metrics.start_trace()
+        system = app.LeadQualificationSystem(llm=llm, process_mode="sequential")
+        system.result_cache = None
+        result = system.analyze_lead(lead, check_cache=False)
+        crew_span = next(span for span in trace.spans if span["stage"] == "crew")
+        return result, (crew_span["prompt_tokens"], crew_span["completion_tokens"])
+    return contextvars.copy_context().run(run)
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "cassette.sqlite3")
+    stub = StubLLM(analysis={"score": 6, "category": "WARM", "reason": "Recorded"})
+    recorder = CassetteLLM(CassetteStore(path), "record", inner=stub, model="gpt-3.5-turbo-instruct")
+    recorded, recorded_tokens = analyze(recorder, LEAD)
+    assert recorder.recorded == stub.calls == 2
+    assert recorded_tokens[0] > 0
+
+    # Replay needs no inner LLM and reproduces the result and token usage
+    player = CassetteLLM(CassetteStore(path), "replay", model="gpt-3.5-turbo-instruct")
+    replayed, replayed_tokens = analyze(player, LEAD)
+    assert replayed == recorded
+    assert replayed_tokens == recorded_tokens
+    assert player.stats()["hits"] == 2 and player.stats()["size"] == 2
+
+
+def test_replay_miss_and_auto(tmp_path):
+    store = CassetteStore(str(tmp_path / "cassette.sqlite3"))
+    player = CassetteLLM(store, "replay", model="gpt-3.5-turbo-instruct")
+    with pytest.raises(CassetteMissError):
+        player.call("Never recorded")
+
+    stub = StubLLM()
+    auto = CassetteLLM(store, "auto", inner=stub, model="gpt-3.5-turbo-instruct")
+    first = auto.call("Score this lead")
+    assert auto.call("Score this lead") == first
+    assert stub.calls == 1 and auto.hits == 1 and auto.recorded == 1
+    assert player.call("Score this lead") == first
+
+    with pytest.raises(ValueError):
+        CassetteLLM(store, "record", model="gpt-3.5-turbo-instruct")
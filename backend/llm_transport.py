@@ -0,0 +1,182 @@
+import threading
+import time
+import httpx
+from crewai import LLM
+from llm_cassette import call_with_stop, cassette_key, report_token_usage, token_totals
+
+# What OpenAI reserves for the completion when max_tokens isn't set
+DEFAULT_COMPLETION_TOKENS = 256
+
+_http_pool = None
+_http_pool_lock = threading.Lock()
+
+
+def configure_http_pool(max_connections, keepalive_seconds=60.0, timeout_seconds=60.0):
+    """Share one keep-alive connection pool between all OpenAI calls. LiteLLM
+    otherwise builds a fresh HTTP client - and a fresh TLS connection - per call"""
+    global _http_pool
+    import litellm
+    with _http_pool_lock:
+        if _http_pool is None:
+            _http_pool = httpx.Client(
+                timeout=timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=keepalive_seconds
+                )
+            )
+            litellm.client_session = _http_pool
+    return _http_pool
+
+
+def close_http_pool():
+    global _http_pool
+    with _http_pool_lock:
+        if _http_pool is not None:
+            import litellm
+            litellm.client_session = None
+            _http_pool.close()
+            _http_pool = None
+
+
+class TokenBucket:
+    """Refills at rate_per_second up to capacity; acquire blocks until enough is available"""
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._available = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def reserve(self, amount):
+        """Take amount now and return how long to wait before using it - the
+        balance may go negative, so later callers queue up behind this one"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available -= amount
+            return max(0.0, -self._available / self.rate_per_second)
+
+    def acquire(self, amount=1):
+        wait = self.reserve(amount)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """Client-side requests- and tokens-per-minute limits, as OpenAI enforces them.
+    A limit of 0 is unlimited"""
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        wait = max(
+            self.requests.reserve(1) if self.requests else 0.0,
+            self.tokens.reserve(tokens) if self.tokens else 0.0
+        )
+        if wait:
+            with self._lock:
+                self.waited_seconds += wait
+            time.sleep(wait)
+        return wait
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # (prompt, completion) tokens the leader's call counted
+        self.usage = (0, 0)
+
+
+class ThrottledLLM(LLM):
+    """Rate limits the calls of an inner LLM and coalesces identical prompts that
+    are in flight at the same time - the duplicates wait for the first call's
+    answer, and report its token usage to their own callbacks"""
+
+    def __init__(self, inner, rate_limiter=None, coalesce=True, **kwargs):
+        if not isinstance(inner, LLM):
+            # e.g. a LangChain OpenAI model - converted the same way CrewAI agents do
+            from crewai.utilities.llm_utils import create_llm
+            inner = create_llm(inner)
+        super().__init__(model=kwargs.pop("model", None) or inner.model, **kwargs)
+        self.model_name = self.model
+        self.inner = inner
+        self.rate_limiter = rate_limiter
+        self.coalesce = coalesce
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def supports_function_calling(self):
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self):
+        return self.inner.supports_stop_words()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, stop=None):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        # CrewAI sets the agents' stop words on the LLM it was given
+        stop = self.stop if stop is None else stop
+        if not self.coalesce:
+            return self._call_inner(messages, tools, callbacks, available_functions, stop)
+
+        key = cassette_key(self.model, messages, stop=stop, tools=tools)
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            report_token_usage(callbacks, *in_flight.usage)
+            return in_flight.result
+
+        try:
+            before = token_totals(callbacks)
+            in_flight.result = self._call_inner(messages, tools, callbacks, available_functions, stop)
+            after = token_totals(callbacks)
+            in_flight.usage = (after[0] - before[0], after[1] - before[1])
+            return in_flight.result
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    def _call_inner(self, messages, tools, callbacks, available_functions, stop):
+        if self.rate_limiter is not None:
+            # OpenAI counts the prompt plus the completion it may produce against the limit
+            prompt_tokens = sum(len(str(message.get("content", ""))) for message in messages) // 4
+            self.rate_limiter.acquire(prompt_tokens + (self.inner.max_tokens or DEFAULT_COMPLETION_TOKENS))
+        with self._lock:
+            self.calls += 1
+        return call_with_stop(self.inner, stop, messages, tools, callbacks, available_functions)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "rate_limit_wait_seconds": round(self.rate_limiter.waited_seconds, 3) if self.rate_limiter else 0.0,
+        }
@@ -0,0 +1,110 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import litellm
+import pytest
+from crewai import LLM
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+from crewai.utilities.token_counter_callback import TokenCalcHandler
+from llm_transport import RateLimiter, ThrottledLLM, TokenBucket, close_http_pool, configure_http_pool
+from stub_llm import StubLLM
+
+
+class FailingLLM(StubLLM):
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, stop=None):
+        super().call(messages, tools, callbacks, available_functions, stop)
+        raise RuntimeError("upstream down")
+
+
+def test_token_bucket_limits_the_rate():
+    bucket = TokenBucket(rate_per_second=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire()
+    # The burst of 5 is free, the other 5 wait for the refill
+    assert 0.08 < time.monotonic() - start < 0.5
+
+
+def test_rate_limiter_counts_tokens():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=6000)
+    assert limiter.acquire(6000) == 0.0
+    # 100 tokens refill per second
+    assert limiter.acquire(10) == pytest.approx(0.1, abs=0.05)
+
+
+def test_identical_prompts_in_flight_are_coalesced():
+    stub = StubLLM(latency_seconds=0.2)
+    llm = ThrottledLLM(stub, rate_limiter=RateLimiter(0, 0))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        answers = list(executor.map(lambda prompt: llm.call(prompt), ["Score this lead"] * 6 + ["Another lead"] * 2))
+    assert stub.calls == 2
+    assert llm.stats()["coalesced"] == 6 and llm.stats()["in_flight"] == 0
+    assert len(set(answers)) == 1
+
+    # Once answered, the same prompt goes upstream again
+    llm.call("Score this lead")
+    assert stub.calls == 3
+
+
+def test_coalesced_callers_count_the_tokens_they_were_answered_with():
+    stub = StubLLM(latency_seconds=0.2)
+    llm = ThrottledLLM(stub)
+    # Each caller is a different agent with its own token counter
+    counters = [TokenProcess() for _ in range(3)]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda counter: llm.call("Score this lead", callbacks=[TokenCalcHandler(counter)]), counters))
+    assert stub.calls == 1
+    summaries = [counter.get_summary() for counter in counters]
+    assert summaries[0].prompt_tokens > 0 and summaries[0].completion_tokens > 0
+    assert len({(summary.prompt_tokens, summary.completion_tokens) for summary in summaries}) == 1
+
+
+def test_coalesced_callers_share_the_error():
+    failing = FailingLLM(latency_seconds=0.1)
+    llm = ThrottledLLM(failing)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(llm.call, "Score this lead") for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="upstream down"):
+            future.result()
+    assert failing.calls == 1
+
+
+def test_stop_words_travel_with_each_call(monkeypatch):
+    stub = StubLLM()
+    first, second = ThrottledLLM(stub, coalesce=False), ThrottledLLM(stub, coalesce=False)
+    first.stop, second.stop = ["\nObservation:"], ["\nResult:"]
+    first.call("Score this lead")
+    assert stub.last_stop == ["\nObservation:"]
+    second.call("Score this lead")
+    assert stub.last_stop == ["\nResult:"]
+    # The LLM both wrappers share is left as it was
+    assert stub.stop == []
+
+    # CrewAI's own LLM reads them from the instance - a copy is called instead
+    sent = []
+    monkeypatch.setattr(litellm, "completion", lambda **params: sent.append(params["stop"]) or litellm.ModelResponse())
+    inner = LLM(model="gpt-3.5-turbo")
+    throttled = ThrottledLLM(inner, coalesce=False)
+    throttled.stop = ["\nObservation:"]
+    throttled.call("Score this lead")
+    assert sent == [["\nObservation:"]] and inner.stop == []
+
+
+def test_http_pool_is_shared_with_litellm():
+    try:
+        pool = configure_http_pool(max_connections=3)
+        assert litellm.client_session is pool
+        assert configure_http_pool(max_connections=10) is pool
+    finally:
+        close_http_pool()
+    assert litellm.client_session is None
+
+
+if __name__ == "__main__":
+    test_token_bucket_limits_the_rate()
+    test_rate_limiter_counts_tokens()
+    test_identical_prompts_in_flight_are_coalesced()
+    test_coalesced_callers_count_the_tokens_they_were_answered_with()
+    test_coalesced_callers_share_the_error()
+    test_http_pool_is_shared_with_litellm()
+    print("All LLM transport checks passed")
@@ -0,0 +1,280 @@
+import contextvars
+import copy
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds - rule scoring and parsing land in the sub-millisecond
+# buckets, LLM calls in the upper ones
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class for metrics rendered in the Prometheus text format"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        """The current values as JSON-friendly [labels, value] pairs"""
+        with self._lock:
+            return [[[list(label) for label in key], copy.deepcopy(value)]
+                    for key, value in self._values.items()]
+
+    def render(self, snapshots=()):
+        """Prometheus lines for this process's values plus those of other processes' snapshots"""
+        with self._lock:
+            values = {key: copy.deepcopy(value) for key, value in self._values.items()}
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(tuple(label) for label in key)
+                values[key] = self._merge(values[key], value) if key in values else value
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(values.items()):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _merge(self, value, other):
+        return value + other
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (not cumulative) plus the +Inf bucket, sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def _merge(self, state, other):
+        return [[count + more for count, more in zip(state[0], other[0])], state[1] + other[1]]
+
+    def _render_sample(self, key, state):
+        counts, total = state
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = key + (("le", _format_value(float(bound))),)
+            lines.append(f"{self.name}_bucket{_format_labels(labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def render(self, snapshots=()):
+        """Prometheus text - with snapshots from other processes summed in"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render([snapshot.get(metric.name, []) for snapshot in snapshots]))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def write_snapshot(directory, registry=REGISTRY):
+    """Publish this process's metrics for the other workers' /metrics. Written
+    to a temporary file and renamed, so readers never see half a snapshot"""
+    path = _snapshot_path(directory, os.getpid())
+    with open(path + ".tmp", "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(path + ".tmp", path)
+
+
+def clear_snapshots(directory):
+    """Delete the snapshots (and half-written .tmp files) workers left in
+    directory - nothing else there is touched"""
+    for name in os.listdir(directory):
+        if name.startswith("metrics-") and (name.endswith(".json") or name.endswith(".json.tmp")):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def render_all(directory, registry=REGISTRY):
+    """Prometheus text summed over every worker process - this process's live
+    values plus the latest snapshot each other worker wrote to directory"""
+    own = os.path.basename(_snapshot_path(directory, os.getpid()))
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("metrics-") and name.endswith(".json")) or name == own:
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return registry.render(snapshots)
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "lead_stage_duration_seconds", "Time spent in each qualification stage - agent stages include their LLM calls",
+    ("stage",)
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "lead_request_duration_seconds", "End-to-end qualification time by the path that decided the result", ("path",)
+))
+QUALIFICATIONS = REGISTRY.register(Counter(
+    "lead_qualifications_total", "Qualified leads by the path that decided the result", ("path",)
+))
+CREW_FALLBACKS = REGISTRY.register(Counter(
+    "lead_crew_fallbacks_total", "Crew analyses that fell back to direct scoring", ("reason",)
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "lead_llm_tokens_total", "LLM tokens used by crew runs", ("kind",)
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "lead_cache_lookups_total", "Result cache lookups before the crew runs", ("result",)
+))
+COMPANY_PROFILE_LOOKUPS = REGISTRY.register(Counter(
+    "lead_company_profile_lookups_total", "Company profile lookups before the Market Researcher runs", ("result",)
+))
+
+
+class Trace:
+    """Timing spans of one qualification, in the order they finished"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.attributes = {}
+
+    def to_dict(self, path):
+        return {
+            "path": path,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans": self.spans,
+            **self.attributes
+        }
+
+
+_current_trace = contextvars.ContextVar("lead_trace", default=None)
+
+
+def start_trace():
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def annotate(**attributes):
+    """Attach attributes (e.g. the crew fallback reason) to the current trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def record_span(stage, seconds, **attributes):
+    """Record an already measured duration - observed in the stage histogram and added to the current trace"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append({"stage": stage, "duration_ms": round(seconds * 1000, 3), **attributes})
+
+
+@contextmanager
+def span(stage):
+    """Time a block as one stage. Yields a dict whose entries are stored with the span"""
+    attributes = {}
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        record_span(stage, time.perf_counter() - start, **attributes)
+
+
+def timed(stage):
+    """Decorator form of span"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def finish_trace(path, log=False):
+    """Close the current trace - counts the qualification under its path and
+    optionally prints the spans as one JSON line"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    _current_trace.set(None)
+    elapsed = time.perf_counter() - trace.started
+    REQUEST_SECONDS.observe(elapsed, path=path)
+    QUALIFICATIONS.inc(path=path)
+    if log:
+        print(json.dumps({"trace": trace.to_dict(path)}))
+    return trace
@@ -0,0 +1,92 @@
+import contextvars
+import json
+import os
+import tempfile
+import metrics
+from metrics import Counter, Histogram, Registry
+
+
+def test_prometheus_text_format():
+    registry = Registry()
+    latency = registry.register(Histogram("test_seconds", "Test latency", ("stage",), buckets=(0.1, 1)))
+    calls = registry.register(Counter("test_calls_total", "Test calls", ("path",)))
+    latency.observe(0.05, stage="parse")
+    latency.observe(0.5, stage="parse")
+    latency.observe(5, stage="parse")
+    calls.inc(path='say "hi"')
+    assert registry.render().splitlines() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="parse",le="0.1"} 1',
+        'test_seconds_bucket{stage="parse",le="1.0"} 2',
+        'test_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'test_seconds_sum{stage="parse"} 5.55',
+        'test_seconds_count{stage="parse"} 3',
+        "# HELP test_calls_total Test calls",
+        "# TYPE test_calls_total counter",
+        'test_calls_total{path="say \\"hi\\""} 1',
+    ]
+
+
+def test_worker_snapshots_are_summed():
+    def worker_registry():
+        registry = Registry()
+        registry.register(Histogram("test_seconds", "Test latency", (), buckets=(1,)))
+        registry.register(Counter("test_calls_total", "Test calls", ("path",)))
+        return registry
+
+    this_worker, other_worker = worker_registry(), worker_registry()
+    this_worker._metrics[0].observe(0.5)
+    this_worker._metrics[1].inc(path="crew")
+    other_worker._metrics[0].observe(2)
+    other_worker._metrics[1].inc(2, path="crew")
+    other_worker._metrics[1].inc(path="rules")
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "metrics-1.json"), "w") as f:
+            json.dump(other_worker.snapshot(), f)
+        lines = metrics.render_all(directory, this_worker).splitlines()
+    assert 'test_seconds_bucket{le="1.0"} 1' in lines
+    assert 'test_seconds_count 2' in lines
+    assert 'test_seconds_sum 2.5' in lines
+    assert 'test_calls_total{path="crew"} 3' in lines
+    assert 'test_calls_total{path="rules"} 1' in lines
+
+
+def test_clearing_snapshots_keeps_other_files():
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("metrics-1.json", "metrics-2.json.tmp", "notes.txt"):
+            open(os.path.join(directory, name), "w").close()
+        metrics.clear_snapshots(directory)
+        assert os.listdir(directory) == ["notes.txt"]
+
+
+def test_trace_collects_spans_across_threads():
+    def run():
+        trace = metrics.start_trace()
+        with metrics.span("crew") as crew_span:
+            # Work handed to another thread runs in a copy of this context
+            contextvars.copy_context().run(metrics.record_span, "agent:Lead Analyzer", 0.25)
+            crew_span["prompt_tokens"] = 12
+        metrics.annotate(crew_fallback="timeout")
+        finished = metrics.finish_trace("direct")
+        assert finished is trace
+        assert metrics.current_trace() is None
+        return trace.to_dict("direct")
+
+    before = dict(metrics.QUALIFICATIONS._values)
+    trace = contextvars.copy_context().run(run)
+    assert [span["stage"] for span in trace["spans"]] == ["agent:Lead Analyzer", "crew"]
+    assert trace["spans"][0]["duration_ms"] == 250.0
+    assert trace["spans"][1]["prompt_tokens"] == 12
+    assert trace["crew_fallback"] == "timeout"
+    key = (("path", "direct"),)
+    assert metrics.QUALIFICATIONS._values[key] == before.get(key, 0) + 1
+
+
+if __name__ == "__main__":
+    test_prometheus_text_format()
+    test_worker_snapshots_are_summed()
+    test_clearing_snapshots_keeps_other_files()
+    test_trace_collects_spans_across_threads()
+    print("All metrics checks passed")
@@ -0,0 +1,230 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from result_cache import normalize_lead
+
+# Universal hashing modulo a Mersenne prime, truncated to 32-bit signature values
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+SHINGLE_BYTES = 5
+# Text past this is not shingled - edits that far into a message don't make it a new lead
+MAX_TEXT_BYTES = 4096
+# Fixed, so signatures persisted by one process match those of every other
+MINHASH_SEED = 20240501
+
+
+def lead_text(lead_info):
+    """The sender (normalized email) and the text compared between its leads"""
+    lead = normalize_lead(lead_info)
+    text = "\n".join(lead[field] for field in ('name', 'phone', 'company', 'message')).lower()
+    return lead['email'], text
+
+
+def shingle_values(text):
+    """Distinct byte 5-grams of text, each packed into an integer"""
+    data = np.frombuffer(text.encode('utf-8')[:MAX_TEXT_BYTES], dtype=np.uint8).astype(np.uint64)
+    count = len(data) - SHINGLE_BYTES + 1
+    if count < 1:
+        return np.array([int.from_bytes(data.astype(np.uint8).tobytes() or b'\0', 'big')], dtype=np.uint64)
+    values = np.zeros(count, dtype=np.uint64)
+    for offset in range(SHINGLE_BYTES):
+        values = (values << np.uint64(8)) | data[offset:offset + count]
+    return np.unique(values)
+
+
+def _mix(values):
+    """splitmix64 finalizer - spreads the packed shingle bytes over all 64 bits"""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
+class MinHasher:
+    def __init__(self, num_perm=64, seed=MINHASH_SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, text):
+        """num_perm minimum hashes of text's shingles - the share of positions two
+        signatures agree on estimates the Jaccard similarity of their shingle sets"""
+        hashed = (_mix(shingle_values(text)) * self._a + self._b) % MERSENNE_PRIME
+        return (hashed.min(axis=1) & MAX_HASH).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of recently qualified leads. A lead reuses the result of
+    one the same sender submitted within window_seconds when their estimated
+    Jaccard similarity is at least threshold. Signatures are split into bands;
+    each band of each lead goes into a bucket keyed by the band values and the
+    sender, so a lookup probes `bands` small buckets however big the index
+    grows. With a path the entries are also kept in SQLite - loaded on start and
+    synced on every lookup, so processes sharing the file see each other's leads.
+    Every process still holds its own copy of up to max_entries leads (roughly
+    2 KB each)"""
+
+    def __init__(self, threshold=0.7, window_seconds=86400, max_entries=100000, path=None,
+                 num_perm=64, bands=16):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self.bands = bands
+        self.hasher = MinHasher(num_perm)
+        self.hits = 0
+        self.misses = 0
+        self._rows = num_perm // bands
+        # id -> (created_at, sender, signature bytes, result JSON) - kept as
+        # bytes and text, a fraction of the size of arrays and dicts
+        self._entries = OrderedDict()
+        # hash of (band, sender, band values) -> id, or a list of ids once shared
+        self._buckets = {}
+        self._next_id = 1
+        self._synced_id = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS near_duplicate_leads ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT NOT NULL, signature BLOB NOT NULL, "
+                "result TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            with self._lock:
+                now = time.time()
+                self._conn.execute(
+                    "DELETE FROM near_duplicate_leads WHERE created_at < ?", (now - window_seconds,)
+                )
+                self._sync(now)
+
+    def _band_keys(self, sender, signature):
+        width = self._rows * 4
+        return [hash((band, sender, signature[band * width:(band + 1) * width])) for band in range(self.bands)]
+
+    def _index(self, entry_id, created_at, sender, signature, result):
+        self._entries[entry_id] = (created_at, sender, signature, result)
+        for key in self._band_keys(sender, signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = entry_id
+            elif isinstance(bucket, list):
+                bucket.append(entry_id)
+            else:
+                self._buckets[key] = [bucket, entry_id]
+
+    def _unindex(self, entry_id):
+        _, sender, signature, _ = self._entries.pop(entry_id)
+        for key in self._band_keys(sender, signature):
+            bucket = self._buckets[key]
+            if not isinstance(bucket, list):
+                del self._buckets[key]
+                continue
+            bucket.remove(entry_id)
+            if len(bucket) == 1:
+                self._buckets[key] = bucket[0]
+
+    def _candidates(self, sender, signature):
+        seen = set()
+        for key in self._band_keys(sender, signature):
+            bucket = self._buckets.get(key)
+            for entry_id in bucket if isinstance(bucket, list) else () if bucket is None else (bucket,):
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    yield entry_id
+
+    def _prune(self, now):
+        # Entries are roughly in arrival order, so the oldest are at the front
+        while self._entries:
+            entry_id, (created_at, _, _, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - created_at <= self.window_seconds:
+                break
+            self._unindex(entry_id)
+
+    def _sync(self, now):
+        """Index the rows other processes added since the last sync. Only the
+        newest max_entries of them can be kept, so older ones aren't read"""
+        rows = self._conn.execute(
+            "SELECT id, sender, signature, result, created_at FROM near_duplicate_leads "
+            "WHERE id > ? AND created_at >= ? ORDER BY id DESC LIMIT ?",
+            (self._synced_id, now - self.window_seconds, self.max_entries)
+        ).fetchall()
+        for entry_id, sender, signature, result, created_at in reversed(rows):
+            if entry_id not in self._entries:
+                self._index(entry_id, created_at, sender, signature, result)
+        if rows:
+            self._synced_id = rows[0][0]
+            self._prune(now)
+
+    def get(self, sender, text, now=None):
+        """(result, similarity) of the most similar recent lead of sender, or None"""
+        now = time.time() if now is None else now
+        values = self.hasher.signature(text)
+        signature = values.tobytes()
+        with self._lock:
+            if self._conn is not None:
+                self._sync(now)
+            best, best_similarity = None, self.threshold
+            for entry_id in self._candidates(sender, signature):
+                created_at, entry_sender, entry_signature, result = self._entries[entry_id]
+                if entry_sender != sender or now - created_at > self.window_seconds:
+                    continue
+                similarity = int(np.count_nonzero(np.frombuffer(entry_signature, dtype=np.uint32) == values)) / len(values)
+                if similarity >= best_similarity:
+                    best, best_similarity = result, similarity
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(best), best_similarity
+
+    def add(self, sender, text, result, now=None):
+        now = time.time() if now is None else now
+        signature = self.hasher.signature(text).tobytes()
+        result = json.dumps(result)
+        with self._lock:
+            if self._conn is not None:
+                entry_id = self._conn.execute(
+                    "INSERT INTO near_duplicate_leads (sender, signature, result, created_at) VALUES (?, ?, ?, ?)",
+                    (sender, signature, result, now)
+                ).lastrowid
+                if entry_id % 1000 == 0:
+                    self._conn.execute(
+                        "DELETE FROM near_duplicate_leads WHERE created_at < ?", (now - self.window_seconds,)
+                    )
+            else:
+                entry_id = self._next_id
+                self._next_id += 1
+            self._index(entry_id, now, sender, signature, result)
+            self._prune(now)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite" if self._conn is not None else "memory",
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "window_seconds": self.window_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_near_duplicate_index(backend, path=None, threshold=0.7, window_seconds=86400, max_entries=100000):
+    """Build the configured index - 'memory', 'sqlite' (memory, persisted to path) or 'none'"""
+    backend = (backend or "none").lower()
+    if backend == "memory":
+        return NearDuplicateIndex(threshold, window_seconds, max_entries)
+    if backend == "sqlite":
+        return NearDuplicateIndex(threshold, window_seconds, max_entries, path=path or "near_duplicates.sqlite3")
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown near-duplicate backend '{backend}' - expected memory, sqlite or none")
@@ -0,0 +1,61 @@
+from near_duplicates import NearDuplicateIndex, lead_text
+
+LEAD = {
+    "name": "Sarah Johnson",
+    "email": "Sarah.Johnson@techcorp.com",
+    "phone": "+1-458-789-3456",
+    "company": "TechCorp Solutions",
+    "message": "We are a sales team of 40 people looking for a lead qualification system. "
+               "I'm the VP of Sales, our budget is $50,000 and we want to start this quarter.",
+}
+RESULT = {"score": 9, "category": "HOT", "reason": "Clear budget and timeline"}
+
+
+def test_edited_resubmissions_reuse_the_result():
+    index = NearDuplicateIndex()
+    index.add(*lead_text(LEAD), RESULT, now=0)
+    edited = dict(LEAD, email=" sarah.johnson@TECHCORP.com", message=LEAD["message"].replace("40", "45") + " Thanks!")
+    result, similarity = index.get(*lead_text(edited), now=60)
+    assert result == RESULT and 0.7 <= similarity < 1
+
+    # A different message, another sender or an expired window don't match
+    assert index.get(*lead_text(dict(LEAD, message="Can you send me your pricing for agencies?")), now=60) is None
+    assert index.get(*lead_text(dict(edited, email="sam@techcorp.com")), now=60) is None
+    assert index.get(*lead_text(edited), now=86401) is None
+    assert index.stats()["hits"] == 1
+
+
+def test_size_limit_drops_the_oldest_leads():
+    index = NearDuplicateIndex(max_entries=2)
+    for number in range(3):
+        index.add(*lead_text(dict(LEAD, email=f"buyer{number}@techcorp.com")), RESULT, now=number)
+    assert index.stats()["size"] == 2
+    assert index.get(*lead_text(dict(LEAD, email="buyer0@techcorp.com")), now=3) is None
+    assert index.get(*lead_text(dict(LEAD, email="buyer2@techcorp.com")), now=3) is not None
+
+
+def test_sqlite_index_is_shared_and_reloaded(tmp_path):
+    path = str(tmp_path / "near_duplicates.sqlite3")
+    first, second = NearDuplicateIndex(path=path), NearDuplicateIndex(path=path)
+    first.add(*lead_text(LEAD), RESULT)
+    # The other process sees it on its next lookup, and a restart loads it
+    assert second.get(*lead_text(LEAD))[0] == RESULT
+    assert NearDuplicateIndex(path=path).stats()["size"] == 1
+
+
+def test_sqlite_sync_keeps_to_the_size_limit(tmp_path):
+    path = str(tmp_path / "near_duplicates.sqlite3")
+    reader, writer = NearDuplicateIndex(max_entries=2, path=path), NearDuplicateIndex(path=path)
+    for number in range(5):
+        writer.add(*lead_text(dict(LEAD, email=f"buyer{number}@techcorp.com")), RESULT)
+    # Leads other workers add are trimmed on lookup, and a restart only loads the newest
+    assert reader.get(*lead_text(dict(LEAD, email="buyer4@techcorp.com")))[0] == RESULT
+    assert reader.stats()["size"] == 2
+    assert reader.get(*lead_text(dict(LEAD, email="buyer0@techcorp.com"))) is None
+    assert NearDuplicateIndex(max_entries=3, path=path).stats()["size"] == 3
+
+
+if __name__ == "__main__":
+    test_edited_resubmissions_reuse_the_result()
+    test_size_limit_drops_the_oldest_leads()
+    print("All near-duplicate checks passed")
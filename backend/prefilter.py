@@ -0,0 +1,156 @@
+import hashlib
+import re
+import threading
+import time
+
+# Throwaway inbox providers - nobody with a real project behind them uses one
+DISPOSABLE_EMAIL_DOMAINS = frozenset({
+    "10minutemail.com", "20minutemail.com", "33mail.com", "anonaddy.me", "burnermail.io",
+    "discard.email", "dispostable.com", "emailondeck.com", "fakeinbox.com", "getairmail.com",
+    "getnada.com", "guerrillamail.biz", "guerrillamail.com", "guerrillamail.de", "guerrillamail.net",
+    "guerrillamail.org", "guerrillamailblock.com", "harakirimail.com", "incognitomail.org",
+    "jetable.org", "mailcatch.com", "maildrop.cc", "mailinator.com", "mailinator.net",
+    "mailnesia.com", "mailnull.com", "mintemail.com", "mohmal.com", "mytemp.email",
+    "nada.email", "sharklasers.com", "spam4.me", "spambox.us", "spamgourmet.com",
+    "temp-mail.io", "temp-mail.org", "tempail.com", "tempmail.com", "tempmail.net",
+    "tempmailo.com", "tempr.email", "throwawaymail.com", "trash-mail.com", "trashmail.com",
+    "trashmail.de", "yopmail.com", "yopmail.fr", "yopmail.net",
+})
+
+# Free webmail - real prospects use these too, so they only raise the content bar
+FREE_EMAIL_HOSTS = frozenset({
+    "aol.com", "gmail.com", "gmx.com", "gmx.de", "gmx.net", "googlemail.com", "hotmail.co.uk",
+    "hotmail.com", "hotmail.fr", "icloud.com", "live.com", "mac.com", "mail.com", "mail.ru",
+    "me.com", "msn.com", "outlook.com", "proton.me", "protonmail.com", "qq.com", "yahoo.co.uk",
+    "yahoo.com", "yahoo.fr", "yandex.com", "yandex.ru", "zoho.com",
+})
+
+PLACEHOLDER_COMPANY_NAMES = frozenset({"", "unknown", "none", "n/a", "na", "-"})
+
+# Why a lead was rejected, as reported in its result
+REJECTION_REASONS = {
+    "invalid_email": "no valid email address",
+    "disposable_email": "disposable email domain",
+    "thin_content": "too little message content to qualify",
+    "rate_limited": "too many submissions from this email address or IP",
+    "duplicate_message": "the same message was sent from several other email addresses",
+}
+
+# Short stock phrases ("please send pricing") repeat between real visitors, so
+# only longer messages are checked for duplicates
+DUPLICATE_MIN_WORDS = 8
+
+# The top-level domain starts with a letter - digits and hyphens cover punycode ones like xn--p1ai
+EMAIL_ADDRESS = re.compile(r'^[^@\s]+@([^@\s]+\.[a-z][a-z0-9-]*[a-z0-9])$')
+WORD = re.compile(r'[^\W\d_]{2,}')
+
+
+def email_domain(email):
+    """Lowercased domain of an email address, or None when it isn't one"""
+    match = EMAIL_ADDRESS.match(email.strip().lower())
+    return match.group(1) if match else None
+
+
+def domain_in(domain, domains):
+    """True when domain or one of its parent domains is in domains"""
+    labels = domain.split('.')
+    return any('.'.join(labels[index:]) in domains for index in range(len(labels) - 1))
+
+
+def message_fingerprint(words):
+    """Digest of a message's words - case, punctuation, numbers and spacing don't change it"""
+    return hashlib.blake2b(" ".join(words).encode('utf-8'), digest_size=8).digest()
+
+
+class WindowCounter:
+    """Per-key counts for the current fixed time window. The counts are dropped
+    wholesale when the window rolls over, so memory is bounded by one window's traffic"""
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self._window = None
+        self._counts = {}
+
+    def _roll(self, now):
+        window = int(now // self.window_seconds)
+        if window != self._window:
+            self._window = window
+            self._counts = {}
+
+    def increment(self, key, now):
+        """Count one event for key; returns the count so far this window"""
+        self._roll(now)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        return self._counts[key]
+
+    def add_member(self, key, member, now):
+        """Record member under key; returns how many distinct members key has this window"""
+        self._roll(now)
+        members = self._counts.setdefault(key, set())
+        members.add(member)
+        return len(members)
+
+
+class LeadPrefilter:
+    """Cheap checks in front of scoring that reject spam and contentless leads
+    before they can reach the crew. check() returns a key of REJECTION_REASONS,
+    or None for a lead worth scoring. Limits of 0 are off"""
+
+    def __init__(self, min_words=3, free_mail_min_words=8, max_per_email=5, max_per_ip=30,
+                 max_duplicate_senders=3, window_seconds=3600,
+                 disposable_domains=DISPOSABLE_EMAIL_DOMAINS, free_mail_domains=FREE_EMAIL_HOSTS):
+        self.min_words = min_words
+        self.free_mail_min_words = free_mail_min_words
+        self.max_per_email = max_per_email
+        self.max_per_ip = max_per_ip
+        self.max_duplicate_senders = max_duplicate_senders
+        self.disposable_domains = disposable_domains
+        self.free_mail_domains = free_mail_domains
+        self.checked = 0
+        self.rejected = dict.fromkeys(REJECTION_REASONS, 0)
+        self._per_email = WindowCounter(window_seconds)
+        self._per_ip = WindowCounter(window_seconds)
+        self._senders = WindowCounter(window_seconds)
+        self._lock = threading.Lock()
+
+    def check(self, lead, ip=None, track=True, now=None):
+        """track=False (e.g. for bulk imports) skips the rate limits and the
+        duplicate check, which count form submissions"""
+        with self._lock:
+            reason = self._check(lead, ip, track, time.time() if now is None else now)
+            self.checked += 1
+            if reason is not None:
+                self.rejected[reason] += 1
+        return reason
+
+    def _check(self, lead, ip, track, now):
+        # Every submission from an IP counts, spam included
+        if track and ip and self.max_per_ip and self._per_ip.increment(ip, now) > self.max_per_ip:
+            return "rate_limited"
+
+        email = str(lead.get('email', '')).strip().lower()
+        domain = email_domain(email)
+        if domain is None:
+            return "invalid_email"
+        if track and self.max_per_email and self._per_email.increment(email, now) > self.max_per_email:
+            return "rate_limited"
+        if domain_in(domain, self.disposable_domains):
+            return "disposable_email"
+
+        words = WORD.findall(str(lead.get('message', '')).lower())
+        min_words = self.min_words
+        if (domain_in(domain, self.free_mail_domains) and
+                str(lead.get('company', '')).strip().lower() in PLACEHOLDER_COMPANY_NAMES):
+            # Nothing but a webmail address to go on - the message has to say more
+            min_words = self.free_mail_min_words
+        if len(words) < min_words:
+            return "thin_content"
+
+        if (track and self.max_duplicate_senders and len(words) >= DUPLICATE_MIN_WORDS and
+                self._senders.add_member(message_fingerprint(words), email, now) > self.max_duplicate_senders):
+            return "duplicate_message"
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {"checked": self.checked, "rejected": dict(self.rejected)}
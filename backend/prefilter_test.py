@@ -0,0 +1,56 @@
+from prefilter import LeadPrefilter, domain_in, email_domain
+
+LEAD = {
+    "name": "Sarah Johnson",
+    "email": "sarah.johnson@techcorp.com",
+    "company": "TechCorp Solutions",
+    "message": "We need a lead qualification system for our sales team of 40 people.",
+}
+
+
+def test_domain_and_content_checks():
+    prefilter = LeadPrefilter()
+    assert email_domain(" Sarah@TechCorp.com ") == "techcorp.com"
+    # Internationalized top-level domains arrive in punycode
+    assert email_domain("ivan@example.xn--p1ai") == "example.xn--p1ai"
+    assert email_domain("sarah@techcorp.c0m-") is None
+    assert domain_in("eu.mailinator.com", prefilter.disposable_domains)
+    assert not domain_in("mailinator.com.example.org", prefilter.disposable_domains)
+
+    assert prefilter.check(LEAD, track=False) is None
+    assert prefilter.check(dict(LEAD, email="sarah@"), track=False) == "invalid_email"
+    assert prefilter.check(dict(LEAD, email="x@sub.yopmail.com"), track=False) == "disposable_email"
+    assert prefilter.check(dict(LEAD, message="info pls"), track=False) == "thin_content"
+    # A webmail address without a company needs a longer message
+    webmail = dict(LEAD, email="sarah@gmail.com", company="n/a", message="Send me some pricing info")
+    assert prefilter.check(webmail, track=False) == "thin_content"
+    assert prefilter.check(dict(webmail, company="TechCorp"), track=False) is None
+
+
+def test_rate_limits_reset_with_the_window():
+    prefilter = LeadPrefilter(max_per_email=2, max_per_ip=3, window_seconds=60)
+    assert [prefilter.check(LEAD, ip="1.2.3.4", now=0) for _ in range(3)] == [None, None, "rate_limited"]
+    # Another address from the same IP runs into the IP limit
+    assert prefilter.check(dict(LEAD, email="sam@techcorp.com"), ip="1.2.3.4", now=1) == "rate_limited"
+    assert prefilter.check(LEAD, ip="1.2.3.4", now=60) is None
+    assert prefilter.stats()["rejected"]["rate_limited"] == 2
+
+
+def test_the_same_message_from_many_senders_is_rejected():
+    prefilter = LeadPrefilter(max_duplicate_senders=2)
+    senders = [dict(LEAD, email=f"buyer{index}@company{index}.com") for index in range(3)]
+    # Resubmissions by one sender don't count, case, punctuation and numbers don't matter
+    assert prefilter.check(senders[0], now=0) is None
+    assert prefilter.check(senders[0], now=0) is None
+    assert prefilter.check(dict(senders[1], message=LEAD["message"].upper().replace("40", "99")), now=0) is None
+    assert prefilter.check(senders[2], now=0) == "duplicate_message"
+    # Short stock phrases are never duplicates
+    assert all(prefilter.check(dict(sender, message="Please send me pricing"), now=0) is None
+               for sender in senders)
+
+
+if __name__ == "__main__":
+    test_domain_and_content_checks()
+    test_rate_limits_reset_with_the_window()
+    test_the_same_message_from_many_senders_is_rejected()
+    print("All prefilter checks passed")
@@ -0,0 +1,107 @@
+import re
+from scoring_rules import signal_matcher
+
+# Stands in for the sentences cut from a long message
+OMISSION = " [...] "
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\s*\n\s*')
+
+
+def count_tokens(text, model):
+    """Tokens text takes up in model's prompt. LiteLLM ships the OpenAI
+    tokenizers, so counting needs no network - it is loaded with CrewAI"""
+    from litellm import encode
+    return len(encode(model=model, text=text))
+
+
+def truncate_tokens(text, budget_tokens, model):
+    from litellm import decode, encode
+    return decode(model=model, tokens=encode(model=model, text=text)[:budget_tokens])
+
+
+def split_sentences(message, model):
+    """(sentence, tokens, scoring signals found) for each sentence of message"""
+    return [
+        (sentence, count_tokens(sentence, model), len(signal_matcher.find(sentence)))
+        for sentence in SENTENCE_BOUNDARY.split(message) if sentence
+    ]
+
+
+def join_kept(sentences, kept):
+    """The kept sentences in their original order, each gap marked with OMISSION"""
+    text = ""
+    for index, (sentence, _, _) in enumerate(sentences):
+        if kept[index]:
+            text += sentence if not text or text.endswith(OMISSION) else " " + sentence
+        elif not text.endswith(OMISSION):
+            text += OMISSION
+    return text.strip()
+
+
+def fit_message(message, budget_tokens, model, sentences=None):
+    """Cut message down to budget_tokens. Keeps the opening sentence (cut to half
+    the budget when it alone is over), then the sentences with the most scoring
+    signals (budget, role, timeline...), then the rest while they fit - in their
+    original order, each gap marked with OMISSION.
+    Pass split_sentences' result to fit one message to several budgets"""
+    # A token is at least one character, so short messages skip the tokenizer
+    if len(message) <= budget_tokens:
+        return message
+    if sentences is None:
+        sentences = split_sentences(message, model)
+    if sum(tokens for _, tokens, _ in sentences) <= budget_tokens:
+        return message
+
+    omission_tokens = count_tokens(OMISSION, model)
+    opening, opening_tokens, opening_signals = sentences[0]
+    if opening_tokens + omission_tokens > budget_tokens:
+        cut = truncate_tokens(opening, (budget_tokens - omission_tokens) // 2, model)
+        # The rest of the opening never fits next to its start - it stays the gap after the cut
+        sentences = [(cut, count_tokens(cut, model), opening_signals), (opening, opening_tokens, 0), *sentences[1:]]
+
+    priority = sorted(
+        range(len(sentences)),
+        key=lambda index: (index != 0, -sentences[index][2], index)
+    )
+    # Every gap costs an OMISSION - keeping a sentence can open a gap, split one or close one
+    kept = [False] * len(sentences)
+    used = 0
+    gaps = 1
+    for index in priority:
+        open_left = index > 0 and not kept[index - 1]
+        open_right = index < len(sentences) - 1 and not kept[index + 1]
+        new_gaps = gaps + (1 if open_left and open_right else 0 if open_left or open_right else -1)
+        tokens = sentences[index][1]
+        if used + tokens + new_gaps * omission_tokens <= budget_tokens:
+            kept[index] = True
+            used += tokens
+            gaps = new_gaps
+
+    # Sentences can tokenize differently once joined - drop the least important until it fits
+    for index in [index for index in reversed(priority) if kept[index]]:
+        text = join_kept(sentences, kept)
+        if count_tokens(text, model) <= budget_tokens:
+            return text
+        kept[index] = False
+    # Not even the opening sentence fits
+    return truncate_tokens(sentences[0][0], max(budget_tokens - omission_tokens, 0), model) + OMISSION.rstrip()
+
+
+class PromptBuilder:
+    """Fills the agent task templates for a lead within token budgets. The
+    analyzer gets every field and the message cut to message_tokens; the
+    researcher only what it needs - company, email domain and a shorter excerpt"""
+
+    def __init__(self, model, message_tokens=400, research_message_tokens=80):
+        self.model = model
+        self.message_tokens = message_tokens
+        self.research_message_tokens = research_message_tokens
+
+    def task_inputs(self, lead_info):
+        inputs = {field: str(lead_info[field]) for field in ('name', 'email', 'phone', 'company')}
+        message = str(lead_info['message'])
+        # Tokenized once for both budgets
+        sentences = split_sentences(message, self.model) if len(message) > self.research_message_tokens else None
+        inputs['message'] = fit_message(message, self.message_tokens, self.model, sentences)
+        inputs['message_excerpt'] = fit_message(message, self.research_message_tokens, self.model, sentences)
+        inputs['email_domain'] = inputs['email'].rpartition('@')[2].strip() or "unknown"
+        return inputs
@@ -0,0 +1,56 @@
+from prompt_builder import OMISSION, PromptBuilder, count_tokens, fit_message
+
+MODEL = "gpt-3.5-turbo-instruct"
+LEAD = {
+    "name": "Sarah Johnson",
+    "email": "sarah.johnson@techcorp.com",
+    "phone": "+1-458-789-3456",
+    "company": "TechCorp Solutions",
+    "message": "We need a lead qualification system. Our budget is $50,000.",
+}
+
+
+def test_short_messages_are_sent_as_they_are():
+    inputs = PromptBuilder(MODEL).task_inputs(LEAD)
+    assert inputs["message"] == inputs["message_excerpt"] == LEAD["message"]
+    assert inputs["email_domain"] == "techcorp.com"
+    assert PromptBuilder(MODEL).task_inputs(dict(LEAD, email=""))["email_domain"] == "unknown"
+
+
+def test_long_messages_keep_the_opening_and_the_scoring_signals():
+    filler = "We went through the usual internal review of our tooling last week. " * 200
+    message = "Hello from TechCorp. " + filler + "I'm the CTO and we have a budget of $50,000. " + filler + "Thanks!"
+    fitted = fit_message(message, 100, MODEL)
+    assert count_tokens(fitted, MODEL) <= 100
+    assert fitted.startswith("Hello from TechCorp.")
+    assert "I'm the CTO and we have a budget of $50,000." in fitted
+    assert OMISSION.strip() in fitted
+
+    # Even a single endless sentence fits
+    assert count_tokens(fit_message("word " * 5000, 50, MODEL), MODEL) <= 50
+
+
+def test_every_gap_counts_against_the_budget():
+    # Signal sentences between filler leave a gap, and an OMISSION, after each one kept
+    message = " ".join(
+        "I'm the CTO with a budget of $50,000." if index % 2 else "We went through the usual review of our tooling."
+        for index in range(40)
+    )
+    for budget in (80, 400):
+        fitted = fit_message(message, budget, MODEL)
+        assert count_tokens(fitted, MODEL) <= budget
+        assert fitted.count(OMISSION.strip()) > 1
+
+    # An opening over the whole budget is cut short rather than dropped
+    message = "Hello from " + "a very " * 300 + "long opening. I'm the CTO with a budget of $50,000. Thanks!"
+    fitted = fit_message(message, 80, MODEL)
+    assert count_tokens(fitted, MODEL) <= 80
+    assert fitted.startswith("Hello from a very")
+    assert "I'm the CTO with a budget of $50,000." in fitted
+
+
+if __name__ == "__main__":
+    test_short_messages_are_sent_as_they_are()
+    test_long_messages_keep_the_opening_and_the_scoring_signals()
+    test_every_gap_counts_against_the_budget()
+    print("All prompt builder checks passed")
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Fields that identify a lead for caching - source is left out on purpose,
+# so a Make.com retry of a web form submission still hits the cache
+CACHE_KEY_FIELDS = ('name', 'email', 'phone', 'company', 'message')
+WHITESPACE = re.compile(r'\s+')
+# The SQLite cache trims expired and surplus rows every this many inserts
+# rather than counting the table on each one, so it can run over
+# max_entries by up to this many rows in between
+SQLITE_PRUNE_INTERVAL = 100
+
+
+def normalize_lead(lead_info):
+    """Normalize lead fields so trivially different resubmissions hash the same"""
+    normalized = {}
+    for field in CACHE_KEY_FIELDS:
+        value = lead_info.get(field, '')
+        value = WHITESPACE.sub(' ', str(value if value is not None else '')).strip()
+        if field == 'email':
+            value = value.lower()
+        normalized[field] = value
+    return normalized
+
+
+def make_cache_key(lead_info, prompt_version, model_name):
+    """Content-addressed key over the normalized lead, prompt version and model"""
+    payload = json.dumps(
+        {"lead": normalize_lead(lead_info), "prompt_version": prompt_version, "model": model_name},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache(ABC):
+    """Base class for qualification result caches - tracks hit/miss counters"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def _is_expired(self, created_at, now):
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    @abstractmethod
+    def get(self, key):
+        pass
+
+    @abstractmethod
+    def set(self, key, result):
+        pass
+
+    @abstractmethod
+    def size(self):
+        pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": self.size(),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class MemoryResultCache(ResultCache):
+    """In-process LRU cache with a TTL"""
+    backend = "memory"
+
+    def __init__(self, max_entries=10000, ttl_seconds=86400):
+        super().__init__(max_entries, ttl_seconds)
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.time(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteResultCache(ResultCache):
+    """On-disk LRU cache with a TTL, shared by every process using the same file"""
+    backend = "sqlite"
+
+    def __init__(self, path, max_entries=10000, ttl_seconds=86400, prune_interval=SQLITE_PRUNE_INTERVAL):
+        super().__init__(max_entries, ttl_seconds)
+        self.path = path
+        self.prune_interval = prune_interval
+        self._inserts = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS qualification_results ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_qualification_results_last_access "
+            "ON qualification_results (last_access)"
+        )
+        with self._lock:
+            self._prune(time.time())
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM qualification_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._is_expired(row[1], now):
+                self._conn.execute("DELETE FROM qualification_results WHERE key = ?", (key,))
+                self.expirations += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE qualification_results SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, result):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO qualification_results (key, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now)
+            )
+            self._inserts += 1
+            if self._inserts % self.prune_interval == 0:
+                self._prune(now)
+
+    def _prune(self, now):
+        if self.ttl_seconds > 0:
+            self.expirations += self._conn.execute(
+                "DELETE FROM qualification_results WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        # Everything past the max_entries most recently used rows - found through the last_access index
+        self.evictions += self._conn.execute(
+            "DELETE FROM qualification_results WHERE key IN ("
+            "SELECT key FROM qualification_results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM qualification_results").fetchone()[0]
+
+    def size(self):
+        with self._lock:
+            return self._count()
+
+
+def create_result_cache(backend, path=None, max_entries=10000, ttl_seconds=86400):
+    """Build the configured cache backend - 'memory', 'sqlite' or 'none'"""
+    backend = (backend or "none").lower()
+    if backend == "memory":
+        return MemoryResultCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteResultCache(path or "result_cache.sqlite3", max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown result cache backend '{backend}' - expected memory, sqlite or none")
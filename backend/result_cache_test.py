@@ -0,0 +1,74 @@
+import time
+import pytest
+from result_cache import MemoryResultCache, SQLiteResultCache, create_result_cache, make_cache_key, normalize_lead
+
+LEAD = {
+    "name": "Sarah Johnson",
+    "email": "sarah.johnson@techcorp.com",
+    "phone": "+1-458-789-3456",
+    "company": "TechCorp Solutions",
+    "message": "We need a lead qualification system. Our budget is $50,000.",
+}
+RESULT = {"score": 8, "category": "HOT", "reason": "Clear budget"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_resubmissions_share_a_key():
+    resubmitted = dict(LEAD, email=" Sarah.Johnson@TechCorp.com", message="We need a lead  qualification\nsystem. Our budget is $50,000. ",
+                       source="Make.com")
+    assert normalize_lead(resubmitted) == normalize_lead(LEAD)
+    assert make_cache_key(resubmitted, "v1", "model") == make_cache_key(LEAD, "v1", "model")
+    assert normalize_lead(dict(LEAD, phone=None))["phone"] == ""
+
+    assert make_cache_key(dict(LEAD, message="We need a CRM."), "v1", "model") != make_cache_key(LEAD, "v1", "model")
+    assert make_cache_key(LEAD, "v2", "model") != make_cache_key(LEAD, "v1", "model")
+    assert make_cache_key(LEAD, "v1", "other-model") != make_cache_key(LEAD, "v1", "model")
+
+
+def test_entries_expire_after_the_ttl(clock, tmp_path):
+    for cache in (MemoryResultCache(ttl_seconds=60), SQLiteResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60)):
+        cache.set("lead", RESULT)
+        clock[0] += 60
+        assert cache.get("lead") == RESULT
+        clock[0] += 1
+        assert cache.get("lead") is None
+        assert (cache.hits, cache.misses, cache.expirations) == (1, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = MemoryResultCache(max_entries=2)
+    cache.set("first", RESULT)
+    cache.set("second", RESULT)
+    # Reading the first entry makes the second the least recently used
+    cache.get("first")
+    cache.set("third", RESULT)
+    assert cache.get("second") is None
+    assert cache.get("first") == cache.get("third") == RESULT
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_cache_is_shared_and_pruned(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteResultCache(path, max_entries=3, prune_interval=5)
+    for index in range(5):
+        cache.set(f"lead-{index}", dict(RESULT, score=index))
+        clock[0] += 1
+    # Trimmed to the most recently used entries once every prune_interval inserts
+    assert cache.size() == 3
+    assert cache.get("lead-1") is None and cache.stats()["evictions"] == 2
+
+    # Another process on the same file sees the entries
+    assert create_result_cache("sqlite", path=path).get("lead-4") == dict(RESULT, score=4)
+    assert create_result_cache("none") is None
+
+
+if __name__ == "__main__":
+    test_resubmissions_share_a_key()
+    test_least_recently_used_entries_are_evicted()
+    print("All result cache checks passed")
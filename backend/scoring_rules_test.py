@@ -0,0 +1,183 @@
+import random
+import re
+import timeit
+from scoring_rules import score_lead, has_high_intent_signals
+
+# Reference copy of the original regex-per-rule scorer from app.py, kept so
+# the rule table can be checked against it
+def legacy_direct_score_lead(lead_data):
+    message = lead_data.get('message', '')
+    email = lead_data.get('email', '')
+    name = lead_data.get('name', '')
+    company = lead_data.get('company', '')
+
+    if not isinstance(message, str):
+        message = str(message) if message is not None else ""
+
+    intent_score = 0
+    contact_score = 0
+    quality_score = 0
+
+    if re.search(r'budget|\$\d+|\d+ dollars|cost|pricing|investment', message, re.IGNORECASE):
+        intent_score += 2
+    if re.search(r'CTO|CEO|CIO|CFO|Chief|Director|VP|decision maker|authority', message, re.IGNORECASE):
+        intent_score += 1.5
+    if re.search(r'urgent|immediate|asap|soon|next month|within \d+ (days|weeks)|this quarter', message, re.IGNORECASE):
+        intent_score += 0.5
+
+    if email and not re.search(r'@(gmail|yahoo|hotmail|outlook|aol)', email, re.IGNORECASE):
+        contact_score += 1
+    if lead_data.get('phone', '') and len(str(lead_data.get('phone', ''))) > 5:
+        contact_score += 1
+    if name and ' ' in name:
+        contact_score += 0.5
+    if company and str(company).lower() not in ['unknown', 'none', 'n/a']:
+        contact_score += 0.5
+
+    if re.search(r'industry|sector|market|field|business type', message, re.IGNORECASE):
+        quality_score += 1
+    if re.search(r'need to|looking to|want to|trying to|goal is|problem with|solution for', message, re.IGNORECASE):
+        quality_score += 1.5
+    if re.search(r'\d+ (employees|customers|users|clients|leads|sales|revenue)', message, re.IGNORECASE):
+        quality_score += 0.5
+
+    total_score = intent_score + contact_score + quality_score
+    score = round(total_score)
+    score = max(1, min(10, score))
+
+    if score >= 8:
+        category = "HOT"
+        action = "URGENT: Follow up within 2 hours - High priority lead"
+    elif score >= 5:
+        category = "WARM"
+        action = "PRIORITY: Follow up within 24 hours - Nurture to reach decision makers"
+    else:
+        category = "COLD"
+        action = "STANDARD: Add to nurture campaign"
+
+    if (re.search(r'CTO|CEO|Chief|Director|VP|decision maker', message, re.IGNORECASE) and
+        re.search(r'budget|\$\d+|cost', message, re.IGNORECASE) and
+        len(message) > 100):
+        return {
+            "score": 9,
+            "reason": "Direct scoring: High intent detected (decision maker + budget + detailed needs)",
+            "action": "URGENT: Follow up within 2 hours - High priority lead",
+            "category": "HOT",
+            "market_insights": "Detailed needs specified, indicating serious buyer with specific timeframe"
+        }
+
+    return {
+        "score": score,
+        "reason": f"Direct scoring: Intent({intent_score}/4) + Contact({contact_score}/3) + Quality({quality_score}/3) = {score}",
+        "action": action,
+        "category": category,
+        "market_insights": "Mixed buying signals with moderate intent"
+    }
+
+
+def legacy_check_high_intent_signals(message):
+    if re.search(r'CTO|CEO|Chief|Director|VP|decision maker', message, re.IGNORECASE) and \
+       re.search(r'budget|\$\d+|cost|investment|spending', message, re.IGNORECASE):
+        return True
+    return False
+
+
+hot_lead = {
+    "name": "Sarah Johnson",
+    "email": "sarah.johnson@techcorp.com",
+    "phone": "+1-458-789-3456",
+    "company": "TechCorp Solutions",
+    "message": "I'm the CTO at TechCorp and we urgently need to implement your lead qualification system by next month. We have a budget of $50,000 for this project and we're evaluating 2-3 vendors this week. Our sales team of 35 people needs better qualification tools as we're getting 300+ leads weekly.",
+    "source": "Web Form"
+}
+
+warm_lead = {
+    "name": "Michael Rodriguez",
+    "email": "m.rodriguez@midmarket.co",
+    "phone": "+1-332-555-7890",
+    "company": "Midmarket Enterprises",
+    "message": "We're looking to improve our lead qualification process. Your solution looks interesting. Could you provide some pricing information and case studies? We may implement something in the next quarter.",
+    "source": "Web Form"
+}
+
+cold_lead = {
+    "name": "John Smith",
+    "email": "johnsmith@gmail.com",
+    "phone": "+1-123-456-7890",
+    "company": "Unknown",
+    "message": "Please send me more information about your services.",
+    "source": "Web Form"
+}
+
+# Message fragments covering every signal, plus overlaps like "$500 employees"
+FRAGMENTS = [
+    "budget", "$500", "$500 employees", "20 dollars", "cost", "pricing", "investment", "spending",
+    "CTO", "ceo", "CIO", "CFO", "chief", "Director", "vp", "decision maker", "authority",
+    "urgent", "immediately", "ASAP", "soon", "next month", "within 3 days", "within 2 weeks",
+    "this quarter", "industry", "sector", "market", "field", "business type", "need to",
+    "looking to", "want to", "trying to", "goal is", "problem with", "solution for",
+    "40 employees", "100 customers", "5 users", "12 clients", "300 leads", "9 sales",
+    "1 revenue", "hello", "please send info", "we are a team", "2-3 vendors", "{", "}",
+    # Case forms re.IGNORECASE matches but lowercasing doesn't map to ASCII
+    "CİO", "İndustry", "Dırector", "chıef", "ſoon", "ſpending", "marKet", "aſap", "Key",
+]
+
+NAMES = ["Sarah Johnson", "John", "", "Ann Lee", "X"]
+EMAILS = ["sarah@techcorp.com", "john@gmail.com", "a@Yahoo.com", "", "ops@outlook.co.uk"]
+PHONES = ["+1-458-789-3456", "555", "", "415-555-0123", 1234567]
+COMPANIES = ["TechCorp", "Unknown", "N/A", "none", "", "Acme Inc"]
+
+
+def random_lead(rng):
+    words = [rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 25))]
+    return {
+        "name": rng.choice(NAMES),
+        "email": rng.choice(EMAILS),
+        "phone": rng.choice(PHONES),
+        "company": rng.choice(COMPANIES),
+        "message": " ".join(words),
+    }
+
+
+def test_parity_sample_leads():
+    for lead in (hot_lead, warm_lead, cold_lead):
+        assert score_lead(lead) == legacy_direct_score_lead(lead)
+
+
+def test_parity_edge_cases():
+    leads = [
+        {},
+        {"message": None},
+        {"message": 12345, "name": "A B"},
+        {"name": "A B", "email": "x@y.com", "phone": "+123456", "company": "Acme", "message": "$500 employees"},
+        {"name": "A B", "message": "Director " + "x" * 100 + " cost"},
+    ]
+    for lead in leads:
+        assert score_lead(lead) == legacy_direct_score_lead(lead)
+
+
+def test_parity_random_leads():
+    rng = random.Random(42)
+    for _ in range(5000):
+        lead = random_lead(rng)
+        assert score_lead(lead) == legacy_direct_score_lead(lead), lead
+        assert has_high_intent_signals(lead["message"]) == legacy_check_high_intent_signals(lead["message"])
+
+
+def benchmark(number=20000):
+    """Compare per-lead scoring time of the rule table against the legacy scorer"""
+    leads = [hot_lead, warm_lead, cold_lead]
+    for label, scorer in (("legacy", legacy_direct_score_lead), ("rule table", score_lead)):
+        elapsed = timeit.timeit(lambda: [scorer(lead) for lead in leads], number=number)
+        print(f"{label:>10}: {elapsed / (number * len(leads)) * 1e6:.2f} us/lead")
+
+
+if __name__ == "__main__":
+    print("=== Rule Engine Parity ===")
+    test_parity_sample_leads()
+    test_parity_edge_cases()
+    test_parity_random_leads()
+    print("All parity checks passed")
+
+    print("\n=== Rule Engine Benchmark ===")
+    benchmark()
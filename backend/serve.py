@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import uvicorn
+import metrics
+
+# What the workers share - anything set in the environment wins. The result
+# cache, near-duplicate index, company profiles and job store are SQLite files
+# every worker opens, so a lead cached by one worker is a hit in all of them
+# and queued jobs survive a worker restart. Each worker builds its crews before
+# taking requests
+WORKER_DEFAULTS = {
+    "RESULT_CACHE_BACKEND": "sqlite",
+    "NEAR_DUPLICATE_BACKEND": "sqlite",
+    "COMPANY_PROFILE_BACKEND": "sqlite",
+    "JOB_QUEUE_BACKEND": "sqlite",
+    "CREW_WARM_UP": "eager",
+    "CREW_VERBOSE": "false",
+    "METRICS_MULTIPROC_DIR": os.path.join(tempfile.gettempdir(), "lead-qualifier-metrics"),
+}
+
+
+def prepare_environment(environ=os.environ):
+    """Fill in the worker defaults and clear the metrics snapshots of a previous
+    run, which would be summed into this one's totals. The directory is the
+    operator's, so only the snapshot files are removed"""
+    for name, value in WORKER_DEFAULTS.items():
+        environ.setdefault(name, value)
+    metrics_dir = environ["METRICS_MULTIPROC_DIR"]
+    os.makedirs(metrics_dir, exist_ok=True)
+    metrics.clear_snapshots(metrics_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the lead qualification API with several worker processes")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args(argv)
+
+    prepare_environment()
+    # Every worker imports app on its own and gets its own LeadQualificationSystem
+    uvicorn.run(
+        "app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        access_log=False
+    )
+
+
+if __name__ == "__main__":
+    main()
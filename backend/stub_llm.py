@@ -0,0 +1,62 @@
+import json
+import time
+from crewai import LLM
+from llm_cassette import report_token_usage
+
+# Canned agent answers, picked by which JSON structure the prompt asks for -
+# the single-call prompt asks for both
+DEFAULT_ANALYSIS = {"score": 7, "category": "WARM", "reason": "Stubbed analysis"}
+DEFAULT_RESEARCH = {
+    "company_size": "Medium",
+    "industry": "Technology",
+    "potential_value": "Medium",
+    "key_insight": "Stubbed market insight"
+}
+
+# How the JSON answer is wrapped in the final answer - real models produce all of these
+OUTPUT_SHAPES = {
+    "json": "{answer}",
+    "fenced": "```json\n{answer}\n```",
+    "prose": "Here is my assessment of the lead.\n{answer}\nLet me know if you need more detail.",
+    # No JSON at all - exercises the heuristic score extraction
+    "unparseable": "The lead looks promising - I would rate it 7/10 with a WARM outlook.",
+}
+
+
+class StubLLM(LLM):
+    """Deterministic stand-in for the OpenAI LLM - no network, optional fixed latency"""
+
+    def __init__(self, latency_seconds=0.0, analysis=None, research=None, output_shape="json", **kwargs):
+        super().__init__(model=kwargs.pop("model", "stub-llm"), **kwargs)
+        if output_shape not in OUTPUT_SHAPES:
+            raise ValueError(f"Unknown output shape '{output_shape}' - expected one of {', '.join(OUTPUT_SHAPES)}")
+        self.latency_seconds = latency_seconds
+        self.analysis = analysis or DEFAULT_ANALYSIS
+        self.research = research or DEFAULT_RESEARCH
+        self.output_shape = output_shape
+        self.calls = 0
+        # The stop words of the latest call, as a wrapper passed them on
+        self.last_stop = None
+
+    # Capability checks would otherwise ask LiteLLM about a model it doesn't know
+    def supports_function_calling(self):
+        return False
+
+    def supports_stop_words(self):
+        return True
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, stop=None):
+        self.calls += 1
+        self.last_stop = self.stop if stop is None else stop
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        prompt = messages if isinstance(messages, str) else "\n".join(m.get("content", "") for m in messages)
+        if '"company_size"' in prompt and '"score"' in prompt:
+            answer = {**self.analysis, **self.research}
+        else:
+            answer = self.research if '"company_size"' in prompt else self.analysis
+        final_answer = OUTPUT_SHAPES[self.output_shape].format(answer=json.dumps(answer))
+        response = f"Thought: I now know the final answer\nFinal Answer: {final_answer}"
+        # Estimated at ~4 characters a token, so crew token usage isn't all zeros
+        report_token_usage(callbacks, len(prompt) // 4, len(response) // 4)
+        return response
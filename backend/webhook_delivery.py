@@ -0,0 +1,174 @@
+import asyncio
+import json
+import random
+import time
+import traceback
+import httpx
+
+# Worth another attempt - anything else in 4xx means the payload itself was refused
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class DeliveryError(Exception):
+    def __init__(self, message, retry=True, retry_after=None):
+        super().__init__(message)
+        self.retry = retry
+        self.retry_after = retry_after
+
+
+def backoff_delay(attempt, base_seconds, max_seconds):
+    """Exponential backoff with full jitter for the given 1-based attempt"""
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** (attempt - 1)))
+
+
+def _retry_after_seconds(response):
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class WebhookDelivery:
+    """Delivers payloads to a webhook (e.g. a Make.com scenario) in the background.
+    Payloads are queued and sent by workers sharing one pooled HTTP client. With
+    batch_size > 1 up to that many are sent together as {"leads": [...]}, for
+    receivers that iterate over the array. Failed sends are retried with
+    exponential backoff and finally appended to a dead-letter JSONL file"""
+
+    def __init__(self, url, batch_size=1, batch_wait_seconds=0.5, workers=2, max_attempts=5,
+                 backoff_seconds=1.0, max_backoff_seconds=60.0, timeout_seconds=10.0,
+                 max_queue=10000, dead_letter_path="webhook_dead_letter.jsonl", transport=None):
+        self.url = url
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.max_queue = max_queue
+        self.dead_letter_path = dead_letter_path
+        self.transport = transport
+        self.delivered = 0
+        self.batches = 0
+        self.retries = 0
+        self.dead_lettered = 0
+        self._queue = None
+        self._client = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers),
+            transport=self.transport,
+        )
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout_seconds=5.0):
+        """Give queued payloads a moment to go out, then dead-letter the rest"""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout_seconds)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        if leftover:
+            self._dead_letter(leftover, "undelivered at shutdown", 0)
+        await self._client.aclose()
+
+    def enqueue(self, payload):
+        """Queue a payload without waiting on the webhook. Returns False (and
+        dead-letters the payload) when the queue is full"""
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self._dead_letter([payload], "delivery queue full", 0)
+            return False
+        return True
+
+    def stats(self):
+        return {
+            "url_configured": bool(self.url),
+            "batch_size": self.batch_size,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    async def _work(self):
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                # Wait briefly for the batch to fill up
+                deadline = time.monotonic() + self.batch_wait_seconds
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+                await self._deliver(batch)
+            except asyncio.CancelledError:
+                # Stopped mid-fill or mid-delivery - the batch in hand would be lost
+                self._dead_letter(batch, "undelivered at shutdown", 0)
+                raise
+            except Exception as e:
+                print(f"Webhook delivery worker error: {e}")
+                traceback.print_exc()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch):
+        body = batch[0] if self.batch_size == 1 else {"leads": batch}
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._post(body)
+                self.delivered += len(batch)
+                self.batches += 1
+                return
+            except DeliveryError as e:
+                error = e
+            if not error.retry or attempt == self.max_attempts:
+                break
+            self.retries += 1
+            delay = backoff_delay(attempt, self.backoff_seconds, self.max_backoff_seconds)
+            if error.retry_after is not None:
+                delay = min(max(delay, error.retry_after), self.max_backoff_seconds)
+            await asyncio.sleep(delay)
+        print(f"Webhook delivery failed after {attempt} attempt(s): {error}")
+        self._dead_letter(batch, str(error), attempt)
+
+    async def _post(self, body):
+        try:
+            response = await self._client.post(self.url, json=body)
+        except httpx.HTTPError as e:
+            raise DeliveryError(f"{type(e).__name__}: {e}")
+        if response.status_code >= 400:
+            raise DeliveryError(
+                f"HTTP {response.status_code}: {response.text[:200]}",
+                retry=response.status_code in RETRY_STATUSES,
+                retry_after=_retry_after_seconds(response),
+            )
+
+    def _dead_letter(self, payloads, error, attempts):
+        self.dead_lettered += len(payloads)
+        record = {"failed_at": time.time(), "error": error, "attempts": attempts, "payloads": payloads}
+        try:
+            with open(self.dead_letter_path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"Could not write the webhook dead-letter file {self.dead_letter_path}: {e}")
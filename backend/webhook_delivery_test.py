@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import tempfile
+import httpx
+from webhook_delivery import WebhookDelivery, backoff_delay
+
+
+def receiver(statuses):
+    """Mock webhook answering with the given statuses in turn (200 once they run out)"""
+    received = []
+    statuses = list(statuses)
+
+    def handle(request):
+        received.append(json.loads(request.content))
+        return httpx.Response(statuses.pop(0) if statuses else 200)
+    return received, httpx.MockTransport(handle)
+
+
+async def deliver(delivery, payloads):
+    await delivery.start()
+    for payload in payloads:
+        assert delivery.enqueue(payload)
+    await delivery._queue.join()
+    await delivery.stop()
+
+
+def test_batches_and_retries():
+    with tempfile.TemporaryDirectory() as directory:
+        received, transport = receiver([503, 429])
+        delivery = WebhookDelivery("https://hook.example/lead", batch_size=3, batch_wait_seconds=0.05, workers=1,
+                                   backoff_seconds=0.001, transport=transport,
+                                   dead_letter_path=os.path.join(directory, "dead.jsonl"))
+        asyncio.run(deliver(delivery, [{"lead": {"id": index}} for index in range(5)]))
+        # The first batch of 3 is sent three times, then the remaining 2 go out together
+        assert [len(body["leads"]) for body in received] == [3, 3, 3, 2]
+        assert delivery.stats()["delivered"] == 5
+        assert delivery.retries == 2 and delivery.dead_lettered == 0
+
+
+def test_failures_are_dead_lettered():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "dead.jsonl")
+        received, transport = receiver([400, 500, 500])
+        delivery = WebhookDelivery("https://hook.example/lead", workers=1, max_attempts=2, backoff_seconds=0.001,
+                                   transport=transport, dead_letter_path=path)
+        asyncio.run(deliver(delivery, [{"lead": {"id": "rejected"}}, {"lead": {"id": "down"}}]))
+        # 400 is not retried, 500 is retried until the attempts run out
+        assert len(received) == 3
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        assert [(record["attempts"], record["payloads"][0]["lead"]["id"]) for record in records] == [
+            (1, "rejected"), (2, "down")
+        ]
+        assert delivery.stats()["dead_lettered"] == 2
+
+
+def test_stop_dead_letters_batches_in_flight():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "dead.jsonl")
+
+        async def slow_receiver(request):
+            await asyncio.sleep(5)
+            return httpx.Response(200)
+
+        async def stop_while_sending():
+            delivery = WebhookDelivery("https://hook.example/lead", workers=1,
+                                       transport=httpx.MockTransport(slow_receiver), dead_letter_path=path)
+            await delivery.start()
+            delivery.enqueue({"lead": {"id": 1}})
+            delivery.enqueue({"lead": {"id": 2}})
+            await asyncio.sleep(0.05)
+            await delivery.stop(drain_timeout_seconds=0.5)
+
+        asyncio.run(stop_while_sending())
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        # The payload being sent and the one still queued are both kept
+        assert sorted(record["payloads"][0]["lead"]["id"] for record in records) == [1, 2]
+
+
+def test_backoff_is_capped():
+    assert all(0 <= backoff_delay(attempt, 1.0, 8.0) <= min(8.0, 2 ** (attempt - 1)) for attempt in range(1, 10))
+
+
+if __name__ == "__main__":
+    test_batches_and_retries()
+    test_failures_are_dead_lettered()
+    test_stop_dead_letters_batches_in_flight()
+    test_backoff_is_capped()
+    print("All webhook delivery checks passed")
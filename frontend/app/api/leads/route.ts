@@ -68,12 +68,23 @@ export async function POST(request: Request) {
       // First try FastAPI
       // Replace hardcoded URLs with environment variables
       const FASTAPI_ENDPOINT = process.env.FASTAPI_ENDPOINT || 'http://127.0.0.1:8000/qualify-lead'
-      const MAKE_WEBHOOK_URL = process.env.MAKE_WEBHOOK_URL || 'https://hook.eu2.make.com/z2t98fek6llh43lihtjknw27iga7sirc'
+      // The backend queues Make.com deliveries and retries them, so the response doesn't wait on the webhook
+      const WEBHOOK_DELIVERY_ENDPOINT = process.env.WEBHOOK_DELIVERY_ENDPOINT || 'http://127.0.0.1:8000/webhook-deliveries'
+      // Shared secret the backend checks before relaying anything to Make.com
+      const WEBHOOK_DELIVERY_TOKEN = process.env.WEBHOOK_DELIVERY_TOKEN
       
       // Then use these variables in your fetch calls
+      // Pass the visitor's IP on - the backend rate limits form submissions per IP.
+      // Only the address our own proxy saw (the last hop it appended) is sent -
+      // hops before it come from the visitor and can be forged
+      const forwardedFor = request.headers.get('x-forwarded-for')?.split(',').pop()?.trim()
+        || request.headers.get('x-real-ip')
       const qualificationResponse = await fetch(FASTAPI_ENDPOINT, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: {
+          'Content-Type': 'application/json',
+          ...(forwardedFor ? { 'X-Forwarded-For': forwardedFor } : {})
+        },
         body: JSON.stringify(body)
       })
 
@@ -96,11 +107,14 @@ export async function POST(request: Request) {
           }
         })
 
-        // Send to Make.com with additional context for follow-up automation
+        // Queue for Make.com with additional context for follow-up automation
         try {
-          await fetch(MAKE_WEBHOOK_URL, {
+          const deliveryResponse = await fetch(WEBHOOK_DELIVERY_ENDPOINT, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: {
+              'Content-Type': 'application/json',
+              ...(WEBHOOK_DELIVERY_TOKEN ? { 'X-Webhook-Delivery-Token': WEBHOOK_DELIVERY_TOKEN } : {})
+            },
             body: JSON.stringify({
               lead: {
                 id: lead.id,
@@ -127,8 +141,11 @@ export async function POST(request: Request) {
               }
             })
           })
+          if (!deliveryResponse.ok) {
+            console.error('Make.com delivery was not queued:', deliveryResponse.status, await deliveryResponse.text())
+          }
         } catch (webhookError) {
-          console.error('Make.com webhook error:', webhookError)
+          console.error('Make.com delivery queue error:', webhookError)
           // Continue processing - don't fail the request if webhook fails
         }
         return NextResponse.json(lead)